@@ -2,13 +2,14 @@ from input import *
 from solution import *
 from branching import *
 import heapq
+import sys
 import time
 from rounding import perform_simple_rounding, perform_diving_heuristic
 
 
 if __name__ == "__main__":
-    # read in date
-    parameter = read_in(input_data)
+    # read in date (instance file from the command line if given)
+    parameter = read_in(sys.argv[1] if len(sys.argv) > 1 else input_data)
 
     # initialize
     t1 = time.time()
@@ -2,6 +2,81 @@ TOL = 1e-8
 POOL_SIZE = 5
 GAP_TOL = 0.0001
 ROUNDING_OPT = 1
+# 定价子问题求解方式: 0 = Gurobi 整数规划 (solution pool), 1 = 动态规划背包
+PRICING_OPT = 1
+# 分支节点的 RMP: 0 = 每个子节点复制一份模型并添加分支约束, 1 = 共用一个 RMP，切换节点时修改变量界并热启动
+NODE_SWITCHING_OPT = 1
+# 定价缓存: 0 = 不缓存, 1 = 以量化后的对偶值为键的 LRU 缓存；缓存容量和对偶值的量化步长
+PRICING_CACHE_OPT = 1
+PRICING_CACHE_SIZE = 256
+PRICING_CACHE_QUANTUM = 1e-3
+# 定价层级: 0 = 直接精确定价, 1 = 先用贪心和粗化容量的 DP 启发式定价，找不到负 reduced cost 的模式时才精确定价
+PRICING_HIERARCHY_OPT = 1
+# 粗化 DP 的容量格数，尺寸向上取整到 Width // PRICING_COARSE_CAPACITY 的倍数
+PRICING_COARSE_CAPACITY = 64
+# 列池和潜水 RMP 的模式存储方式: 0 = 稠密 int32（小算例）, 1 = CSC 稀疏，去重键也只用非零元（物品种类多的算例）
+COLUMN_STORE_OPT = 0
+# 算例预处理: 0 = 不化简, 1 = 删除零需求物品、固定只能单独切割的物品、合并相同尺寸、尺寸除以最大公约数
+PREPROCESSING_OPT = 1
+# 初始列和初始整数解: 0 = 只用单一物品的模式 floor(Width / size_i), 1 = 另外运行 FFD、BFD 和贪心剩余问题启发式
+INITIAL_HEURISTIC_OPT = 1
+# 对偶稳定化: 0 = 不稳定化, 1 = Wentges 平滑, 2 = du Merle box-step, 3 = 平滑 + box-step
+STABILIZATION_OPT = 1
+# Wentges 平滑系数：定价对偶 = alpha * 稳定中心 + (1 - alpha) * RMP 对偶
+SMOOTHING_ALPHA = 0.8
+# box-step 盒子半宽、人工变量的初始上界、每次缩小的倍数以及上界低于该值时直接取 0
+BOX_STEP_WIDTH = 0.1
+BOX_STEP_SLACK = 1.0
+BOX_STEP_SHRINK = 0.1
+BOX_STEP_MIN_SLACK = 1e-4
+# 节点选择: 0 = depth-first, 1 = best-first, 2 = best-estimate (伪成本), 3 = 先下潜找到整数解后 best-first
+NODE_SELECTION_OPT = 1
+# 分支方式: 0 = 对模式变量分支 (x_k <= floor / x_k >= ceil), 1 = 对模式图的弧流量分支，分支决策在定价子问题中施加
+BRANCHING_SCHEME_OPT = 0
+# 分支变量选择: 0 = most fractional, 1 = pseudo-cost (reliability branching), 2 = strong branching
+BRANCHING_RULE_OPT = 1
+# strong branching 的候选变量数，以及伪成本被认为可靠所需的观测次数
+STRONG_BRANCHING_CANDIDATES = 8
+RELIABILITY_THRESHOLD = 2
+# 分阶段计时和直方图: 0 = 关闭, 1 = 开启，运行结束时导出到 METRICS_EXPORT_PATH（.json 或 .csv）
+METRICS_OPT = 1
+METRICS_EXPORT_PATH = "metrics.json"
+# 逐次迭代日志 (extra=RATE_LIMITED) 的限流：同一调用位置两条之间的最小间隔（秒），None 为不限流
+LOG_RATE_LIMIT = 1.0
+# 模型导出: 0 = 不导出, 1 = 每类模型每 MODEL_DUMP_EVERY 个导出一个, 2 = 只导出求解失败的模型, 3 = 只导出根节点的模型
+MODEL_DUMP_OPT = 2
+MODEL_DUMP_EVERY = 100
+# 导出的模型压缩写入 MODEL_DUMP_PATH，当前归档和上一份归档合计不超过 MODEL_DUMP_MAX_BYTES；后台写出队列的长度
+MODEL_DUMP_PATH = "model_dumps.zip"
+MODEL_DUMP_MAX_BYTES = 64 * 1024 * 1024
+MODEL_DUMP_QUEUE_SIZE = 64
+# 检查点: 0 = 关闭, 1 = 每隔 CHECKPOINT_INTERVAL 秒在迭代结束时保存到 CHECKPOINT_PATH，可用 main.py --resume 恢复
+CHECKPOINT_OPT = 1
+CHECKPOINT_PATH = "bnp_checkpoint.pkl.gz"
+CHECKPOINT_INTERVAL = 300
+# 列老化: 0 = 不停用列, 1 = 连续 COLUMN_AGE_LIMIT 次节点列生成结束时为非基且 reduced cost 为正的列被停用（上界设为 0），定价再次选中时恢复
+COLUMN_AGING_OPT = 1
+COLUMN_AGE_LIMIT = 3
+# 节点并行求解: 0 = 依次求解左右子节点, 1 = 在 PARALLEL_WORKERS 个进程中同时求解（要求 NODE_SWITCHING_OPT = 0），
+# 每次迭代从搜索树中取出至多 PARALLEL_BATCH_NODES 个可分支的节点，它们的子节点一起提交
+PARALLEL_OPT = 0
+PARALLEL_WORKERS = 2
+PARALLEL_BATCH_NODES = PARALLEL_WORKERS // 2
+# rank-1 割: 0 = 不加割, 1 = 根节点做至多 CUT_ROUNDS 轮 subset-row 割分离（要求 BRANCHING_SCHEME_OPT = 0），
+# 每轮在 LP 解用量最大的 CUT_CANDIDATE_ROWS 行中枚举大小为 CUT_SUBSET_SIZES 的子集，加入违反量超过 CUT_MIN_VIOLATION 的
+# 至多 CUT_MAX_PER_ROUND 个割；连续 CUT_AGE_LIMIT 轮松弛的割从 RMP 中删除
+CUTS_OPT = 1
+CUT_ROUNDS = 5
+CUT_MAX_PER_ROUND = 20
+CUT_MIN_VIOLATION = 0.05
+CUT_CANDIDATE_ROWS = 30
+CUT_SUBSET_SIZES = (3,)
+CUT_AGE_LIMIT = 2
+# 终止条件（None 为不限制）：运行时间（秒）、处理的节点数、进程常驻内存（MB）、间隙连续没有改进的迭代次数
+TIME_LIMIT = None
+NODE_LIMIT = None
+MEMORY_LIMIT = None
+STALL_ITERATIONS = None
 DOWN_THRESHOLD = 0.2
 UP_THRESHOLD = 0.8
 
@@ -26,48 +101,3 @@ GUROBI_Status_Map = {
     17: "GRB.MEM_LIMIT"
 }
 
-
-class BaseSingletonCounter:
-    _instances = {}
-    count = 0
-
-    def __new__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(BaseSingletonCounter, cls).__new__(cls, *args, **kwargs)
-        return cls._instances[cls]
-
-    @classmethod
-    def increment(cls):
-        cls.count += 1
-
-    @classmethod
-    def get_count(cls):
-        return cls.count
-
-
-class SPGlobalCounter(BaseSingletonCounter):
-    pass
-
-
-class MPGlobalCounter(BaseSingletonCounter):
-    pass
-
-
-class CSPGlobalCounter(BaseSingletonCounter):
-    pass
-
-
-class DGGlobalCounter(BaseSingletonCounter):
-    pass
-
-
-class SPDGlobalCounter(BaseSingletonCounter):
-    pass
-
-
-# 使用各自的计数器
-sp_global_counter = SPGlobalCounter()
-mp_global_counter = MPGlobalCounter()
-csp_global_counter = CSPGlobalCounter()
-diving_global_counter = DGGlobalCounter()
-diving_sp_global_counter = SPDGlobalCounter()
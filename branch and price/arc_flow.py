@@ -0,0 +1,199 @@
+"""
+切割模式的弧流 (arc-flow) 表示，用于在定价子问题中施加分支决策。
+
+把物品按尺寸从大到小（尺寸相同时按下标）的规范顺序依次放在原材料上，每个切割模式唯一对应图上的一条路径：
+节点为原材料上的位置 0..W，弧 (u, i) 表示在位置 u 处切出一个物品 i，到达位置 u + w_i。
+RMP 中弧 (u, i) 的流量为所有经过该弧的模式的用量之和，分支时对弧流量取整：
+
+    sum_{p 经过 (u, i)} x_p <= floor(f)   或   sum_{p 经过 (u, i)} x_p >= ceil(f)
+
+分支约束的对偶值 mu 加在对应的弧上，定价子问题变成弧上带附加价值的最长路问题；flow <= 0 的弧直接从图中删除，
+因此定价不会再生成被禁止的列，也不需要对已有列做 reduced cost 修正。所有弧流量为整数时，
+可以把弧流分解为整数用量的模式，得到与节点 LP 目标值相同的整数解。
+"""
+from collections import defaultdict
+
+import numpy as np
+
+from algorithm_parameters import TOL
+
+
+def canonical_order(sizes):
+    """物品在路径上的规范顺序：尺寸从大到小，尺寸相同时按下标。"""
+    return np.argsort(-np.asarray(sizes), kind='stable')
+
+
+def pattern_arcs(pattern, sizes, order=None):
+    """返回模式对应路径上的弧 [(u, i), ...]。"""
+    if order is None:
+        order = canonical_order(sizes)
+
+    arcs = []
+    u = 0
+    for i in order:
+        for _ in range(int(pattern[i])):
+            arcs.append((u, int(i)))
+            u += int(sizes[i])
+
+    return arcs
+
+
+def arc_duals_of(arc_rows, row_duals):
+    """把分支约束的对偶值按弧累加，返回 {弧: mu}。同一条弧可能同时有 <= 和 >= 两条约束。"""
+    arc_duals = defaultdict(float)
+    for arc, dual in zip(arc_rows, row_duals):
+        arc_duals[arc] += dual
+
+    return dict(arc_duals)
+
+
+def arc_reduced_cost(pattern, shadow_price, arc_duals, sizes, forbidden_arcs=()):
+    """模式在需求约束对偶值和弧对偶值下的 reduced cost，经过被禁止弧的模式返回 +inf。"""
+    reduced_cost = 1 - float(np.dot(shadow_price, pattern))
+    for arc in pattern_arcs(pattern, sizes):
+        if arc in forbidden_arcs:
+            return np.inf
+        reduced_cost -= arc_duals.get(arc, 0.0)
+
+    return reduced_cost
+
+
+def solve_arc_flow_pricing(sizes, capacity, values, arc_duals=None, forbidden_arcs=(), k=1):
+    """
+    在模式图上求最长路，返回价值最大的至多 k 个模式，按价值降序排列。
+
+    按规范顺序逐个物品做 DP，best[u] 为恰好用掉宽度 u 时的最大价值；物品 i 在位置 u 连续放 c 个的价值为
+    c * pi_i 加上经过的 c 条弧的对偶值。不同终点对应的模式宽度不同，因此取终点价值最大的 k 个即为 k 个不同模式。
+
+    Parameters:
+        sizes: 每种物品的尺寸（正整数）。
+        capacity (int): 原材料宽度。
+        values: 需求约束的对偶值。
+        arc_duals: {弧 (u, i): mu}，分支约束的对偶值。
+        forbidden_arcs: 不允许经过的弧。
+        k (int): 需要返回的模式数量。
+
+    Returns:
+        patterns (np.ndarray): 形状为 (k', num_items) 的 int32 数组。
+        pattern_values (np.ndarray): 每个模式的价值 sum_i pi_i * a_i + sum_{弧} mu。
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    arc_duals = {} if arc_duals is None else arc_duals
+    num_items = len(sizes)
+    num_rows = int(capacity) + 1
+    order = canonical_order(sizes)
+
+    # 每种物品在各个位置上的弧附加价值，被禁止的弧为 -inf
+    arc_values = {}
+    for (u, i), mu in arc_duals.items():
+        arc_values.setdefault(i, np.zeros(num_rows))[u] += mu
+    for u, i in forbidden_arcs:
+        arc_values.setdefault(i, np.zeros(num_rows))[u] = -np.inf
+
+    best = np.full(num_rows, -np.inf)
+    best[0] = 0.0
+    # 回溯信息：第 layer 个物品在终点 u 处连续放置的数量
+    count_from = np.zeros((num_items, num_rows), dtype=np.int32)
+
+    for layer, i in enumerate(order):
+        w = int(sizes[i])
+        bonus = arc_values.get(i)
+        # 没有弧对偶值时与普通背包相同，价值非正的物品放入只会更差；有弧对偶值时放入这类物品可以改变后续物品的位置
+        if values[i] <= 0 and len(arc_values) == 0:
+            continue
+
+        merged = best.copy()
+        cumulative = np.zeros(num_rows)
+        for c in range(1, num_rows // w + 1):
+            length = num_rows - c * w
+            if length <= 0:
+                break
+            # 起点为 u 时第 c 个物品经过的弧为 (u + (c - 1) w, i)
+            if bonus is not None:
+                cumulative[:length] += bonus[(c - 1) * w:(c - 1) * w + length]
+            candidate = best[:length] + c * values[i] + cumulative[:length]
+            improved = candidate > merged[c * w:] + TOL
+            merged[c * w:][improved] = candidate[improved]
+            count_from[layer, c * w:][improved] = c
+
+        best = merged
+
+    # 终点 0 为空模式
+    ends = np.flatnonzero(np.isfinite(best[1:])) + 1
+    ends = ends[np.argsort(-best[ends], kind='stable')[:k]]
+
+    patterns = []
+    for end in ends:
+        pattern = np.zeros(num_items, dtype=np.int32)
+        u = end
+        for layer in range(num_items - 1, -1, -1):
+            c = count_from[layer, u]
+            pattern[order[layer]] = c
+            u -= c * sizes[order[layer]]
+        patterns.append(pattern)
+
+    return np.array(patterns, dtype=np.int32), best[ends]
+
+
+def price_patterns_arc_flow(data, shadow_price, arc_duals=None, forbidden_arcs=(), k=1):
+    """在弧流分支下求解定价子问题，返回 reduced cost 最小的 k 个模式 [(pattern, reduced_cost), ...]。"""
+    patterns, pattern_values = solve_arc_flow_pricing(data.Customer_demand_sizes, data.Width, shadow_price,
+                                                      arc_duals, forbidden_arcs, k)
+
+    return [(patterns[r], 1 - pattern_values[r]) for r in range(len(patterns))]
+
+
+def arc_flows(patterns, quantity, sizes):
+    """由 RMP 的解计算各弧的流量 {弧: flow}，patterns 为与 quantity 对应的 (num_types, num_columns) 模式矩阵。"""
+    order = canonical_order(sizes)
+    flows = defaultdict(float)
+    for j in np.flatnonzero(np.asarray(quantity) > TOL):
+        for arc in pattern_arcs(patterns[:, j], sizes, order):
+            flows[arc] += quantity[j]
+
+    return dict(flows)
+
+
+def most_fractional_arc(flows):
+    """返回流量小数部分最接近 0.5 的弧，所有弧流量都为整数时返回 None。"""
+    best_arc, best_distance = None, 0.5 - TOL
+    for arc in sorted(flows):
+        fraction = flows[arc] - np.floor(flows[arc])
+        if min(fraction, 1 - fraction) <= TOL:
+            continue
+        if abs(fraction - 0.5) < best_distance:
+            best_arc, best_distance = arc, abs(fraction - 0.5)
+
+    return best_arc
+
+
+def decompose_arc_flow(flows, sizes, num_types):
+    """
+    把整数弧流分解为整数用量的切割模式，返回 (patterns, quantity)，patterns 形状为 (num_types, num_patterns)。
+
+    每次从位置 0 出发沿仍有剩余流量的弧前进，走不动时结束一条路径。对 u > 0 的位置，由模式路径得到的弧流
+    满足流入 >= 流出，因此所有弧流量都会被分解掉，模式总用量等于从位置 0 流出的总流量。
+    """
+    remaining = defaultdict(dict)
+    for (u, i), flow in flows.items():
+        if round(flow) > 0:
+            remaining[u][i] = int(round(flow))
+
+    counts = defaultdict(int)
+    while remaining[0]:
+        pattern = np.zeros(num_types, dtype=np.int32)
+        u = 0
+        while remaining[u]:
+            i = next(iter(remaining[u]))
+            remaining[u][i] -= 1
+            if remaining[u][i] == 0:
+                del remaining[u][i]
+            pattern[i] += 1
+            u += int(sizes[i])
+        counts[pattern.tobytes()] += 1
+
+    patterns = [np.frombuffer(key, dtype=np.int32) for key in counts]
+    quantity = np.array(list(counts.values()), dtype=float)
+
+    return np.array(patterns, dtype=np.int32).T.reshape(num_types, len(patterns)), quantity
@@ -1,5 +1,7 @@
 import copy
 from column_generation import *
+from arc_flow import pattern_arcs
+from model_dump import model_archiver
 from logger_config import logger
 
 
@@ -9,23 +11,191 @@ class Node:
         self.model = None
         # 分支的变量下标
         self.branching_indices = []
-        # 切割模式[][]
-        self.pattern = None
+        # 节点模型中各变量对应的列池下标
+        self.column_indices = []
         # 切割
         self.pattern_quantity = []
         #
         self.branching_constr = []
+        # 从根节点到该节点累积的变量分支决策 [(变量下标, '<=' 或 '>=', 界)]，节点切换模式下以变量界的形式施加
+        self.bound_changes = []
+        # 弧流分支时，从根节点到该节点累积的弧流量界 [(弧 (u, i), '<=' 或 '>=', 界)]
+        self.arc_bounds = []
+        # 弧流分支且每个节点复制模型时，节点模型中需求约束之后各行分支约束对应的弧
+        self.arc_rows = []
+        # 列生成得到的节点 LP 下界（拉格朗日下界或 LP 最优值）
+        self.lower_bound = -np.inf
+        # 节点切换模式或并行求解时，该节点求解完成后的基，用于热启动子节点
+        self.vbasis = None
+        self.cbasis = None
 
     def __lt__(self, other):
         # 定义小于运算符，用于堆操作
         return self.obj_value < other.obj_value
 
 
-def add_left_branch(data, parent_node, branch_index) -> Node:
+def forbidden_arcs_of(arc_bounds):
+    """流量上界为 0 的弧，定价子问题中直接删除。"""
+    return {arc for arc, sense, value in arc_bounds if sense == '<=' and value < 1 - TOL}
+
+
+def arc_coefficients(column_indices, arc, sizes):
+    """弧在各列中的系数：列对应的模式经过该弧时为 1。"""
+    return [1.0 if arc in pattern_arcs(column_pool.get(c), sizes) else 0.0 for c in column_indices]
+
+
+class PersistentRMP:
+    """
+    所有分支节点共用的一个 RMP 模型。
+
+    节点不再持有模型，只记录分支产生的变量界变化和求解后的基；选中节点时撤销当前节点的界、
+    施加新节点的界，并用父节点的基热启动。列生成得到的新列对所有节点都有效，因此只增不减。
+
+    弧流分支时每个 (弧, 方向) 在模型中只建一行约束，不属于当前节点的行设为 flow >= 0，不起作用。
+    """
+    def __init__(self, model, column_indices):
+        self.model = model
+        # 模型中的变量与列池下标一一对应，所有节点共享这一列表（只追加）
+        self.column_indices = column_indices
+        self.active_node = None
+        # 需求约束之后各行弧流分支约束对应的 (弧, 方向)
+        self.model.update()
+        self.num_demand_rows = self.model.NumConstrs
+        self.arc_rows = []
+
+    def add_arc_row(self, data, arc, sense):
+        """为 (弧, 方向) 添加一行不起作用的约束 flow >= 0，已存在时不做任何事。"""
+        if (arc, sense) in self.arc_rows:
+            return
+
+        coefficients = arc_coefficients(self.column_indices, arc, data.Customer_demand_sizes)
+        side = "left" if sense == '<=' else "right"
+        self.model.addConstr(grbpy.LinExpr(coefficients, self.model.getVars()) >= 0.0,
+                             name=f"arc_branch_{side}_{arc[0]}_{arc[1]}")
+        self.arc_rows.append((arc, sense))
+
+    def switch_to(self, node, basis_node=None):
+        variables = self.model.getVars()
+
+        # 撤销当前节点的界，恢复到根节点的界 [0, +inf)
+        bounds = {}
+        if self.active_node is not None:
+            for j, _, _ in self.active_node.bound_changes:
+                bounds[j] = [0.0, GRB.INFINITY]
+
+        # 施加新节点的界，同一变量被多次分支时取最紧的界
+        for j, _, _ in node.bound_changes:
+            bounds[j] = [0.0, GRB.INFINITY]
+        for j, sense, value in node.bound_changes:
+            if sense == '<=':
+                bounds[j][1] = min(bounds[j][1], value)
+            else:
+                bounds[j][0] = max(bounds[j][0], value)
+
+        for j, (lb, ub) in bounds.items():
+            variables[j].LB = lb
+            variables[j].UB = ub
+
+        if len(self.arc_rows) > 0:
+            self.switch_arc_rows(node)
+
+        if basis_node is not None and basis_node.vbasis is not None:
+            self.model.update()
+            constrs = self.model.getConstrs()
+            # 保存基之后新增的列取非基（位于下界），新增的约束取松弛变量为基
+            vbasis = basis_node.vbasis + [-1] * (len(variables) - len(basis_node.vbasis))
+            cbasis = (basis_node.cbasis + [0] * (len(constrs) - len(basis_node.cbasis)))[:len(constrs)]
+            self.model.setAttr(GRB.Attr.VBasis, variables, vbasis)
+            self.model.setAttr(GRB.Attr.CBasis, constrs, cbasis)
+
+        self.active_node = node
+
+    def switch_arc_rows(self, node):
+        """按节点的弧流量界设置各行分支约束，同一 (弧, 方向) 被多次分支时取最紧的界。"""
+        rhs = {}
+        for arc, sense, value in node.arc_bounds:
+            if (arc, sense) not in rhs:
+                rhs[(arc, sense)] = value
+            elif sense == '<=':
+                rhs[(arc, sense)] = min(rhs[(arc, sense)], value)
+            else:
+                rhs[(arc, sense)] = max(rhs[(arc, sense)], value)
+
+        constrs = self.model.getConstrs()[self.num_demand_rows:]
+        for constr, row in zip(constrs, self.arc_rows):
+            if row in rhs and row[1] == '<=':
+                constr.Sense, constr.RHS = GRB.LESS_EQUAL, rhs[row]
+            else:
+                constr.Sense, constr.RHS = GRB.GREATER_EQUAL, rhs.get(row, 0.0)
+
+    def save_basis(self, node):
+        if self.model.Status == GRB.OPTIMAL:
+            node.vbasis = self.model.getAttr(GRB.Attr.VBasis, self.model.getVars())
+            node.cbasis = self.model.getAttr(GRB.Attr.CBasis, self.model.getConstrs())
+
+    def solve_node(self, data, node, parent_node, upper_bound=float("inf")):
+        self.switch_to(node, parent_node)
+        arc_rows = [arc for arc, _ in self.arc_rows] if BRANCHING_SCHEME_OPT == 1 else None
+        self.model, self.column_indices, lower_bound = solve_CSP_with_CG(data, self.model, self.model.getVars(),
+                                                                         self.column_indices, node.branching_indices,
+                                                                         upper_bound, arc_rows,
+                                                                         forbidden_arcs_of(node.arc_bounds))
+        self.save_basis(node)
+
+        return self.model, self.column_indices, lower_bound
+
+
+def read_child_solution(node, upper_bound):
+    """
+    子节点求解后立即读取 LP 解 (obj_value, pattern_quantity)。节点切换模式下所有节点共用一个模型，
+    求解下一个节点后该模型中就是另一个节点的解。被下界剪枝的节点不读取，不可行的节点 lower_bound 设为 inf。
+    """
+    if np.ceil(node.lower_bound - TOL) >= upper_bound:
+        return
+    if node.model.Status == GRB.INFEASIBLE:
+        node.lower_bound = np.inf
+        return
+
+    node.obj_value = node.model.ObjVal
+    node.pattern_quantity = np.array(node.model.getAttr(GRB.Attr.X, node.model.getVars()))
+
+
+def add_root_cuts(data, node):
+    """
+    根节点的割平面轮次：在节点 LP 解处分离 rank-1 割，加入 RMP 后重新列生成，至多 CUT_ROUNDS 轮，
+    没有违反的割或 LP 目标值不再提高时停止。node 的模型、列、LP 解和下界原地更新。
+    """
+    for cut_round in range(CUT_ROUNDS):
+        patterns = column_pool.to_matrix(node.column_indices[:len(node.pattern_quantity)])
+        cuts = cut_pool.separate(patterns, node.pattern_quantity, data.Customer_demands)
+        if len(cuts) == 0:
+            break
+
+        previous_obj = node.obj_value
+        cut_pool.add_to_model(node.model, node.model.getVars(), column_pool.to_matrix(node.column_indices), cuts)
+        node.model.update()
+        node.model, node.column_indices, lower_bound = solve_CSP_with_CG(data, node.model, node.model.getVars(),
+                                                                         node.column_indices, node.branching_indices)
+        node.lower_bound = max(node.lower_bound, lower_bound)
+        if cut_pool.age(node.model) > 0:
+            # 删除的割是松弛的，不改变最优值，重新求解以恢复解和基
+            node.model.optimize()
+            check_interrupted(node.model)
+        node.obj_value = node.model.ObjVal
+        node.pattern_quantity = np.array(node.model.getAttr(GRB.Attr.X, node.model.getVars()))
+        logger.info("cut round %s: %s cuts added, root LP %s -> %s", cut_round + 1, len(cuts), previous_obj,
+                    node.obj_value)
+
+        if node.obj_value < previous_obj + TOL:
+            break
+
+    model_archiver.dump(node.model, "master problem root node with cuts.lp", "root", root=True)
+
+
+def add_left_branch(data, parent_node, branch_index, rmp: PersistentRMP = None, upper_bound=float("inf")) -> Node:
     logger.info("starting adding left branch!")
 
     temp_node = Node()
-    temp_node.pattern = parent_node.pattern
 
     temp_node.branching_constr = parent_node.branching_constr.copy()
     temp_node.branching_constr.append(f"x_{branch_index} <= {np.floor(parent_node.pattern_quantity[branch_index])}")
@@ -35,23 +205,29 @@ def add_left_branch(data, parent_node, branch_index) -> Node:
     temp_node.branching_indices = parent_node.branching_indices.copy()
     temp_node.branching_indices.append(branch_index)
 
-    temp_node.model = parent_node.model.copy()
-    variables = temp_node.model.getVars()
-    temp_node.model.addConstr(variables[branch_index] <= np.floor(parent_node.pattern_quantity[branch_index]), name="branch_constr_left_"+str(branch_index))
-    temp_node.model, temp_node.pattern = solve_CSP_with_CG(data, temp_node.model, variables, temp_node.pattern, temp_node.branching_indices)
+    # 节点切换模式下以变量界的形式施加；每个节点复制模型时只用于记录分支决策（检查点）
+    temp_node.bound_changes = parent_node.bound_changes + [
+        (branch_index, '<=', np.floor(parent_node.pattern_quantity[branch_index]))]
+
+    if rmp is not None:
+        temp_node.model, temp_node.column_indices, temp_node.lower_bound = rmp.solve_node(data, temp_node, parent_node, upper_bound)
+    else:
+        temp_node.model = parent_node.model.copy()
+        variables = temp_node.model.getVars()
+        temp_node.model.addConstr(variables[branch_index] <= np.floor(parent_node.pattern_quantity[branch_index]), name="branch_constr_left_"+str(branch_index))
+        temp_node.model, temp_node.column_indices, temp_node.lower_bound = solve_CSP_with_CG(data, temp_node.model, variables, list(parent_node.column_indices), temp_node.branching_indices, upper_bound)
 
-    temp_node.model.write(f"add_left_branch_{branch_index}.lp")
+    model_archiver.dump(temp_node.model, f"add_left_branch_{branch_index}.lp", "branch")
 
     logger.info("ended adding left branch!")
 
     return temp_node
 
 
-def add_right_branch(data, parent_node, branch_index) -> Node:
+def add_right_branch(data, parent_node, branch_index, rmp: PersistentRMP = None, upper_bound=float("inf")) -> Node:
     logger.info("starting adding right branch!")
 
     temp_node = Node()
-    temp_node.pattern = parent_node.pattern
 
     temp_node.branching_constr = parent_node.branching_constr.copy()
     temp_node.branching_constr.append(f"x_{branch_index} >= {np.ceil(parent_node.pattern_quantity[branch_index])}")
@@ -61,14 +237,58 @@ def add_right_branch(data, parent_node, branch_index) -> Node:
     temp_node.branching_indices = parent_node.branching_indices.copy()
     temp_node.branching_indices.append(branch_index)
 
-    # parent_node.model.update()
-    temp_node.model = parent_node.model.copy()
-    variables = temp_node.model.getVars()
-    temp_node.model.addConstr(variables[branch_index] >= np.ceil(parent_node.pattern_quantity[branch_index]), name="branch_constr_right_"+str(branch_index))
-    temp_node.model, temp_node.pattern = solve_CSP_with_CG(data, temp_node.model, variables, temp_node.pattern, temp_node.branching_indices)
+    # 节点切换模式下以变量界的形式施加；每个节点复制模型时只用于记录分支决策（检查点）
+    temp_node.bound_changes = parent_node.bound_changes + [
+        (branch_index, '>=', np.ceil(parent_node.pattern_quantity[branch_index]))]
+
+    if rmp is not None:
+        temp_node.model, temp_node.column_indices, temp_node.lower_bound = rmp.solve_node(data, temp_node, parent_node, upper_bound)
+    else:
+        # parent_node.model.update()
+        temp_node.model = parent_node.model.copy()
+        variables = temp_node.model.getVars()
+        temp_node.model.addConstr(variables[branch_index] >= np.ceil(parent_node.pattern_quantity[branch_index]), name="branch_constr_right_"+str(branch_index))
+        temp_node.model, temp_node.column_indices, temp_node.lower_bound = solve_CSP_with_CG(data, temp_node.model, variables, list(parent_node.column_indices), temp_node.branching_indices, upper_bound)
 
-    temp_node.model.write(f"add_right_branch_{branch_index}.lp")
+    model_archiver.dump(temp_node.model, f"add_right_branch_{branch_index}.lp", "branch")
 
     logger.info("ended adding right branch!")
 
     return temp_node
+
+
+def add_arc_branch(data, parent_node, arc, sense, value, rmp: PersistentRMP = None, upper_bound=float("inf")) -> Node:
+    """
+    弧流分支：添加约束 sum_{p 经过 arc} x_p <= value（左分支）或 >= value（右分支）得到子节点。
+    """
+    side = "left" if sense == '<=' else "right"
+    logger.info("starting adding %s arc branch!", side)
+
+    temp_node = Node()
+
+    temp_node.branching_constr = parent_node.branching_constr.copy()
+    temp_node.branching_constr.append(f"flow{arc} {sense} {value}")
+
+    logger.info(f"constr flow{arc} {sense} {value}")
+
+    temp_node.arc_bounds = parent_node.arc_bounds + [(arc, sense, value)]
+
+    if rmp is not None:
+        rmp.add_arc_row(data, arc, sense)
+        temp_node.model, temp_node.column_indices, temp_node.lower_bound = rmp.solve_node(data, temp_node, parent_node, upper_bound)
+    else:
+        temp_node.model = parent_node.model.copy()
+        variables = temp_node.model.getVars()
+        flow = grbpy.LinExpr(arc_coefficients(parent_node.column_indices, arc, data.Customer_demand_sizes), variables)
+        if sense == '<=':
+            temp_node.model.addConstr(flow <= value, name=f"arc_branch_left_{arc[0]}_{arc[1]}")
+        else:
+            temp_node.model.addConstr(flow >= value, name=f"arc_branch_right_{arc[0]}_{arc[1]}")
+        temp_node.arc_rows = parent_node.arc_rows + [arc]
+        temp_node.model, temp_node.column_indices, temp_node.lower_bound = solve_CSP_with_CG(data, temp_node.model, variables, list(parent_node.column_indices), temp_node.branching_indices, upper_bound, temp_node.arc_rows, forbidden_arcs_of(temp_node.arc_bounds))
+
+    model_archiver.dump(temp_node.model, f"add_{side}_arc_branch_{arc[0]}_{arc[1]}.lp", "branch")
+
+    logger.info("ended adding %s arc branch!", side)
+
+    return temp_node
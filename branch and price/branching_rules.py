@@ -0,0 +1,143 @@
+"""
+选择分支的模式变量，由 algorithm_parameters.BRANCHING_RULE_OPT 选择：
+    0: most fractional，选小数部分最接近 0.5 的变量（原来的做法）；
+    1: pseudo-cost，按伪成本的乘积得分选变量；伪成本不可靠（观测次数少于 RELIABILITY_THRESHOLD）的候选
+       先做 strong branching 初始化 (reliability branching)；
+    2: strong branching，对小数部分最接近 0.5 的前 STRONG_BRANCHING_CANDIDATES 个候选分别求解左右子节点的 LP。
+
+strong branching 只在节点 RMP 现有的列上求解 LP（不做列生成），每次都从父节点的基热启动。
+
+弧流分支 (BRANCHING_SCHEME_OPT = 1) 时对弧选择：0 为 most fractional，1 和 2 都按以弧为键的伪成本得分选弧
+（弧流分支需要添加约束，不做 strong branching）。
+"""
+import numpy as np
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from logger_config import logger
+from pseudo_costs import pseudo_costs, fractional_parts
+from arc_flow import most_fractional_arc
+from termination import SolveInterrupted, check_interrupted
+
+BRANCHING_RULE_NAMES = {0: "most fractional", 1: "pseudo-cost (reliability)", 2: "strong branching"}
+
+# 分支统计，用于比较不同分支规则下的树规模
+branching_statistics = {
+    "rule": BRANCHING_RULE_NAMES[BRANCHING_RULE_OPT],
+    "branchings": 0,
+    "nodes": 0,
+    "strong_branching_lps": 0,
+}
+
+# strong branching 中子节点不可行时使用的目标值增量
+INFEASIBLE_GAIN = 1e6
+
+
+def solve_strong_branching_lp(model, variable, lb, ub, vbasis, cbasis):
+    """临时把变量的界改为 [lb, ub] 求解 LP，返回目标值（不可行时为 None），然后恢复变量的界和基。"""
+    old_lb, old_ub = variable.LB, variable.UB
+    variable.LB, variable.UB = lb, ub
+    model.optimize()
+    branching_statistics["strong_branching_lps"] += 1
+    status = model.Status
+    obj_value = model.ObjVal if status == GRB.OPTIMAL else None
+
+    variable.LB, variable.UB = old_lb, old_ub
+    model.update()
+    model.setAttr(GRB.Attr.VBasis, model.getVars(), vbasis)
+    model.setAttr(GRB.Attr.CBasis, model.getConstrs(), cbasis)
+    # 先恢复变量的界，再按中断处理
+    if status == GRB.INTERRUPTED:
+        raise SolveInterrupted(model.ModelName)
+
+    return obj_value
+
+
+def strong_branching(node, candidates, rmp=None):
+    """
+    对候选变量做 strong branching，返回 {候选下标: (左子节点目标值, 右子节点目标值)}，并用结果更新伪成本。
+    """
+    if rmp is not None:
+        # 节点切换模式下先把共用的 RMP 切换到该节点
+        rmp.switch_to(node, node)
+        model = rmp.model
+    else:
+        model = node.model
+
+    model.update()
+    model.optimize()
+    check_interrupted(model)
+    if model.Status != GRB.OPTIMAL:
+        return {}
+    variables = model.getVars()
+    vbasis = model.getAttr(GRB.Attr.VBasis, variables)
+    cbasis = model.getAttr(GRB.Attr.CBasis, model.getConstrs())
+
+    results = {}
+    for j in candidates:
+        value = node.pattern_quantity[j]
+        variable = variables[j]
+        lb, ub = variable.LB, variable.UB
+        down_obj = solve_strong_branching_lp(model, variable, lb, min(ub, np.floor(value)), vbasis, cbasis)
+        up_obj = solve_strong_branching_lp(model, variable, max(lb, np.ceil(value)), ub, vbasis, cbasis)
+        results[j] = (down_obj, up_obj)
+
+        pseudo_costs.update(node.column_indices[j], value - np.floor(value), node.obj_value, down_obj, up_obj)
+        logger.info("strong branching on x_%s: down obj %s, up obj %s", j, down_obj, up_obj)
+
+    return results
+
+
+def strong_branching_score(node, down_obj, up_obj, eps=1e-6):
+    down_gain = INFEASIBLE_GAIN if down_obj is None else max(down_obj - node.obj_value, 0.0)
+    up_gain = INFEASIBLE_GAIN if up_obj is None else max(up_obj - node.obj_value, 0.0)
+
+    return max(down_gain, eps) * max(up_gain, eps)
+
+
+def select_branching_variable(node, rmp=None):
+    """返回节点上要分支的模式变量下标。"""
+    branching_statistics["branchings"] += 1
+    index, fraction = fractional_parts(node.pattern_quantity)
+    # 小数部分离 0.5 越近越靠前
+    by_fractionality = index[np.argsort(np.abs(fraction - 0.5), kind='stable')]
+
+    if BRANCHING_RULE_OPT == 0:
+        return int(by_fractionality[0])
+
+    if BRANCHING_RULE_OPT == 2:
+        candidates = by_fractionality[:STRONG_BRANCHING_CANDIDATES]
+        results = strong_branching(node, candidates, rmp)
+        if len(results) == 0:
+            return int(by_fractionality[0])
+        return int(max(results, key=lambda j: strong_branching_score(node, *results[j])))
+
+    # pseudo-cost branching with reliability initialisation
+    keys = [node.column_indices[j] for j in index]
+    scores = np.array([pseudo_costs.score(key, f) for key, f in zip(keys, fraction)])
+    ranked = index[np.argsort(-scores, kind='stable')][:STRONG_BRANCHING_CANDIDATES]
+    unreliable = [j for j in ranked if not pseudo_costs.reliable(node.column_indices[j], RELIABILITY_THRESHOLD)]
+    if len(unreliable) > 0:
+        strong_branching(node, unreliable, rmp)
+        scores = np.array([pseudo_costs.score(key, f) for key, f in zip(keys, fraction)])
+
+    return int(index[np.argmax(scores)])
+
+
+def select_branching_arc(node, flows):
+    """弧流分支时返回要分支的弧，flows 为节点 LP 解的弧流量 {弧: flow}。"""
+    branching_statistics["branchings"] += 1
+    arcs = [arc for arc in sorted(flows) if min(flows[arc] % 1, 1 - flows[arc] % 1) > TOL]
+    fraction = np.array([flows[arc] % 1 for arc in arcs])
+
+    if BRANCHING_RULE_OPT == 0:
+        return most_fractional_arc(flows)
+
+    scores = [pseudo_costs.score(arc, f) for arc, f in zip(arcs, fraction)]
+    return arcs[int(np.argmax(scores))]
+
+
+def report_branching():
+    logger.info("branching rule %s: %s branchings, %s nodes created, %s strong branching LPs",
+                branching_statistics["rule"], branching_statistics["branchings"], branching_statistics["nodes"],
+                branching_statistics["strong_branching_lps"])
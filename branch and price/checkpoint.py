@@ -0,0 +1,181 @@
+"""
+分支定价的检查点和断点续算。
+
+检查点只保存重建搜索树所需的最少信息，不保存 Gurobi 模型：
+    - 列池中的所有模式（CSC 格式，按列池下标顺序，恢复后下标不变）；
+    - 打开节点的描述：分支决策（变量界变化、弧流量界）、节点模型中各列的列池下标、LP 解和下界；
+    - 节点切换模式下共享 RMP 的列和弧流分支约束行，以及 RMP 中的 rank-1 割；
+    - 当前最好整数解、上下界历史、伪成本、迭代次数和已求解的节点数。
+
+检查点用 pickle 序列化后 gzip 压缩，先写临时文件再替换，写到一半中断时不会破坏上一份检查点。
+恢复时按保存的列重建 RMP（节点切换模式下为一个共享模型，否则每个节点一个模型），打开节点不重新求解，
+基不保存，因此恢复后第一次求解没有热启动。定价缓存、潜水 RMP 和计数器不保存，恢复后从空开始。
+"""
+import gzip
+import os
+import pickle
+import time
+
+import numpy as np
+import gurobipy as grbpy
+
+from algorithm_parameters import *
+from branching import Node, PersistentRMP, arc_coefficients
+from column_generation import build_rmp
+from column_pool import column_pool
+from cuts import cut_pool
+from logger_config import logger
+from node_selection import NodeSelector
+from pseudo_costs import pseudo_costs
+from solution import Solution
+
+CHECKPOINT_VERSION = 3
+
+# 打开节点中需要保存的属性，其余属性（模型、基）恢复时重建或置空
+NODE_FIELDS = ("obj_value", "branching_indices", "column_indices", "pattern_quantity", "branching_constr",
+               "bound_changes", "arc_bounds", "arc_rows", "lower_bound")
+
+
+def node_descriptor(node):
+    descriptor = {field: getattr(node, field) for field in NODE_FIELDS}
+    # 节点切换模式下 column_indices 是所有节点共享的列表，由 RMP 的列恢复
+    if NODE_SWITCHING_OPT == 1:
+        descriptor["column_indices"] = None
+
+    return descriptor
+
+
+def sparse_columns():
+    """列池中所有列的 CSC 表示 (num_rows, indptr, indices, counts)。"""
+    columns = [column_pool.get_sparse(j) for j in range(len(column_pool))]
+    indptr = np.cumsum([0] + [len(rows) for rows, _ in columns])
+    indices = np.concatenate([rows for rows, _ in columns]).astype(np.int32)
+    counts = np.concatenate([counts for _, counts in columns]).astype(np.int32)
+
+    return column_pool.store.num_rows, indptr, indices, counts
+
+
+def save_checkpoint(path, data, bb_tree, solution, rmp, bound_history, num_iterations, elapsed):
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "instance": (data.Width, data.Customer_demand_sizes.tolist(), data.Customer_demands.tolist()),
+        "options": (NODE_SWITCHING_OPT, BRANCHING_SCHEME_OPT),
+        "columns": sparse_columns(),
+        "rmp_columns": None if rmp is None else list(rmp.column_indices),
+        "rmp_arc_rows": None if rmp is None else list(rmp.arc_rows),
+        "cuts": cut_pool.state(),
+        "nodes": [node_descriptor(node) for node in bb_tree.open_nodes()],
+        "node_selection": (bb_tree.policy, bb_tree.diving, bb_tree.first_incumbent_time, bb_tree.num_nodes),
+        "solution": dict(vars(solution)),
+        "bound_history": list(bound_history),
+        "pseudo_costs": {name: dict(value) if isinstance(value, dict) else value
+                         for name, value in vars(pseudo_costs).items()},
+        "num_iterations": num_iterations,
+        "elapsed": elapsed,
+    }
+
+    temp_path = f"{path}.tmp"
+    with gzip.open(temp_path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+    logger.info("checkpoint saved to %s: %s open nodes, %s columns, %s iterations",
+                path, len(state["nodes"]), len(column_pool), num_iterations)
+
+
+def build_node_model(data, node):
+    """每个节点复制模型时，按节点的列和分支决策重建节点模型，分支约束的顺序与原模型相同。"""
+    model = build_rmp(data, node.column_indices)
+    variables = model.getVars()
+
+    for arc, sense, value in node.arc_bounds:
+        flow = grbpy.LinExpr(arc_coefficients(node.column_indices, arc, data.Customer_demand_sizes), variables)
+        if sense == '<=':
+            model.addConstr(flow <= value, name=f"arc_branch_left_{arc[0]}_{arc[1]}")
+        else:
+            model.addConstr(flow >= value, name=f"arc_branch_right_{arc[0]}_{arc[1]}")
+    for j, sense, value in node.bound_changes:
+        if sense == '<=':
+            model.addConstr(variables[j] <= value, name="branch_constr_left_" + str(j))
+        else:
+            model.addConstr(variables[j] >= value, name="branch_constr_right_" + str(j))
+    model.update()
+
+    return model
+
+
+def load_checkpoint(path, data):
+    """
+    从检查点恢复搜索状态，返回 (bb_tree, solution, rmp, bound_history, num_iterations, elapsed)。
+
+    检查点的实例或 NODE_SWITCHING_OPT / BRANCHING_SCHEME_OPT 与当前不一致时抛出 ValueError。
+    """
+    with gzip.open(path, "rb") as f:
+        state = pickle.load(f)
+
+    if state["version"] != CHECKPOINT_VERSION:
+        raise ValueError(f"unsupported checkpoint version {state['version']}")
+    if state["instance"] != (data.Width, data.Customer_demand_sizes.tolist(), data.Customer_demands.tolist()):
+        raise ValueError(f"checkpoint {path} was written for a different instance")
+    if state["options"] != (NODE_SWITCHING_OPT, BRANCHING_SCHEME_OPT):
+        raise ValueError(f"checkpoint {path} was written with NODE_SWITCHING_OPT, BRANCHING_SCHEME_OPT = {state['options']}")
+
+    # 列池为空时按顺序加入，列池下标与保存时相同
+    num_rows, indptr, indices, counts = state["columns"]
+    for j in range(len(indptr) - 1):
+        pattern = np.zeros(num_rows, dtype=np.int32)
+        pattern[indices[indptr[j]:indptr[j + 1]]] = counts[indptr[j]:indptr[j + 1]]
+        column_pool.add(pattern)
+    # RMP 中的割行位于需求约束之后，重建节点模型之前恢复
+    cut_pool.restore(state["cuts"])
+
+    rmp = None
+    if state["rmp_columns"] is not None:
+        rmp = PersistentRMP(build_rmp(data, state["rmp_columns"]), state["rmp_columns"])
+        for arc, sense in state["rmp_arc_rows"]:
+            rmp.add_arc_row(data, arc, sense)
+        rmp.model.update()
+
+    bb_tree = NodeSelector()
+    bb_tree.policy, bb_tree.diving, bb_tree.first_incumbent_time, bb_tree.num_nodes = state["node_selection"]
+    for descriptor in state["nodes"]:
+        node = Node()
+        for field, value in descriptor.items():
+            setattr(node, field, value)
+        if rmp is not None:
+            node.column_indices = rmp.column_indices
+            node.model = rmp.model
+        else:
+            node.model = build_node_model(data, node)
+        bb_tree.push(node)
+
+    solution = Solution()
+    vars(solution).update(state["solution"])
+
+    for name, value in state["pseudo_costs"].items():
+        if isinstance(value, dict):
+            getattr(pseudo_costs, name).update(value)
+        else:
+            setattr(pseudo_costs, name, value)
+
+    logger.info("resumed from checkpoint %s: %s open nodes, %s columns, %s iterations, lb %s, ub %s",
+                path, len(bb_tree), len(column_pool), state["num_iterations"], solution.lb, solution.ub)
+
+    return bb_tree, solution, rmp, state["bound_history"], state["num_iterations"], state["elapsed"]
+
+
+class Checkpointer:
+    """每隔 interval 秒（墙钟时间）在迭代结束时保存一次检查点。"""
+    def __init__(self, path=CHECKPOINT_PATH, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.last_time = time.time()
+        self.num_saved = 0
+
+    def due(self):
+        return time.time() - self.last_time >= self.interval
+
+    def save(self, *args, **kwargs):
+        save_checkpoint(self.path, *args, **kwargs)
+        self.last_time = time.time()
+        self.num_saved += 1
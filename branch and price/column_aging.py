@@ -0,0 +1,85 @@
+"""
+RMP 的列老化 (column aging) 与清理，由 algorithm_parameters.COLUMN_AGING_OPT 控制。
+
+每次节点列生成结束时，对节点 RMP 中的每一列记录最后的 reduced cost：列为非基且 reduced cost 为正时年龄加一，
+否则年龄清零。年龄以列池下标为键，因此在节点之间（包括每个节点复制模型时）共享。
+
+下一次列生成开始时，年龄达到 COLUMN_AGE_LIMIT 的列被停用：变量上界设为 0，变量本身保留在模型中，
+这样节点中各列的位置（分支下标、基）保持不变；列仍在全局列池中。停用的列不算作节点已有的列，
+被列池或定价子问题重新选中时恢复上界，而不是新增变量。被当前节点分支的列不停用。
+停用后 RMP 不可行时（例如弧流分支约束只剩被停用的列可以满足）恢复本次停用的所有列。
+"""
+from collections import defaultdict
+
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from logger_config import logger
+
+
+class ColumnAging:
+    def __init__(self, age_limit=COLUMN_AGE_LIMIT):
+        self.age_limit = age_limit
+        # 列池下标 --> 连续多少次节点列生成结束时为非基且 reduced cost 为正
+        self.ages = defaultdict(int)
+        # 列池下标 --> 最后一次记录的 reduced cost
+        self.reduced_costs = {}
+        self.statistics = {"deactivated": 0, "reactivated": 0, "restored_infeasible": 0}
+
+    def inactive_columns(self, model, variables, column_indices, branching_index):
+        """返回被停用的列 {列池下标: 节点模型中的变量下标}：上界为 0 且没有被当前节点分支的变量。"""
+        upper_bounds = model.getAttr(GRB.Attr.UB, variables[:len(column_indices)])
+        branched = set(branching_index)
+
+        return {c: j for j, (c, ub) in enumerate(zip(column_indices, upper_bounds)) if ub <= 0 and j not in branched}
+
+    def deactivate(self, model, variables, column_indices, branching_index):
+        """停用年龄达到上限的列，返回停用的变量下标。"""
+        if len(self.ages) == 0:
+            return []
+
+        branched = set(branching_index)
+        upper_bounds = model.getAttr(GRB.Attr.UB, variables[:len(column_indices)])
+        purged = [j for j, (c, ub) in enumerate(zip(column_indices, upper_bounds))
+                  if ub > 0 and j not in branched and self.ages.get(c, 0) >= self.age_limit]
+        for j in purged:
+            variables[j].UB = 0.0
+        if len(purged) > 0:
+            self.statistics["deactivated"] += len(purged)
+            logger.info("deactivate %s aged columns", len(purged))
+
+        return purged
+
+    def restore(self, variables, purged):
+        """停用后 RMP 不可行时恢复本次停用的列。"""
+        for j in purged:
+            variables[j].UB = GRB.INFINITY
+        self.statistics["restored_infeasible"] += 1
+        logger.info("RMP infeasible after deactivating %s columns, restore them", len(purged))
+
+    def reactivate(self, variables, column_index, position):
+        variables[position].UB = GRB.INFINITY
+        self.ages[column_index] = 0
+        self.statistics["reactivated"] += 1
+
+    def record(self, model, variables, column_indices):
+        """节点列生成结束时更新各列的年龄，停用的列不计年龄。"""
+        num_columns = len(column_indices)
+        reduced_costs = model.getAttr(GRB.Attr.RC, variables[:num_columns])
+        vbasis = model.getAttr(GRB.Attr.VBasis, variables[:num_columns])
+        upper_bounds = model.getAttr(GRB.Attr.UB, variables[:num_columns])
+        for c, rc, basis, ub in zip(column_indices, reduced_costs, vbasis, upper_bounds):
+            if ub <= 0:
+                continue
+            self.reduced_costs[c] = rc
+            if basis != 0 and rc > TOL:
+                self.ages[c] += 1
+            else:
+                self.ages[c] = 0
+
+    def report(self):
+        logger.info("column aging (limit %s): %s", self.age_limit, self.statistics)
+
+
+# 全局列老化记录
+column_aging = ColumnAging()
@@ -1,21 +1,29 @@
+import logging
 import numpy as np
 import gurobipy as grbpy
 from gurobipy import GRB
 from math import sqrt
-from logger_config import logger
+from logger_config import logger, RATE_LIMITED
 
 from read_data import Data
+from knapsack_pricing import price_patterns_dp
+from arc_flow import price_patterns_arc_flow, pattern_arcs, arc_duals_of, arc_reduced_cost
+from column_pool import column_pool
+from pricing_cache import pricing_cache
+from pricing_hierarchy import pricing_hierarchy
+from cuts import cut_pool, price_patterns_with_cuts
+from stabilization import DualStabilizer, farley_bound
 from algorithm_parameters import *
+from metrics import metrics, sp_global_counter, csp_global_counter
+from model_dump import model_archiver
+from column_aging import column_aging
+from termination import check_interrupted
 
 
-def solve_sub_problem(data, shadow_price, dual_correction, branching_index: list, pattern_old):
-
-    logger.info("start solving sub problem!")
-
-    logger.info("shadow_price: %s", shadow_price)
-
-    new_pattern = []
-
+def price_patterns_gurobi(data, shadow_price):
+    """
+    用 Gurobi 整数规划 (solution pool) 求解定价子问题，返回 [(pattern, reduced_cost), ...]。
+    """
     num_types = len(shadow_price)
 
     # 构造子问题
@@ -40,55 +48,234 @@ def solve_sub_problem(data, shadow_price, dual_correction, branching_index: list
 
     sub_model.update()
     sub_model.optimize()
+    check_interrupted(sub_model)
     sp_global_counter.increment()
-    logger.info("write sp model lp: %s", sp_global_counter.get_count())
-    sub_model.write(f"sub_problem_{sp_global_counter.get_count()}.lp")
+    model_archiver.dump(sub_model, f"sub_problem_{sp_global_counter.get_count()}.lp", "sub_problem")
 
-    output = []
-    for var in sub_model.getVars():
-        output.append(f"{var.VarName} = {var.X}")
-    logger.info(", ".join(output))
+    if logger.isEnabledFor(logging.INFO):
+        output = []
+        for var in sub_model.getVars():
+            output.append(f"{var.VarName} = {var.X}")
+        logger.info(", ".join(output))
 
     # 获取子问题求解状态
     logger.info('sub_model status: %s', GUROBI_Status_Map[sub_model.Status])
     logger.info('sub_model.SolCount: %s', sub_model.SolCount)
 
-    reduced_cost = 0
+    candidates = []
     for i in range(sub_model.SolCount):
         # 需要设置获取的顺序
         sub_model.setParam(GRB.Param.SolutionNumber, i)
         candidate_pattern = np.array(sub_model.getAttr(GRB.Attr.Xn, sub_model.getVars()), dtype=np.int32)
-        reduced_cost = sub_model.PoolObjVal
-
-        logger.info("No %s. best solution with objective value of %s", i, sub_model.PoolObjVal)
-        logger.info("candidate pattern: %s", candidate_pattern)
-        logger.info("reduced cost: %s", reduced_cost)
-
-        if reduced_cost >= 0 or abs(reduced_cost) <= TOL:
-            logger.info("no more profitable pattern available")
-            break
-
-        # check if the pattern is already generated
-        identical_pattern_index = np.where(np.all(pattern_old.T == candidate_pattern, axis=1))[0]
-        if len(identical_pattern_index) > 0:  # candidate pattern is already generated
-            logger.info("candidate pattern is already generated!!!")
-            logger.info("identical with pattern %s", identical_pattern_index[0])
-            correction_indices = np.where(identical_pattern_index[0] == branching_index)[0]
-            for j in correction_indices:
-                reduced_cost -= dual_correction[j]
-            logger.info("corrected reduced cost: %s", reduced_cost)
-        else:  # candidate pattern is new
-            if reduced_cost < 0 and abs(reduced_cost) > TOL:
-                new_pattern.append(candidate_pattern)
-                logger.info("The pattern is added.")
+        candidates.append((candidate_pattern, sub_model.PoolObjVal))
+
+    return candidates
+
+
+def solve_sub_problem(data, shadow_price, dual_correction, branching_index: list, column_positions: dict,
+                      arc_rows=None, forbidden_arcs=(), use_cache=True, use_heuristics=True):
+    """
+    求解定价子问题，返回 (min_reduced_cost, new_columns)。min_reduced_cost 为定价得到的最小 reduced cost，
+    new_columns 为需要加入当前节点的列池下标。
+
+    column_positions 为当前节点的 {列池下标: 节点模型中的变量下标}。
+    弧流分支时 arc_rows 为各分支约束对应的弧，dual_correction 为这些约束的对偶值，在模式图上定价。
+    使用定价缓存的近似结果或启发式定价的结果时最小 reduced cost 未知，返回 -inf。
+    use_heuristics 为 False 时跳过启发式定价层级，直接精确定价。
+    RMP 中有对偶值为正的割时，精确定价改用带割变量的整数规划，且不使用定价缓存和启发式定价（两者都不考虑割的对偶值）；
+    该整数规划没有求到最优时返回 (-inf, [])。
+    """
+
+    logger.info("start solving sub problem!")
+
+    logger.info("shadow_price: %s", shadow_price, extra=RATE_LIMITED)
+
+    new_columns = []
+
+    arc_duals = arc_duals_of(arc_rows, dual_correction) if arc_rows else None
+    candidates, exact, level = None, False, None
+    with_cuts = cut_pool.has_positive_duals()
+    if PRICING_CACHE_OPT == 1 and use_cache and not with_cuts:
+        candidates, exact = pricing_cache.get(data.Customer_demand_sizes, shadow_price, arc_duals, forbidden_arcs)
+
+    if candidates is None and PRICING_HIERARCHY_OPT == 1 and use_heuristics and not arc_rows and not with_cuts:
+        with metrics.timer("heuristic_pricing"):
+            candidates, level = pricing_hierarchy.price(data, shadow_price, POOL_SIZE)
+        if candidates is not None:
+            logger.info("pricing level %s found %s candidates", level, len(candidates), extra=RATE_LIMITED)
+
+    if candidates is None:
+        level = "exact"
+        with metrics.timer("pricing"):
+            if arc_rows:
+                sp_global_counter.increment()
+                candidates = price_patterns_arc_flow(data, shadow_price, arc_duals, forbidden_arcs, POOL_SIZE)
+            elif with_cuts:
+                candidates = price_patterns_with_cuts(data, shadow_price, POOL_SIZE)
+            elif PRICING_OPT == 0:
+                candidates = price_patterns_gurobi(data, shadow_price)
+            else:
+                sp_global_counter.increment()
+                candidates = price_patterns_dp(data, shadow_price, POOL_SIZE)
+        exact = candidates is not None
+        if candidates is None:
+            candidates = []
+        if PRICING_CACHE_OPT == 1 and not with_cuts:
+            pricing_cache.put(shadow_price, candidates, arc_duals, forbidden_arcs)
+    elif level is None:
+        logger.info("pricing cache hit (exact: %s)", exact)
+
+    min_reduced_cost = (candidates[0][1] if len(candidates) > 0 else 0.0) if exact else -np.inf
+    with metrics.timer("duplicate_check"):
+        for i, (candidate_pattern, reduced_cost) in enumerate(candidates):
+            logger.info("No %s. best solution with objective value of %s", i, reduced_cost, extra=RATE_LIMITED)
+            logger.info("candidate pattern: %s", candidate_pattern, extra=RATE_LIMITED)
+            logger.info("reduced cost: %s", reduced_cost, extra=RATE_LIMITED)
+
+            if reduced_cost >= 0 or abs(reduced_cost) <= TOL:
+                logger.info("no more profitable pattern available")
+                break
+
+            # check if the pattern is already generated
+            column_index = column_pool.find(candidate_pattern)
+            if column_index is not None and column_index in column_positions:  # candidate pattern is already in the node
+                identical_pattern_index = column_positions[column_index]
+                logger.info("candidate pattern is already generated!!!")
+                logger.info("identical with pattern %s", identical_pattern_index)
+                correction_indices = np.where(identical_pattern_index == np.array(branching_index))[0]
+                for j in correction_indices:
+                    reduced_cost -= dual_correction[j]
+                logger.info("corrected reduced cost: %s", reduced_cost)
+            else:  # candidate pattern is new to the node (possibly generated at another node)
+                if reduced_cost < 0 and abs(reduced_cost) > TOL:
+                    if column_index is None:
+                        column_index, _ = column_pool.add(candidate_pattern)
+                    if column_index not in new_columns:
+                        new_columns.append(column_index)
+                        logger.info("The pattern is added.")
+    metrics.observe("columns_per_pricing", len(new_columns))
+    if level is not None:
+        pricing_hierarchy.record(level, len(new_columns))
 
     logger.info("ended solving sub problem!")
 
-    return reduced_cost, new_pattern
+    return min_reduced_cost, new_columns
+
+
+def pattern_column(rows, counts, demand_constrs, cut_constrs=(), pattern=None):
+    """
+    由模式的非零元构造 Gurobi 列，只在模式包含的物品的需求约束中有系数；有割时 cut_constrs 为 RMP 中的割，
+    pattern 为稠密模式，系数为模式在各割中的系数。
+    """
+    column = grbpy.Column(counts.tolist(), [demand_constrs[i] for i in rows])
+    if len(cut_constrs) > 0:
+        for coefficient, constr in zip(cut_pool.coefficients(pattern), cut_constrs):
+            if coefficient != 0:
+                column.addTerms(coefficient, constr)
+
+    return column
+
+
+def build_rmp(data, column_indices):
+    """
+    按列池下标构造只含需求约束（以及根节点上加入的割）的 RMP，第 j 个变量 y[j] 对应列池中的第 column_indices[j] 列。
+    """
+    rmp_model = grbpy.Model("Restricted Master Problem")
+    constrs = [rmp_model.addConstr(grbpy.LinExpr() >= data.Customer_demands[i], name=f"demand_satisfaction[{i}]")
+               for i in range(data.Customer_numbers)]
+    cut_constrs = cut_pool.add_rows(rmp_model)
+    for j, c in enumerate(column_indices):
+        rows, counts = column_pool.get_sparse(c)
+        rmp_model.addVar(lb=0.0, ub=GRB.INFINITY, obj=1.0, vtype=GRB.CONTINUOUS, name=f"y[{j}]",
+                         column=pattern_column(rows, counts, constrs, cut_constrs, column_pool.get(c)))
+
+    rmp_model.setParam(GRB.Param.OutputFlag, 1)
+    rmp_model.setAttr(GRB.Attr.ModelSense, GRB.MINIMIZE)
+    rmp_model.update()
+
+    return rmp_model
+
+
+def get_dual_correction(quantity_pattern, dual_list, num_types, branching_index):
+    """
+    返回分支约束的对偶值。节点切换模式下对变量的分支以变量界的形式施加，没有分支约束，
+    此时用被分支变量的 reduced cost 作为修正量（同一变量被多次分支时只计一次）。弧流分支总是以约束的形式施加。
+    分支约束位于需求约束和根节点的割之后。
+    """
+    if NODE_SWITCHING_OPT == 0 or BRANCHING_SCHEME_OPT == 1:
+        return dual_list[num_types + cut_pool.num_active:len(dual_list)]
+
+    correction = []
+    seen = set()
+    for j in branching_index:
+        correction.append(0.0 if j in seen else quantity_pattern[j].RC)
+        seen.add(j)
+
+    return correction
+
 
+def solve_RMP_and_get_duals(RMP_model, quantity_pattern, num_types, branching_index):
+    """求解 RMP，返回需求约束的对偶值和分支约束的对偶修正量。"""
+    # solve RMP
+    RMP_model.update()
+    with metrics.timer("rmp_solve"):
+        RMP_model.optimize()
+    check_interrupted(RMP_model)
+
+    csp_global_counter.increment()
+    model_archiver.dump(RMP_model, f"csp_{csp_global_counter.get_count()}.lp", "csp",
+                        root=len(branching_index) == 0)
+
+    # get dual
+    dual_list = RMP_model.getAttr(GRB.Attr.Pi, RMP_model.getConstrs())
+    shadow_price = dual_list[0:num_types]
+    cut_pool.set_duals(dual_list, num_types)
+    shadow_price_correction = get_dual_correction(quantity_pattern, dual_list, num_types, branching_index)
+
+    logger.info("shadow price: %s", shadow_price, extra=RATE_LIMITED)
+    logger.info("shadow price correction: %s", shadow_price_correction, extra=RATE_LIMITED)
+
+    return shadow_price, shadow_price_correction
+
+
+def rmp_reduced_cost(data, pattern, shadow_price, shadow_price_correction, arc_rows=None, forbidden_arcs=()):
+    """模式在 RMP 对偶值下的 reduced cost，弧流分支时包含弧上分支约束的对偶值。"""
+    if arc_rows:
+        return arc_reduced_cost(pattern, shadow_price, arc_duals_of(arc_rows, shadow_price_correction),
+                                data.Customer_demand_sizes, forbidden_arcs)
+
+    return 1 - np.dot(shadow_price, pattern) - cut_pool.dual_term(pattern)
+
+
+def get_lagrangian_bound(data, RMP_model, pricing_price, shadow_price, min_reduced_cost, branching_index,
+                         stabilizer, arc_rows=None):
+    """
+    由一次定价的结果计算节点 LP 的拉格朗日 (Farley) 下界，无法给出有效下界时返回 -inf。
+
+    切割问题中所有列的费用为 1，节点 LP 最优值 z_LP 满足 z_LP >= z_RMP + z_LP * min(0, rc_min)，
+    即 z_LP >= z_RMP / (1 - min(0, rc_min))，要求 rc_min 是在 RMP 对偶值处计算的。
+    根节点没有分支约束，对任意 π >= 0 都有 Farley 下界 d·π / (1 - rc_min)，因此可以直接使用稳定化后的对偶值。
+    """
+    if len(branching_index) == 0 and not arc_rows and cut_pool.num_active == 0:
+        return farley_bound(data.Customer_demands, pricing_price, min_reduced_cost)
+
+    if stabilizer is not None and (stabilizer.box_in_use or not np.allclose(pricing_price, shadow_price)):
+        return -np.inf
 
-def solve_CSP_with_CG(data: Data, RMP_model: grbpy.Model, quantity_pattern, pattern: np.ndarray,
-                      branching_index: list):
+    return RMP_model.ObjVal / (1 - min(0.0, min_reduced_cost))
+
+
+def solve_CSP_with_CG(data: Data, RMP_model: grbpy.Model, quantity_pattern, column_indices: list,
+                      branching_index: list, upper_bound=float("inf"), arc_rows=None, forbidden_arcs=()):
+    """
+    对节点的 RMP 做列生成，column_indices 为节点模型中各变量对应的列池下标，新增的列会追加到其中。
+    弧流分支时 arc_rows 为需求约束之后各行分支约束对应的弧，forbidden_arcs 为流量上界为 0 的弧。
+
+    返回 (RMP_model, column_indices, lower_bound)，lower_bound 为节点 LP 最优值的下界。切割问题的目标值为整数，
+    当 ceil(lower_bound) == ceil(z_RMP) 时提前结束列生成；当 ceil(lower_bound) >= upper_bound（当前最好整数解）时
+    该节点不可能改进整数解，也提前结束，由调用方剪枝。upper_bound 也可以是返回当前上界的函数，每次定价后重新读取
+    （并行求解时为共享内存中其他进程随时更新的上界）。
+    """
 
     logger.info("start Solving CSP with CG!")
 
@@ -97,11 +284,24 @@ def solve_CSP_with_CG(data: Data, RMP_model: grbpy.Model, quantity_pattern, patt
 
     RMP_model.update()
 
-    csp_global_counter.increment()
-    logger.info("write csp model lp: %s", csp_global_counter.get_count())
-    RMP_model.write(f"csp_{csp_global_counter.get_count()}.lp")
+    # 停用老化的列
+    purged = []
+    if COLUMN_AGING_OPT == 1:
+        purged = column_aging.deactivate(RMP_model, quantity_pattern, column_indices, branching_index)
+
+    with metrics.timer("rmp_solve"):
+        RMP_model.optimize()  # 求解LP
+    check_interrupted(RMP_model)
+
+    if len(purged) > 0 and RMP_model.status == GRB.INFEASIBLE:
+        column_aging.restore(quantity_pattern, purged)
+        with metrics.timer("rmp_solve"):
+            RMP_model.optimize()
+        check_interrupted(RMP_model)
 
-    RMP_model.optimize()  # 求解LP
+    csp_global_counter.increment()
+    model_archiver.dump(RMP_model, f"csp_{csp_global_counter.get_count()}.lp", "csp",
+                        root=len(branching_index) == 0 and not arc_rows)
     # logger.info("RMP_model status: %s", RMP_model.status)
     logger.info("RMP_model status: %s", GUROBI_Status_Map[RMP_model.status])
 
@@ -109,46 +309,127 @@ def solve_CSP_with_CG(data: Data, RMP_model: grbpy.Model, quantity_pattern, patt
         # 获取约束的影子价格
         dual_list = RMP_model.getAttr(GRB.Attr.Pi, RMP_model.getConstrs())
         shadow_price = dual_list[0:num_types]  # 获取前 num_types 个约束的对偶值
-        shadow_price_correction = dual_list[num_types:len(dual_list)]  # 获取 添加的分支约束 的对偶值
-
-        logger.info("shadow price: %s", shadow_price)
-        logger.info("shadow price correction: %s", shadow_price_correction)
+        cut_pool.set_duals(dual_list, num_types)
+        shadow_price_correction = get_dual_correction(quantity_pattern, dual_list, num_types, branching_index)  # 获取 添加的分支约束 的对偶值
+
+        logger.info("shadow price: %s", shadow_price, extra=RATE_LIMITED)
+        logger.info("shadow price correction: %s", shadow_price_correction, extra=RATE_LIMITED)
+
+        stabilizer = None
+        if STABILIZATION_OPT != 0:
+            stabilizer = DualStabilizer(data)
+            if stabilizer.box_step:
+                stabilizer.attach_box(RMP_model, RMP_model.getConstrs()[0:num_types], shadow_price)
+                shadow_price, shadow_price_correction = solve_RMP_and_get_duals(RMP_model, quantity_pattern, num_types, branching_index)
+
+        # 被停用的列不算作节点已有的列，定价再次选中时恢复
+        inactive_columns = {}
+        if COLUMN_AGING_OPT == 1:
+            inactive_columns = column_aging.inactive_columns(RMP_model, quantity_pattern, column_indices, branching_index)
+        column_positions = {c: j for j, c in enumerate(column_indices) if c not in inactive_columns}
+        lower_bound = -np.inf
+        lp_optimal = False
+        num_iterations = 0
 
         while True:
-            # solve pricing sub-problem
-            reduced_cost, new_pattern = solve_sub_problem(data, shadow_price, shadow_price_correction, branching_index, pattern)
+            num_iterations += 1
+            # price in columns already in the global pool before calling the exact pricer
+            new_columns = [c for c, _ in column_pool.price_out(shadow_price, list(column_positions), POOL_SIZE)]
+            if arc_rows or cut_pool.has_positive_duals():
+                # 列池按需求约束的对偶值定价，弧上和割的对偶值按 RMP 的 reduced cost 过滤
+                new_columns = [c for c in new_columns if rmp_reduced_cost(data, column_pool.get(c), shadow_price, shadow_price_correction, arc_rows, forbidden_arcs) < -TOL]
+            if len(new_columns) > 0:
+                logger.info("price in %s columns from the column pool", len(new_columns))
+            else:
+                # solve pricing sub-problem (at the stabilized duals if stabilization is enabled)
+                pricing_price = shadow_price if stabilizer is None else stabilizer.pricing_duals(shadow_price)
+                reduced_cost, new_columns = solve_sub_problem(data, pricing_price, shadow_price_correction, branching_index, column_positions, arc_rows, forbidden_arcs)
+                if not np.isfinite(reduced_cost) and all(rmp_reduced_cost(data, column_pool.get(c), shadow_price, shadow_price_correction, arc_rows, forbidden_arcs) >= -TOL for c in new_columns):
+                    # 定价缓存给出的近似列对 RMP 没有改进，改用精确定价
+                    reduced_cost, new_columns = solve_sub_problem(data, pricing_price, shadow_price_correction, branching_index, column_positions, arc_rows, forbidden_arcs, use_cache=False, use_heuristics=False)
+
+                lower_bound = max(lower_bound, get_lagrangian_bound(data, RMP_model, pricing_price, shadow_price, reduced_cost, branching_index, stabilizer, arc_rows))
+                logger.info("Lagrangian bound: %s, RMP objective: %s", lower_bound, RMP_model.ObjVal, extra=RATE_LIMITED)
+
+                # 目标值为整数：下界向上取整后已不低于当前最好整数解，或已与 RMP 目标值向上取整相等时提前结束
+                exact_rmp = stabilizer is None or not stabilizer.box_in_use
+                current_ub = upper_bound() if callable(upper_bound) else upper_bound
+                if np.ceil(lower_bound - TOL) >= current_ub - TOL:
+                    logger.info("node cut off by Lagrangian bound %s >= ub %s", lower_bound, current_ub)
+                    break
+                if exact_rmp and np.ceil(lower_bound - TOL) >= np.ceil(RMP_model.ObjVal - TOL):
+                    logger.info("early termination of CG: ceil(Lagrangian bound) == ceil(RMP objective)")
+                    break
+
+                if stabilizer is not None:
+                    stabilizer.update_center(pricing_price, reduced_cost)
+
+                    # 只保留对 RMP 对偶值仍有负 reduced cost 的列
+                    new_columns = [c for c in new_columns if rmp_reduced_cost(data, column_pool.get(c), shadow_price, shadow_price_correction, arc_rows, forbidden_arcs) < -TOL]
+                    if len(new_columns) > 0:
+                        stabilizer.restore_alpha()
+                    elif stabilizer.mispricing(pricing_price, shadow_price):
+                        continue
+                    elif stabilizer.shrink_box(shadow_price):
+                        shadow_price, shadow_price_correction = solve_RMP_and_get_duals(RMP_model, quantity_pattern, num_types, branching_index)
+                        continue
+
             # check termination condition
-            if len(new_pattern) == 0:
-                logger.info("cannot found new pattern")
+            if len(new_columns) == 0:
+                # 定价没有求到最优（min reduced cost 未知）时不能认为 RMP 已是节点 LP 的最优解
+                lp_optimal = bool(np.isfinite(reduced_cost))
+                logger.info("cannot found new pattern (pricing exact: %s)", lp_optimal)
                 break
 
-            logger.info("new pattern:\n%s", np.array(new_pattern).T)
-            for p in new_pattern:
-                logger.info("add new pattern: %s", p)
-
-                # set the new pattern as a new column in the coefficient matrix
-                new_column = grbpy.Column(p, RMP_model.getConstrs()[0:num_types])
+            for c in new_columns:
+                if c in inactive_columns:
+                    # 被停用的列重新定价进入，恢复上界
+                    column_positions[c] = inactive_columns.pop(c)
+                    column_aging.reactivate(quantity_pattern, c, column_positions[c])
+                    logger.info("reactivate pattern %s", c, extra=RATE_LIMITED)
+                    continue
+
+                rows, counts = column_pool.get_sparse(c)
+                logger.info("add new pattern %s: rows %s, counts %s", c, rows, counts, extra=RATE_LIMITED)
+
+                # set the new pattern as a new column in the coefficient matrix (nonzeros only)
+                constrs = RMP_model.getConstrs()
+                new_column = pattern_column(rows, counts, constrs, constrs[num_types:num_types + cut_pool.num_active],
+                                            column_pool.get(c))
+                if arc_rows:
+                    # 模式经过的弧在对应的分支约束中系数为 1
+                    arcs = set(pattern_arcs(column_pool.get(c), data.Customer_demand_sizes))
+                    for r, arc in enumerate(arc_rows):
+                        if arc in arcs:
+                            new_column.addTerms(1.0, constrs[num_types + cut_pool.num_active + r])
                 # add the new variable
                 quantity_pattern.append(
                     RMP_model.addVar(obj=1.0, vtype=GRB.CONTINUOUS, column=new_column))
-                pattern = np.c_[pattern, p]
+                column_positions[c] = len(column_indices)
+                column_indices.append(c)
 
-            # solve RMP
-            RMP_model.update()
-            RMP_model.optimize()
+            # solve RMP and get dual
+            shadow_price, shadow_price_correction = solve_RMP_and_get_duals(RMP_model, quantity_pattern, num_types, branching_index)
+
+        metrics.observe("cg_iterations_per_node", num_iterations)
 
-            csp_global_counter.increment()
-            logger.info("write csp model lp: %s", csp_global_counter.get_count())
-            RMP_model.write(f"csp_{csp_global_counter.get_count()}.lp")
+        if stabilizer is not None:
+            # 删除 box-step 人工变量后重新求解，恢复原 RMP 的解
+            if stabilizer.detach_box(RMP_model):
+                with metrics.timer("rmp_solve"):
+                    RMP_model.optimize()
+                check_interrupted(RMP_model)
+            stabilizer.report()
 
-            # get dual
-            dual_list = RMP_model.getAttr(GRB.Attr.Pi, RMP_model.getConstrs())
-            shadow_price = dual_list[0:num_types]
-            shadow_price_correction = dual_list[num_types:len(dual_list)]
+        # 列生成正常结束时 RMP 的最优值就是节点 LP 的最优值
+        if lp_optimal:
+            lower_bound = max(lower_bound, RMP_model.ObjVal)
 
-            logger.info("shadow price: %s", shadow_price)
-            logger.info("shadow price correction: %s", shadow_price_correction)
+        if COLUMN_AGING_OPT == 1 and RMP_model.status == GRB.OPTIMAL:
+            column_aging.record(RMP_model, quantity_pattern, column_indices)
+    else:
+        lower_bound = np.inf
 
     logger.info("ended Solving CSP with CG!")
 
-    return RMP_model, pattern
+    return RMP_model, column_indices, lower_bound
@@ -0,0 +1,96 @@
+"""
+全局列池：整个分支定价树共享所有生成过的切割模式。
+
+以模式的字节串为键建立哈希索引，查重为 O(1)；节点只保存列池下标 column_indices，
+节点模型中第 j 个变量对应列池中的第 column_indices[j] 列。
+稀疏存储 (COLUMN_STORE_OPT = 1) 时键为非零元的 (行下标, 数量)，RMP 的列由 get_sparse() 构造。
+"""
+import numpy as np
+from algorithm_parameters import TOL, COLUMN_STORE_OPT
+from column_store import DenseColumnStore, SparseColumnStore, pattern_key
+
+
+class ColumnPool:
+    def __init__(self):
+        # 列池中的切割模式，下标即列池下标；第一次加列时按模式长度创建
+        self.store = None
+        # 模式字节串 --> 列池下标
+        self.index = {}
+
+    def __len__(self):
+        return 0 if self.store is None else len(self.store)
+
+    @staticmethod
+    def key(pattern) -> bytes:
+        return pattern_key(pattern, sparse=COLUMN_STORE_OPT == 1)
+
+    def find(self, pattern):
+        """返回与 pattern 相同的列的列池下标，不存在时返回 None。"""
+        return self.index.get(self.key(pattern))
+
+    def add(self, pattern):
+        """
+        将 pattern 加入列池，返回 (列池下标, 是否为新列)。
+        """
+        key = self.key(pattern)
+        column_index = self.index.get(key)
+        if column_index is not None:
+            return column_index, False
+
+        if self.store is None:
+            column_store = DenseColumnStore if COLUMN_STORE_OPT == 0 else SparseColumnStore
+            self.store = column_store(len(pattern))
+        column_index = self.store.append(pattern)
+        self.index[key] = column_index
+
+        return column_index, True
+
+    def get(self, column_index) -> np.ndarray:
+        return self.store.column(column_index)
+
+    def get_sparse(self, column_index):
+        """返回列的 (行下标, 数量)。"""
+        return self.store.column_sparse(column_index)
+
+    def to_matrix(self, column_indices=None, size=None) -> np.ndarray:
+        """
+        返回 (num_types, len(column_indices)) 的模式矩阵；column_indices 为 None 时返回列池前 size 列
+        （默认整个列池），稠密存储下为视图。column_indices 恰好是列池的前若干列时（节点切换模式下通常如此）同样返回视图。
+        """
+        if column_indices is None:
+            return self.store.matrix(size=size)
+        if np.array_equal(column_indices, np.arange(len(column_indices))):
+            return self.store.matrix(size=len(column_indices))
+
+        return self.store.matrix(column_indices)
+
+    def snapshot(self):
+        """列池当前状态的只读快照，之后新增的列对快照不可见。"""
+        return self.store.snapshot()
+
+    def price_out(self, shadow_price, column_indices, k):
+        """
+        向量化计算列池中不在当前节点的列的 reduced cost，返回最负的至多 k 列 [(列池下标, reduced_cost), ...]。
+
+        Parameters:
+            shadow_price: 需求约束的对偶值。
+            column_indices: 当前节点已有列的列池下标。
+            k (int): 返回的列数。
+        """
+        if len(column_indices) >= len(self):
+            return []
+
+        reduced_cost = 1 - self.store.dot(shadow_price)
+        in_node = np.zeros(len(self), dtype=bool)
+        in_node[np.asarray(column_indices, dtype=np.int64)] = True
+
+        candidates = np.flatnonzero(~in_node & (reduced_cost < -TOL))
+        if len(candidates) == 0:
+            return []
+        candidates = candidates[np.argsort(reduced_cost[candidates], kind='stable')[:k]]
+
+        return [(int(j), reduced_cost[j]) for j in candidates]
+
+
+# 全局列池
+column_pool = ColumnPool()
@@ -0,0 +1,209 @@
+"""
+可增长的列存储，替代 np.c_[pattern, p] 每加一列就复制整个矩阵的做法。
+
+容量不足时成倍扩容，追加一列的均摊代价为 O(num_rows)。提供两种后端：
+    DenseColumnStore: 稠密 int32，按列连续存放，column(j) 返回视图而不是副本；
+    SparseColumnStore: CSC 格式 (indptr, indices, data)，适合物品种类多、模式很稀疏的算例。
+snapshot() 只记录当前列数，得到的只读视图不随之后追加的列变化，可以低成本地交给子节点。
+
+两种后端都提供 column_sparse(j)（行下标, 数量）和 matvec(x)（模式矩阵乘以列的取值），
+构造 Gurobi 列、计算剩余需求时只用到非零元，不需要展开稠密矩阵。
+"""
+import numpy as np
+
+
+def sparse_pattern(pattern):
+    """稠密模式 --> (行下标, 数量)。"""
+    pattern = np.asarray(pattern)
+    rows = np.flatnonzero(pattern).astype(np.int32)
+
+    return rows, pattern[rows].astype(np.int32)
+
+
+def pattern_key(pattern, sparse=False) -> bytes:
+    """
+    模式去重用的键。稠密时为整个模式的字节串；sparse=True 时为非零元的 (行下标, 数量) 字节串，
+    长度只与非零元个数有关。两种键不能混用。
+    """
+    if sparse:
+        rows, counts = sparse_pattern(pattern)
+        return rows.tobytes() + counts.tobytes()
+
+    return np.ascontiguousarray(pattern, dtype=np.int32).tobytes()
+
+
+def grow(array, min_length):
+    """按 2 倍扩容第一维，返回新数组（保留原有内容）。"""
+    capacity = max(len(array), 1)
+    while capacity < min_length:
+        capacity *= 2
+    if capacity == len(array):
+        return array
+    new_array = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    new_array[:len(array)] = array
+
+    return new_array
+
+
+class DenseColumnStore:
+    def __init__(self, num_rows, capacity=16):
+        self.num_rows = num_rows
+        # 第 j 行存放第 j 列，保证 column(j) 是连续内存上的视图
+        self.buffer = np.zeros((capacity, num_rows), dtype=np.int32)
+        self.size = 0
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        """由 (num_rows, num_columns) 的模式矩阵构造。"""
+        matrix = np.asarray(matrix)
+        store = cls(matrix.shape[0], max(2 * matrix.shape[1], 16))
+        store.buffer[:matrix.shape[1]] = matrix.T
+        store.size = matrix.shape[1]
+
+        return store
+
+    def __len__(self):
+        return self.size
+
+    def append(self, pattern) -> int:
+        self.buffer = grow(self.buffer, self.size + 1)
+        self.buffer[self.size] = pattern
+        self.size += 1
+
+        return self.size - 1
+
+    def column(self, j) -> np.ndarray:
+        return self.buffer[j]
+
+    def column_sparse(self, j):
+        return sparse_pattern(self.buffer[j])
+
+    def matrix(self, column_indices=None, size=None) -> np.ndarray:
+        """返回 (num_rows, num_columns) 的模式矩阵；不指定 column_indices 时返回视图。"""
+        if column_indices is None:
+            return self.buffer[:self.size if size is None else size].T
+
+        return self.buffer[column_indices].T
+
+    def dot(self, vector, size=None) -> np.ndarray:
+        """计算 vector @ matrix，即每一列与 vector 的内积。"""
+        return self.buffer[:self.size if size is None else size] @ np.asarray(vector, dtype=float)
+
+    def matvec(self, x, size=None) -> np.ndarray:
+        """计算 matrix @ x，x 为前 size 列的取值。"""
+        return np.asarray(x) @ self.buffer[:self.size if size is None else size]
+
+    def snapshot(self):
+        return ColumnStoreView(self, self.size)
+
+
+class SparseColumnStore:
+    def __init__(self, num_rows, capacity=16):
+        self.num_rows = num_rows
+        self.indptr = np.zeros(capacity + 1, dtype=np.int64)
+        self.indices = np.zeros(capacity * 4, dtype=np.int32)
+        self.data = np.zeros(capacity * 4, dtype=np.int32)
+        self.size = 0
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        matrix = np.asarray(matrix)
+        store = cls(matrix.shape[0], max(2 * matrix.shape[1], 16))
+        for j in range(matrix.shape[1]):
+            store.append(matrix[:, j])
+
+        return store
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nnz(self):
+        return int(self.indptr[self.size])
+
+    def append(self, pattern) -> int:
+        pattern = np.asarray(pattern)
+        rows = np.flatnonzero(pattern)
+
+        return self.append_sparse(rows, pattern[rows])
+
+    def append_sparse(self, rows, counts) -> int:
+        """按 (行下标, 数量) 追加一列。"""
+        start = self.nnz
+        end = start + len(rows)
+        self.indptr = grow(self.indptr, self.size + 2)
+        self.indices = grow(self.indices, end)
+        self.data = grow(self.data, end)
+
+        self.indices[start:end] = rows
+        self.data[start:end] = counts
+        self.indptr[self.size + 1] = end
+        self.size += 1
+
+        return self.size - 1
+
+    def column_sparse(self, j):
+        """返回第 j 列的 (行下标, 数量)，两者均为视图。"""
+        start, end = self.indptr[j], self.indptr[j + 1]
+
+        return self.indices[start:end], self.data[start:end]
+
+    def column(self, j) -> np.ndarray:
+        rows, counts = self.column_sparse(j)
+        pattern = np.zeros(self.num_rows, dtype=np.int32)
+        pattern[rows] = counts
+
+        return pattern
+
+    def matrix(self, column_indices=None, size=None) -> np.ndarray:
+        if column_indices is None:
+            column_indices = range(self.size if size is None else size)
+        matrix = np.zeros((self.num_rows, len(column_indices)), dtype=np.int32)
+        for k, j in enumerate(column_indices):
+            rows, counts = self.column_sparse(j)
+            matrix[rows, k] = counts
+
+        return matrix
+
+    def dot(self, vector, size=None) -> np.ndarray:
+        size = self.size if size is None else size
+        nnz = int(self.indptr[size])
+        column_ids = np.repeat(np.arange(size), np.diff(self.indptr[:size + 1]))
+        weights = np.asarray(vector, dtype=float)[self.indices[:nnz]] * self.data[:nnz]
+
+        return np.bincount(column_ids, weights=weights, minlength=size)
+
+    def matvec(self, x, size=None) -> np.ndarray:
+        size = self.size if size is None else size
+        nnz = int(self.indptr[size])
+        x = np.asarray(x)
+        column_values = np.repeat(x[:size], np.diff(self.indptr[:size + 1]))
+        result = np.bincount(self.indices[:nnz], weights=column_values * self.data[:nnz], minlength=self.num_rows)
+
+        return result.astype(x.dtype) if np.issubdtype(x.dtype, np.integer) else result
+
+    def snapshot(self):
+        return ColumnStoreView(self, self.size)
+
+
+class ColumnStoreView:
+    """列存储的只读快照：只能看到创建快照时已有的 size 列。"""
+    def __init__(self, store, size):
+        self.store = store
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def column(self, j) -> np.ndarray:
+        if j >= self.size:
+            raise IndexError(f"column {j} is not in the snapshot of {self.size} columns")
+        return self.store.column(j)
+
+    def matrix(self, column_indices=None) -> np.ndarray:
+        if column_indices is None:
+            return self.store.matrix(size=self.size)
+        return self.store.matrix(column_indices)
+
+    def dot(self, vector) -> np.ndarray:
+        return self.store.dot(vector, size=self.size)
@@ -0,0 +1,220 @@
+"""
+根节点 RMP 中的 rank-1 Chvátal–Gomory 割（subset-row 割），由 algorithm_parameters.CUTS_OPT 控制。
+
+对需求约束的子集 S（|S| 取 CUT_SUBSET_SIZES）和乘子 u = 1/2，割
+
+    sum_p ceil(u * sum_{i in S} a_ip) x_p >= ceil(u * sum_{i in S} d_i)
+
+对所有整数解成立。割的系数是模式的非线性函数，因此有对偶值为正的割时，定价改用带割变量的整数规划：
+z_c <= u * sum_{i in S} a_i + (1 - u) 且 z_c 为整数（u = 1/q 时即 z_c <= ceil(u * sum_{i in S} a_i)），
+目标中减去 sigma_c * z_c；sigma_c > 0，最优时 z_c 取到上界 ceil(u * sum_{i in S} a_i)。
+
+割只在根节点分轮分离；每轮列生成后，连续 CUT_AGE_LIMIT 轮松弛（对偶值为 0）的割从 RMP 中删除并留在割池中，
+之后再次被违反时重新加入。根节点结束后 RMP 中的割固定不变，位于需求约束之后、分支约束之前。
+只支持对模式变量分支 (BRANCHING_SCHEME_OPT = 0)，弧流定价不考虑割的对偶值。
+"""
+import itertools
+import math
+
+import numpy as np
+import gurobipy as grbpy
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from logger_config import logger, RATE_LIMITED
+from metrics import sp_global_counter
+from model_dump import model_archiver
+from termination import check_interrupted
+
+CUT_MULTIPLIER = 0.5
+
+
+class Rank1Cut:
+    def __init__(self, subset, rhs):
+        self.subset = np.asarray(subset, dtype=np.int64)
+        self.rhs = rhs
+        # 根节点 RMP 中的约束，割不在 RMP 中时为 None
+        self.constr = None
+        self.age = 0
+
+    @property
+    def key(self):
+        return tuple(self.subset.tolist())
+
+    def coefficients(self, patterns) -> np.ndarray:
+        """patterns 为 (num_types, k) 的模式矩阵，返回每一列在割中的系数。"""
+        return np.ceil(CUT_MULTIPLIER * np.asarray(patterns)[self.subset].sum(axis=0) - TOL)
+
+
+class CutPool:
+    def __init__(self):
+        # 割池中的所有割（子集 --> 割）以及当前在 RMP 中的割（按约束顺序）
+        self.cuts = {}
+        self.active = []
+        # RMP 中各割的对偶值，每次求解 RMP 后更新
+        self.duals = np.zeros(0)
+        self.statistics = {"rounds": 0, "separated": 0, "reactivated": 0, "removed": 0}
+
+    @property
+    def num_active(self):
+        return len(self.active)
+
+    def set_duals(self, dual_list, num_types):
+        self.duals = np.asarray(dual_list[num_types:num_types + self.num_active], dtype=float)
+
+    def has_positive_duals(self):
+        return self.num_active > 0 and bool(np.any(self.duals > TOL))
+
+    def coefficients(self, pattern) -> list:
+        """模式在各个 RMP 割中的系数。"""
+        column = np.asarray(pattern).reshape(-1, 1)
+        return [float(cut.coefficients(column)[0]) for cut in self.active]
+
+    def dual_term(self, pattern) -> float:
+        """割对模式 reduced cost 的贡献 sum_c sigma_c * coef_c(pattern)。"""
+        if not self.has_positive_duals():
+            return 0.0
+        return float(np.dot(self.duals, self.coefficients(pattern)))
+
+    def separate(self, patterns, quantity, demands):
+        """
+        在 LP 解 (patterns, quantity) 处分离违反量最大的至多 CUT_MAX_PER_ROUND 个割，返回 [Rank1Cut, ...]。
+        只在 LP 解中用到的行里枚举子集。
+        """
+        patterns = np.asarray(patterns, dtype=np.int64)
+        quantity = np.asarray(quantity, dtype=float)
+        demands = np.asarray(demands, dtype=np.int64)
+        support = np.flatnonzero(quantity > TOL)
+        rows = np.flatnonzero(patterns[:, support].sum(axis=1) > 0)
+        # 行数太多时只取在 LP 解中用量最大的行
+        rows = rows[np.argsort(-(patterns[rows][:, support] @ quantity[support]), kind='stable')[:CUT_CANDIDATE_ROWS]]
+
+        violated = []
+        for size in CUT_SUBSET_SIZES:
+            subsets = np.array(list(itertools.combinations(sorted(rows.tolist()), size)), dtype=np.int64)
+            if len(subsets) == 0:
+                continue
+            # (num_subsets, num_support) 的割系数和左端项
+            sums = patterns[:, support][subsets].sum(axis=1)
+            lhs = np.ceil(CUT_MULTIPLIER * sums - TOL) @ quantity[support]
+            rhs = np.ceil(CUT_MULTIPLIER * demands[subsets].sum(axis=1) - TOL)
+            violation = rhs - lhs
+            for s in np.flatnonzero(violation > CUT_MIN_VIOLATION):
+                violated.append((violation[s], subsets[s], rhs[s]))
+
+        violated.sort(key=lambda item: -item[0])
+        cuts = []
+        for violation, subset, rhs in violated:
+            key = tuple(subset.tolist())
+            cut = self.cuts.get(key)
+            if cut is None:
+                cut = Rank1Cut(subset, float(rhs))
+                self.cuts[key] = cut
+                self.statistics["separated"] += 1
+            elif cut.constr is not None:
+                continue
+            else:
+                self.statistics["reactivated"] += 1
+            cuts.append(cut)
+            if len(cuts) >= CUT_MAX_PER_ROUND:
+                break
+
+        return cuts
+
+    def add_to_model(self, model, variables, patterns, cuts):
+        """把割加入根节点 RMP，patterns 为 RMP 各列的模式矩阵。"""
+        for cut in cuts:
+            coefficients = cut.coefficients(patterns).tolist()
+            cut.constr = model.addConstr(grbpy.LinExpr(coefficients, variables) >= cut.rhs,
+                                         name=f"rank1_cut_{'_'.join(map(str, cut.key))}")
+            cut.age = 0
+            self.active.append(cut)
+        self.statistics["rounds"] += 1
+
+    def age(self, model):
+        """根节点每轮列生成后调用：删除连续 CUT_AGE_LIMIT 轮松弛的割（留在割池中），返回删除的个数。"""
+        removed = []
+        for cut in self.active:
+            if abs(cut.constr.Pi) <= TOL and cut.constr.Slack < -TOL:
+                cut.age += 1
+            else:
+                cut.age = 0
+            if cut.age >= CUT_AGE_LIMIT:
+                removed.append(cut)
+
+        for cut in removed:
+            model.remove(cut.constr)
+            cut.constr = None
+            self.active.remove(cut)
+        if len(removed) > 0:
+            model.update()
+            self.statistics["removed"] += len(removed)
+            logger.info("remove %s slack cuts from the RMP", len(removed))
+
+        return len(removed)
+
+    def add_rows(self, model):
+        """重建 RMP 时添加当前割对应的空约束行，返回这些约束（系数由各列添加）。"""
+        return [model.addConstr(grbpy.LinExpr() >= cut.rhs, name=f"rank1_cut_{'_'.join(map(str, cut.key))}")
+                for cut in self.active]
+
+    def state(self):
+        return [(cut.key, cut.rhs) for cut in self.active]
+
+    def restore(self, state):
+        for key, rhs in state:
+            cut = Rank1Cut(key, rhs)
+            self.cuts[key] = cut
+            self.active.append(cut)
+
+    def report(self):
+        logger.info("rank-1 cuts: %s in the RMP, %s in the pool, %s", self.num_active, len(self.cuts), self.statistics)
+
+
+def price_patterns_with_cuts(data, shadow_price, k=1):
+    """
+    带割对偶值的定价：用 Gurobi 整数规划求 reduced cost
+    1 - pi * a - sum_c sigma_c * ceil(u * sum_{i in S_c} a_i) 最小的 k 个模式，返回 [(pattern, reduced_cost), ...]；
+    整数规划没有求到最优时返回 None，调用方不能据此判断列生成结束。
+    """
+    num_types = len(shadow_price)
+    sub_model = grbpy.Model("sub problem with cuts")
+    sub_model.setParam(GRB.Param.OutputFlag, 0)
+
+    var_a = sub_model.addVars(num_types, lb=0, vtype=GRB.INTEGER, name="a")
+    sub_model.addConstr(grbpy.quicksum(var_a[i] * data.Customer_demand_sizes[i] for i in range(num_types)) <= data.Width,
+                        name="width_constraint")
+    objective = grbpy.quicksum(shadow_price[i] * var_a[i] for i in range(num_types))
+    for c, (cut, sigma) in enumerate(zip(cut_pool.active, cut_pool.duals)):
+        if sigma <= TOL:
+            continue
+        z = sub_model.addVar(lb=0, vtype=GRB.INTEGER, name=f"z({c})")
+        sub_model.addConstr(z <= CUT_MULTIPLIER * grbpy.quicksum(var_a[int(i)] for i in cut.subset) + (1 - CUT_MULTIPLIER),
+                            name=f"cut_{c}")
+        objective += sigma * z
+    sub_model.setObjective(1 - objective, GRB.MINIMIZE)
+
+    sub_model.setParam(GRB.Param.PoolSearchMode, 2)
+    sub_model.setParam(GRB.Param.PoolSolutions, k)
+    sub_model.optimize()
+    check_interrupted(sub_model)
+    sp_global_counter.increment()
+    model_archiver.dump(sub_model, f"sub_problem_{sp_global_counter.get_count()}.lp", "sub_problem")
+    if sub_model.Status != GRB.OPTIMAL:
+        logger.warning("pricing with cuts ended with status %s", GUROBI_Status_Map.get(sub_model.Status))
+        return None
+
+    candidates = []
+    a = [var_a[i] for i in range(num_types)]
+    for s in range(sub_model.SolCount):
+        sub_model.setParam(GRB.Param.SolutionNumber, s)
+        pattern = np.round(sub_model.getAttr(GRB.Attr.Xn, a)).astype(np.int32)
+        candidates.append((pattern, sub_model.PoolObjVal))
+    logger.info("pricing with %s cut duals: %s candidates", int(np.sum(cut_pool.duals > TOL)), len(candidates),
+                extra=RATE_LIMITED)
+
+    return candidates
+
+
+# 全局割池
+cut_pool = CutPool()
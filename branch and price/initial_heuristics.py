@@ -0,0 +1,99 @@
+"""
+根节点 LP 之前的构造启发式，同时给出初始列和初始整数解（上界）：
+    FFD: first-fit decreasing，物品按尺寸从大到小依次放入第一个放得下的原材料；
+    BFD: best-fit decreasing，放入剩余长度最小且放得下的原材料；
+    greedy: 贪心剩余问题，每次用背包 DP 求利用率最高的模式（数量不超过剩余需求），尽可能多次使用后更新剩余需求。
+
+同一种物品的多个副本一次性放置：first-fit 时依次填满各个放得下的原材料，best-fit 时每放一个副本后该原材料仍是最紧的，
+因此等价于按剩余长度从小到大依次填满，两者都只需对所有已开的原材料做一次向量化的累加，循环次数等于物品种类数。
+"""
+import numpy as np
+
+from algorithm_parameters import *
+from arc_flow import canonical_order
+from knapsack_pricing import solve_knapsack_dp
+from logger_config import logger
+
+INITIAL_HEURISTIC_NAMES = ("FFD", "BFD", "greedy")
+
+
+def pack_decreasing(sizes, demands, width, best_fit=False):
+    """
+    FFD / BFD 装箱，返回 (patterns, counts)：patterns 为 (num_types, k) 的不同模式，counts 为每个模式的使用次数。
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    num_types = len(sizes)
+    # 每个已开原材料中各物品的数量和剩余长度
+    contents = np.zeros((0, num_types), dtype=np.int32)
+    residual = np.zeros(0, dtype=np.int64)
+
+    for i in canonical_order(sizes):
+        remaining = int(demands[i])
+        if remaining <= 0:
+            continue
+
+        size = int(sizes[i])
+        order = np.argsort(residual, kind='stable') if best_fit else np.arange(len(residual))
+        fits = residual[order] // size
+        before = np.cumsum(fits) - fits
+        take = np.clip(remaining - before, 0, fits)
+        contents[order, i] += take.astype(np.int32)
+        residual[order] -= take * size
+        remaining -= int(take.sum())
+
+        if remaining > 0:
+            # 剩余的副本放入新的原材料，除最后一根外都放满
+            per_bin = width // size
+            num_new = -(-remaining // per_bin)
+            new_contents = np.zeros((num_new, num_types), dtype=np.int32)
+            new_contents[:, i] = per_bin
+            new_contents[-1, i] = remaining - per_bin * (num_new - 1)
+            contents = np.concatenate([contents, new_contents])
+            residual = np.concatenate([residual, width - new_contents[:, i].astype(np.int64) * size])
+
+    patterns, counts = np.unique(contents, axis=0, return_counts=True)
+
+    return patterns.T, counts
+
+
+def greedy_residual(sizes, demands, width):
+    """贪心剩余问题启发式，返回值同 pack_decreasing。"""
+    sizes = np.asarray(sizes, dtype=np.int64)
+    residual = np.array(demands, dtype=np.int64)
+    patterns = []
+    counts = []
+
+    while residual.sum() > 0:
+        # 以尺寸为价值的有界背包：剩余需求为 0 的物品上界为 0
+        best_patterns, _ = solve_knapsack_dp(sizes, width, sizes.astype(float), k=1, upper_bounds=residual)
+        pattern = best_patterns[0]
+        used = np.flatnonzero(pattern)
+        times = max(1, int(np.min(residual[used] // pattern[used])))
+
+        patterns.append(pattern)
+        counts.append(times)
+        residual = np.maximum(0, residual - times * pattern)
+
+    return np.array(patterns, dtype=np.int32).T, np.array(counts)
+
+
+def run_initial_heuristics(data):
+    """
+    运行所有构造启发式，返回 (columns, best)：columns 为所有启发式得到的不同模式 (num_types, m)，
+    best 为原材料用量最少的 (名称, patterns, counts)。
+    """
+    if np.any(data.Customer_demand_sizes > data.Width):
+        raise ValueError("an item is longer than the stock width")
+
+    results = [
+        ("FFD", *pack_decreasing(data.Customer_demand_sizes, data.Customer_demands, data.Width)),
+        ("BFD", *pack_decreasing(data.Customer_demand_sizes, data.Customer_demands, data.Width, best_fit=True)),
+        ("greedy", *greedy_residual(data.Customer_demand_sizes, data.Customer_demands, data.Width)),
+    ]
+    for name, patterns, counts in results:
+        logger.info("initial heuristic %s: %s rolls with %s patterns", name, counts.sum(), patterns.shape[1])
+
+    columns = np.unique(np.concatenate([patterns for _, patterns, _ in results], axis=1), axis=1)
+    best = min(results, key=lambda result: result[2].sum())
+
+    return columns, best
@@ -0,0 +1,185 @@
+"""
+用动态规划求解切割问题的定价子问题（一维整数背包）。
+
+    max  sum_i pi_i * a_i
+    s.t. sum_i w_i * a_i <= W
+         0 <= a_i <= u_i, a_i 为整数
+
+按物品逐层做 DP，每个容量只保留前 k 个最优值，并记录回溯信息，最后一次性回溯得到价值最大的 k 个不同切割模式：
+    - 上限不起作用的物品 (u_i >= W // w_i) 按无界背包递推 best_i[c] = top_k(best_{i-1}[c], best_i[c - w_i] + pi_i)，
+      容量轴按长度 w_i 分块，每块只依赖前一块，块内向量化，每层的计算量为 O(W k)；
+    - 有上限的物品在 k = 1 时按二进制拆分为 1, 2, 4, ..., 余数 个的 0-1 物品，共 O(log u_i) 层；
+      k > 1 时二进制拆分会出现同一数量的多种拆法（重复的模式），改为对取用数量 t 循环。
+回溯信息每层一个 (W + 1, k) 数组，把上一层（或同层前一块）的名次和取用数量编码为一个整数，使用能放下的最小整数类型。
+"""
+from functools import reduce
+from math import gcd
+
+import numpy as np
+
+
+def code_dtype(max_code):
+    """能放下 0..max_code 的最小无符号整数类型。"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_code <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def top_k(all_value, all_code, k):
+    """每行保留价值最大的 k 个，价值相同时保留靠前的（不取用该物品优先）。"""
+    order = np.argsort(-all_value, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(all_value, order, axis=1), np.take_along_axis(all_code, order, axis=1)
+
+
+def unbounded_layer(best, base_rank, w, value):
+    """
+    无界物品的一层：best_i[c] = top_k(best_{i-1}[c], best_i[c - w] + value)。
+    返回 (新的 best, 回溯编码)，编码为 名次 * 2 + 是否取用，取用时名次指同层 c - w 处，否则指上一层 c 处。
+    """
+    num_rows, k = best.shape
+    merged = best.copy()
+    codes = np.empty((num_rows, k), dtype=code_dtype(2 * k - 1))
+    codes[:] = base_rank * 2
+
+    not_taken = base_rank[:w] * 2
+    taken = not_taken + 1
+    for start in range(w, num_rows, w):
+        end = min(start + w, num_rows)
+        n = end - start
+        all_value = np.concatenate([best[start:end], merged[start - w:end - w] + value], axis=1)
+        all_code = np.concatenate([not_taken[:n], taken[:n]], axis=1)
+        merged[start:end], codes[start:end] = top_k(all_value, all_code, k)
+
+    return merged, codes
+
+
+def bounded_layer(best, base_rank, w, value, max_count):
+    """
+    至多取用 max_count 个的物品的一层，对取用数量 t 循环。
+    返回 (新的 best, 回溯编码)，编码为 上一层的名次 * (max_count + 1) + t。
+    """
+    num_rows, k = best.shape
+    radix = max_count + 1
+    merged_value = best.copy()
+    merged_code = (base_rank * radix).astype(np.int64)
+
+    for t in range(1, max_count + 1):
+        shift = t * w
+        if shift >= num_rows:
+            break
+        # 只有容量 >= shift 的位置能再放入 t 个物品
+        all_value = np.concatenate([merged_value[shift:], best[:num_rows - shift] + t * value], axis=1)
+        all_code = np.concatenate([merged_code[shift:], base_rank[shift:] * radix + t], axis=1)
+        merged_value[shift:], merged_code[shift:] = top_k(all_value, all_code, k)
+
+    return merged_value, merged_code.astype(code_dtype(k * radix - 1))
+
+
+def solve_knapsack_dp(sizes, capacity, values, k=1, upper_bounds=None):
+    """
+    返回价值最大的 k 个不同切割模式，按价值降序排列。
+
+    Parameters:
+        sizes: 每种物品的尺寸（正整数）。
+        capacity (int): 背包容量，即原材料宽度。
+        values: 每种物品的价值，即 RMP 需求约束的对偶值。
+        k (int): 需要返回的模式数量。
+        upper_bounds: 每种物品的数量上限，None 表示无界背包（上限为 capacity // size）。
+
+    Returns:
+        patterns (np.ndarray): 形状为 (k', num_items) 的 int32 数组，k' <= k。
+        pattern_values (np.ndarray): 每个模式的价值 sum_i pi_i * a_i。
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    num_items = len(sizes)
+
+    max_copies = capacity // sizes
+    if upper_bounds is not None:
+        max_copies = np.minimum(max_copies, np.asarray(upper_bounds, dtype=np.int64))
+    # 价值非正的物品不会让模式变得更好，直接排除，避免生成被支配的模式
+    max_copies = np.where(values > 0, max_copies, 0)
+    active = np.flatnonzero(max_copies > 0)
+
+    if len(active) == 0:
+        return np.zeros((1, num_items), dtype=np.int32), np.zeros(1)
+
+    # 用尺寸的最大公约数缩放容量轴，减小 DP 规模
+    divisor = reduce(gcd, sizes[active].tolist())
+    scaled_sizes = sizes // divisor
+    scaled_capacity = int(capacity // divisor)
+
+    num_rows = scaled_capacity + 1
+    # best[c, r]: 容量不超过 c 时第 r 好的价值；初始只有空模式
+    best = np.full((num_rows, k), -np.inf)
+    best[:, 0] = 0.0
+    base_rank = np.broadcast_to(np.arange(k, dtype=np.int64), (num_rows, k))
+
+    # 每层的回溯信息 (物品, 每次取用的个数, 编码的基数, 是否无界, 编码数组)
+    layers = []
+    for i in active:
+        w = int(scaled_sizes[i])
+        copies = int(max_copies[i])
+        if copies >= scaled_capacity // w:
+            best, codes = unbounded_layer(best, base_rank, w, values[i])
+            layers.append((i, 1, 2, True, codes))
+        elif k == 1:
+            # 二进制拆分：1, 2, 4, ... 个为一组，最后一组为余数
+            chunk = 1
+            while copies > 0:
+                chunk = min(chunk, copies)
+                best, codes = bounded_layer(best, base_rank, chunk * w, chunk * values[i], 1)
+                layers.append((i, chunk, 2, False, codes))
+                copies -= chunk
+                chunk *= 2
+        else:
+            best, codes = bounded_layer(best, base_rank, w, values[i], copies)
+            layers.append((i, 1, copies + 1, False, codes))
+
+    patterns = []
+    pattern_values = []
+    for r in range(k):
+        if not np.isfinite(best[scaled_capacity, r]):
+            break
+        pattern = np.zeros(num_items, dtype=np.int32)
+        c = scaled_capacity
+        rank = r
+        for i, chunk, radix, unbounded, codes in reversed(layers):
+            w = chunk * int(scaled_sizes[i])
+            while True:
+                rank, t = divmod(int(codes[c, rank]), radix)
+                pattern[i] += t * chunk
+                c -= t * w
+                # 无界物品取用时名次指同层 c - w 处，继续在同层回溯
+                if not unbounded or t == 0:
+                    break
+        patterns.append(pattern)
+        pattern_values.append(best[scaled_capacity, r])
+
+    return np.array(patterns, dtype=np.int32), np.array(pattern_values)
+
+
+def price_patterns_dp(data, shadow_price, k=1, upper_bounds=None):
+    """
+    用 DP 求解定价子问题，返回 reduced cost 最小的 k 个模式 [(pattern, reduced_cost), ...]。
+
+    Parameters:
+        data (Data): 算例数据。
+        shadow_price: 需求约束的对偶值。
+        k (int): 返回的模式数量。
+        upper_bounds: 每种物品的数量上限，None 表示无界背包。
+    """
+    patterns, pattern_values = solve_knapsack_dp(data.Customer_demand_sizes, data.Width, shadow_price, k,
+                                                 upper_bounds)
+
+    return [(patterns[r], 1 - pattern_values[r]) for r in range(len(patterns))]
+
+
+if __name__ == '__main__':
+    # 与整数规划的结果对照：宽度 115 的算例
+    demand_sizes = [40, 55, 40, 70, 50, 70, 70, 30, 25, 30]
+    price = [0.33, 0.5, 0.33, 0.5, 0.5, 0.5, 0.5, 0.25, 0.2, 0.25]
+    best_patterns, best_values = solve_knapsack_dp(demand_sizes, 115, price, k=5)
+    for p, v in zip(best_patterns, best_values):
+        print(p, v)
@@ -1,7 +1,31 @@
+"""
+日志配置。默认使用异步日志：求解线程只把日志记录放进队列，由后台线程格式化并写到控制台和文件。
+
+    - 日志参数中的 NumPy 数组在入队时复制一份（只复制内存，不转成字符串），由后台线程格式化，
+      且和 logging 一样只有在级别开启时才会被格式化；
+    - structured=True 时文件日志为每行一个 JSON 事件，可通过 extra={"event": 名称, "data": {...}} 附加结构化字段；
+    - rate_limit 为秒数时开启限流模式：带 extra=RATE_LIMITED 的逐次迭代日志在每个调用位置每 rate_limit 秒
+      至多输出一条，并注明其间被略去的条数。WARNING 及以上级别不限流。
+"""
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
 from colorlog import ColoredFormatter
 from datetime import datetime
 
+from algorithm_parameters import LOG_RATE_LIMIT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 逐次迭代的日志传入 extra=RATE_LIMITED，限流模式下按调用位置限流
+RATE_LIMITED = {"rate_limited": True}
+
 
 class CustomFileHandler(logging.FileHandler):
     def __init__(self, filename, mode='w', encoding=None, delay=False):
@@ -20,14 +44,75 @@ class CustomFormatter(logging.Formatter):
         return s
 
 
+class JsonFormatter(CustomFormatter):
+    """每条日志输出为一行 JSON。"""
+    def format(self, record):
+        event = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "file": record.filename,
+            "line": record.lineno,
+            "message": record.getMessage(),
+        }
+        if hasattr(record, "event"):
+            event["event"] = record.event
+        if hasattr(record, "data"):
+            event["data"] = record.data
+        if record.exc_info:
+            event["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class SnapshotQueueHandler(logging.handlers.QueueHandler):
+    """
+    入队时不格式化消息（QueueHandler 默认会在调用线程格式化），只复制可变的数组参数，
+    保证后台线程格式化时看到的是记录日志时的值。
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        if np is not None and isinstance(record.args, tuple):
+            record.args = tuple(arg.copy() if isinstance(arg, np.ndarray) else arg for arg in record.args)
+
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """带 rate_limited 标记的日志在每个调用位置每 interval 秒至多通过一条。"""
+    def __init__(self, interval):
+        super().__init__()
+        self.interval = interval
+        # (文件, 行号) --> [上次通过的时间, 其后被略去的条数]
+        self.sites = {}
+
+    def filter(self, record):
+        if not getattr(record, "rate_limited", False) or record.levelno >= logging.WARNING:
+            return True
+
+        site = self.sites.setdefault((record.pathname, record.lineno), [float("-inf"), 0])
+        if record.created - site[0] < self.interval:
+            site[1] += 1
+            return False
+
+        if site[1] > 0:
+            record.msg = f"{record.msg} (suppressed {site[1]} similar messages)"
+        site[0], site[1] = record.created, 0
+
+        return True
+
+
 class LoggerFactory:
     @staticmethod
-    def get_colored_logger(log_name: str = "app.log") -> logging.Logger:
+    def get_colored_logger(log_name: str = "app.log", asynchronous: bool = True, structured: bool = False,
+                           rate_limit: float = None) -> logging.Logger:
         """
         返回一个配置好的、带颜色的logger对象，其名称设置为调用该方法的模块名，并且在日志消息中包含行号。
 
         Parameters:
             log_name (str): 日志文件的名称。
+            asynchronous (bool): 是否由后台线程格式化并写出日志。
+            structured (bool): 文件日志是否为每行一个 JSON 事件。
+            rate_limit (float): 限流模式下同一调用位置两条逐次迭代日志的最小间隔（秒），None 表示不限流。
         """
         # 直接使用__name__作为logger的名称
         name = __name__
@@ -69,19 +154,33 @@ class LoggerFactory:
                 "%(asctime)s - %(filename)s:%(lineno)d - %(levelname)s - %(message)s",
                 datefmt="%Y-%m-%d %H:%M:%S,%f"
             )
+            if structured:
+                file_formatter = JsonFormatter()
 
             # ch.setFormatter(file_formatter)
             fh.setFormatter(file_formatter)
 
+            if asynchronous:
+                # 求解线程只负责入队，由后台线程格式化并写出；程序退出时写完队列中剩余的日志
+                log_queue = queue.SimpleQueue()
+                handlers = [SnapshotQueueHandler(log_queue)]
+                listener = logging.handlers.QueueListener(log_queue, ch, fh, respect_handler_level=True)
+                listener.start()
+                atexit.register(listener.stop)
+            else:
+                handlers = [ch, fh]
+
             # 给logger添加handler
-            logger.addHandler(ch)
-            logger.addHandler(fh)
+            for handler in handlers:
+                if rate_limit is not None:
+                    handler.addFilter(RateLimitFilter(rate_limit))
+                logger.addHandler(handler)
 
         return logger
 
 
-# 创建一个全局logger
-logger = LoggerFactory.get_colored_logger("branch_and_price.log")
+# 创建一个全局logger，逐次迭代日志按 algorithm_parameters.LOG_RATE_LIMIT 限流
+logger = LoggerFactory.get_colored_logger("branch_and_price.log", rate_limit=LOG_RATE_LIMIT)
 
 if __name__ == '__main__':
     # 使用示例
@@ -2,174 +2,389 @@
 author: Jiang Dapei
 """
 
+import argparse
+
 import numpy as np
 from read_data import *
 from solution import *
 from branching import *
-import heapq
+from column_pool import column_pool
+from stabilization import stabilization_statistics
 import time
 
-from logger_config import logger
-from rounding import perform_simple_rounding, perform_diving_heuristic
+from logger_config import logger, RATE_LIMITED
+from rounding import perform_simple_rounding, perform_diving_heuristic, diving_rmp
+from node_selection import NodeSelector
+from pseudo_costs import pseudo_costs
+from branching_rules import select_branching_variable, select_branching_arc, branching_statistics, report_branching
+from arc_flow import arc_flows, most_fractional_arc, decompose_arc_flow
+from pricing_cache import pricing_cache, diving_pricing_cache
+from pricing_hierarchy import pricing_hierarchy
+from metrics import metrics
+from model_dump import model_archiver
+from checkpoint import Checkpointer, load_checkpoint, build_node_model
+from termination import TerminationManager, BnPResult, SolveInterrupted
+from column_aging import column_aging
+from initial_heuristics import run_initial_heuristics
+from preprocessing import InstancePreprocessor
+from parallel import NodePool, is_integral
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Branch and price for the cutting stock problem")
+    parser.add_argument("--resume", nargs="?", const=CHECKPOINT_PATH, default=None, metavar="CHECKPOINT",
+                        help=f"resume from a checkpoint (default {CHECKPOINT_PATH})")
+    parser.add_argument("--data", default="../branch and price/data.txt", help="instance file")
+    args = parser.parse_args()
+
+    metrics.instrument_logger(logger)
     logger.info("Starting Branch and Price Algorithm!")
     # 读取数据
-    input_data = "../branch and price/data.txt"
+    input_data = args.data
     data = Data()
     data.read_data(input_data)
     data.print_data()
 
+    # 化简算例，求解器只看到化简后的算例，最后把解还原到原始物品上
+    preprocessor = None
+    if PREPROCESSING_OPT == 1:
+        preprocessor = InstancePreprocessor(data)
+        data = preprocessor.reduced
+        data.print_data()
+
     t1 = time.time()
-    bb_tree = []
-    solution = Solution()
-
-    # RMP is a linear programming
-    rmp_model = grbpy.Model("Restricted Master Problem")
-
-    pattern = np.zeros((data.Customer_numbers, data.Customer_numbers), dtype=np.int32)
-    for i in range(data.Customer_numbers):
-        pattern[i][i] = np.floor(data.Width / data.Customer_demand_sizes[i])
-        # logger.info("pattern({},{}) = {}".format(i, i, pattern[i][i]))
-
-    logger.info("initial pattern =\n%s", pattern)
-
-    y = rmp_model.addVars(data.Customer_numbers, lb=0.0, ub=GRB.INFINITY, obj=1.0, vtype=GRB.CONTINUOUS, name="y")
-
-    rmp_model.addConstrs(
-        (grbpy.quicksum(pattern[i][j] * y[j] for j in range(data.Customer_numbers)) >= data.Customer_demands[i]
-         for i in range(data.Customer_numbers)),
-        name='demand_satisfaction')
-
-    rmp_model.setParam(GRB.Param.OutputFlag, 1)
-    rmp_model.setAttr(GRB.Attr.ModelSense, GRB.MINIMIZE)
-    rmp_model.write("master problem root node.lp")
-
-    logger.info("finished root node model build!")
-
-    # root node
-    temp_node = Node()
-    temp_node.model = rmp_model
-    temp_node.pattern = pattern
-    heapq.heappush(bb_tree, temp_node)
-
-    # solve root node
-    bb_tree[0].model, bb_tree[0].pattern = solve_CSP_with_CG(data, bb_tree[0].model, bb_tree[0].model.getVars(), bb_tree[0].pattern, bb_tree[0].branching_indices)
-    bb_tree[0].obj_value = bb_tree[0].model.ObjVal
-    bb_tree[0].pattern_quantity = np.zeros(len(bb_tree[0].model.getVars()))
-    for j in range(len(bb_tree[0].pattern_quantity)):
-        bb_tree[0].pattern_quantity[j] = bb_tree[0].model.getVars()[j].x
-
-    logger.info("finished root node solve!")
-    logger.info("bb_tree[0] node obj_value = %s", bb_tree[0].model.ObjVal)
-    logger.info("bb_tree[0].pattern =\n%s", bb_tree[0].pattern)
-    logger.info("bb_tree[0].pattern_quantity =\n%s", bb_tree[0].pattern_quantity)
-
-    num_iterations = 1
-    while True:
-        logger.info("iterations = %s, obj of relaxation = %s", num_iterations, bb_tree[0].obj_value)
-        for j in range(len(bb_tree[0].pattern_quantity)):
-            logger.info("pattern %s: %s with quantity %s", j, bb_tree[0].pattern.T[j], bb_tree[0].pattern_quantity[j])
-
-        if bb_tree[0].obj_value > solution.ub:
-            # cut off by bound
-            logger.info("cut off by bound")
-            heapq.heappop(bb_tree)
-            continue
-
-        # check integrity
-        LP_opt_int = False
-        fraction = np.abs(np.round(bb_tree[0].pattern_quantity) - bb_tree[0].pattern_quantity)
-        # case of integral solution
-        if fraction.sum() <= TOL:
-            logger.info("find an integral solution!")
-            LP_opt_int = True
-            # update ub and incumbent
-            if bb_tree[0].obj_value < solution.ub:
-                solution.ub = bb_tree[0].obj_value
-                solution.pattern = bb_tree[0].pattern
-                solution.total_consumption = bb_tree[0].obj_value
-                solution.incumbent = bb_tree[0].pattern_quantity
-                logger.info("solution incumbent = %s", solution.incumbent)
-
-        # case of fractional solution
-        else:
-            # perform rounding heuristic (store in solution.incumbent)
-            if ROUNDING_OPT == 0:
-                logger.info("perform simple rounding!")
-                rounded_sol = perform_simple_rounding(bb_tree[0].pattern_quantity)
-                if np.sum(rounded_sol) < solution.ub:
-                    solution.ub = np.sum(rounded_sol)
-                    solution.pattern = bb_tree[0].pattern
-                    solution.total_consumption = np.sum(rounded_sol)
-                    solution.incumbent = rounded_sol
-
-            # perform diving heuristics
-            elif ROUNDING_OPT == 1:
-                logger.info("perform diving heuristic!")
-                rounded_sol, pattern_r = perform_diving_heuristic(bb_tree[0].pattern_quantity, data, bb_tree[0].pattern)
-                if np.sum(rounded_sol) < solution.ub:
-                    solution.ub = np.sum(rounded_sol)
-                    solution.pattern = pattern_r
-                    solution.total_consumption = np.sum(rounded_sol)
-                    solution.incumbent = rounded_sol
-
-            # identify the element to branch
-            fractional_index = [k for k in range(len(fraction)) if fraction[k] > TOL]
-            k = fractional_index[np.argmax(fraction[fractional_index])]
-            # take the first node as parent node
-            parent_node = heapq.heappop(bb_tree)
-            # add left branch
-            temp_node = add_left_branch(data, parent_node, k)
-            if temp_node.model.Status != GRB.INFEASIBLE:  # feasible solution
-                temp_node.obj_value = temp_node.model.ObjVal
-                temp_node.pattern_quantity = np.zeros(len(temp_node.model.getVars()))
-                for j in range(len(temp_node.pattern_quantity)):
-                    temp_node.pattern_quantity[j] = temp_node.model.getVars()[j].X
-                heapq.heappush(bb_tree, temp_node)
-
-            # add right branch
-            temp_node = add_right_branch(data, parent_node, k)
-            if temp_node.model.Status != GRB.INFEASIBLE:  # feasible solution
-                temp_node.obj_value = temp_node.model.ObjVal
-                temp_node.pattern_quantity = np.zeros(len(temp_node.model.getVars()))
-                for j in range(len(temp_node.pattern_quantity)):
-                    temp_node.pattern_quantity[j] = temp_node.model.getVars()[j].X
-                heapq.heappush(bb_tree, temp_node)
-
-        # update LB
-        if bb_tree[0].obj_value > solution.lb:
-            solution.lb = bb_tree[0].obj_value
-            # update integral LB
-            if np.abs(np.round(solution.lb) - solution.lb) <= TOL and np.round(solution.lb) > solution.int_lb:
-                solution.int_lb = np.round(solution.lb)
-            elif np.abs(np.round(solution.lb) - solution.lb) > TOL and np.ceil(solution.lb) > solution.int_lb:
-                solution.int_lb = np.ceil(solution.lb)
-
-        if LP_opt_int:
-            heapq.heappop(bb_tree)  # cutoff by optimality
-
-        # info of current iteration
-        # solution.gap = (solution.ub - solution.lb) / solution.lb
-        solution.gap = (solution.ub - solution.int_lb) / solution.int_lb
-
-        if num_iterations % 1 == 0:
-            logger.info(f"iterations:{num_iterations:^10} current lb:{np.round(solution.lb, 4):^10} current int lb:{solution.int_lb:^10} current ub:{solution.ub:^10} gap:{np.round(solution.gap * 100, 4):>10}%")
-
-        # termination criteria
-        if solution.gap <= GAP_TOL or len(bb_tree) == 0:
-            break
-
-        num_iterations += 1
+    checkpointer = Checkpointer() if CHECKPOINT_OPT == 1 else None
+    # 每次迭代结束时的 (迭代次数, 运行时间, lb, int lb, ub)
+    bound_history = []
+
+    if args.resume is not None:
+        bb_tree, solution, rmp, bound_history, num_iterations, elapsed = load_checkpoint(args.resume, data)
+        t1 -= elapsed
+    else:
+        bb_tree = NodeSelector()
+        solution = Solution()
+
+        # initial homogeneous patterns floor(Width / size_i), added to the column pool one by one
+        column_indices = []
+        for i in range(data.Customer_numbers):
+            pattern = np.zeros(data.Customer_numbers, dtype=np.int32)
+            pattern[i] = np.floor(data.Width / data.Customer_demand_sizes[i])
+            column_indices.append(column_pool.add(pattern)[0])
+
+        # FFD, BFD and greedy heuristics: more initial columns and an initial incumbent before the root LP
+        if INITIAL_HEURISTIC_OPT == 1:
+            with metrics.timer("initial_heuristics"):
+                heuristic_columns, (heuristic_name, heuristic_pattern, heuristic_counts) = run_initial_heuristics(data)
+            for j in range(heuristic_columns.shape[1]):
+                column_index, is_new = column_pool.add(heuristic_columns[:, j])
+                if is_new:
+                    column_indices.append(column_index)
+            solution.ub = float(heuristic_counts.sum())
+            solution.total_consumption = solution.ub
+            solution.pattern = heuristic_pattern
+            solution.incumbent = heuristic_counts.astype(float)
+            logger.info("initial incumbent from %s: %s rolls", heuristic_name, solution.ub)
+
+        logger.info("initial pattern =\n%s", column_pool.to_matrix(column_indices))
+
+        # RMP is a linear programming, built from the nonzeros of the patterns
+        rmp_model = build_rmp(data, column_indices)
+        model_archiver.dump(rmp_model, "master problem root node.lp", "root", root=True)
+
+        logger.info("finished root node model build!")
+
+        # root node
+        temp_node = Node()
+        temp_node.model = rmp_model
+        temp_node.column_indices = column_indices
+        bb_tree.push(temp_node)
+
+        # solve root node; without a root LP there is nothing to branch on or to checkpoint
+        try:
+            bb_tree[0].model, bb_tree[0].column_indices, bb_tree[0].lower_bound = solve_CSP_with_CG(data, bb_tree[0].model, bb_tree[0].model.getVars(), bb_tree[0].column_indices, bb_tree[0].branching_indices)
+            bb_tree[0].obj_value = bb_tree[0].model.ObjVal
+            bb_tree.num_nodes = 1
+            bb_tree[0].pattern_quantity = np.zeros(len(bb_tree[0].model.getVars()))
+            for j in range(len(bb_tree[0].pattern_quantity)):
+                bb_tree[0].pattern_quantity[j] = bb_tree[0].model.getVars()[j].x
+
+            # rank-1 cuts at the root before the RMP is shared by the branching nodes
+            if CUTS_OPT == 1 and BRANCHING_SCHEME_OPT == 0:
+                with metrics.timer("root_cuts"):
+                    add_root_cuts(data, bb_tree[0])
+        except SolveInterrupted:
+            logger.warning("interrupted while solving the root node, best incumbent: %s rolls", solution.ub)
+            raise SystemExit(130)
+
+        # 节点切换模式：所有节点共用根节点的 RMP
+        rmp = None
+        if NODE_SWITCHING_OPT == 1:
+            rmp = PersistentRMP(bb_tree[0].model, bb_tree[0].column_indices)
+            rmp.active_node = bb_tree[0]
+            rmp.save_basis(bb_tree[0])
+
+        logger.info("finished root node solve!")
+        logger.info("bb_tree[0] node obj_value = %s", bb_tree[0].model.ObjVal)
+        logger.info("bb_tree[0].pattern =\n%s", column_pool.to_matrix(bb_tree[0].column_indices))
+        logger.info("bb_tree[0].pattern_quantity =\n%s", bb_tree[0].pattern_quantity)
+
+        num_iterations = 1
+
+    node_pool = NodePool(data) if PARALLEL_OPT == 1 else None
+
+    termination = TerminationManager()
+    termination.start_time = t1
+    termination.install_signal_handlers()
+    # 当前迭代中已从搜索树取出、子节点还没有放回的父节点（并行时为一批父节点）；求解被中断时放回搜索树
+    parent_node = None
+    batch = []
+    try:
+        while True:
+            logger.info("iterations = %s, obj of relaxation = %s", num_iterations, bb_tree[0].obj_value)
+            for j in range(len(bb_tree[0].pattern_quantity)):
+                logger.info("pattern %s: %s with quantity %s", j, column_pool.get(bb_tree[0].column_indices[j]), bb_tree[0].pattern_quantity[j], extra=RATE_LIMITED)
+
+            # 本次迭代开始时的上界，用于判断搜索中是否改进了上界
+            iteration_ub = solution.ub
+            integral_child = False
+
+            if bb_tree[0].obj_value > solution.ub:
+                # cut off by bound
+                logger.info("cut off by bound")
+                bb_tree.pop()
+                # 连续剪掉很多节点时同样检查时间、内存等限制
+                reason = termination.check(solution, len(bb_tree), num_iterations, bb_tree.num_nodes)
+                if reason is not None:
+                    break
+                continue
+
+            # 节点模型中各列的切割模式；节点切换模式下 column_indices 为所有节点共享的列表，只取节点求解时已有的列
+            # （列下标恰好是列池的前若干列时为视图，不复制）
+            node_pattern = column_pool.to_matrix(bb_tree[0].column_indices[:len(bb_tree[0].pattern_quantity)])
+
+            # check integrity
+            LP_opt_int = False
+            fraction = np.abs(np.round(bb_tree[0].pattern_quantity) - bb_tree[0].pattern_quantity)
+            # 弧流分支时计算节点 LP 解的弧流量
+            flows = None
+            if BRANCHING_SCHEME_OPT == 1 and fraction.sum() > TOL:
+                flows = arc_flows(node_pattern, bb_tree[0].pattern_quantity, data.Customer_demand_sizes)
+            # case of integral solution
+            if fraction.sum() <= TOL:
+                logger.info("find an integral solution!")
+                LP_opt_int = True
+                # update ub and incumbent
+                if bb_tree[0].obj_value < solution.ub:
+                    solution.ub = bb_tree[0].obj_value
+                    solution.pattern = node_pattern
+                    solution.total_consumption = bb_tree[0].obj_value
+                    solution.incumbent = bb_tree[0].pattern_quantity
+                    logger.info("solution incumbent = %s", solution.incumbent)
 
+            # case of integral arc flows: decompose them into an integral solution with the same objective value
+            elif flows is not None and most_fractional_arc(flows) is None:
+                logger.info("find integral arc flows!")
+                LP_opt_int = True
+                if bb_tree[0].obj_value < solution.ub:
+                    solution.pattern, solution.incumbent = decompose_arc_flow(flows, data.Customer_demand_sizes, data.Customer_numbers)
+                    solution.ub = np.sum(solution.incumbent)
+                    solution.total_consumption = solution.ub
+                    logger.info("solution incumbent = %s", solution.incumbent)
+
+            # case of fractional solution
+            else:
+                # perform rounding heuristic (store in solution.incumbent)
+                if ROUNDING_OPT == 0:
+                    logger.info("perform simple rounding!")
+                    rounded_sol = perform_simple_rounding(bb_tree[0].pattern_quantity)
+                    if np.sum(rounded_sol) < solution.ub:
+                        solution.ub = np.sum(rounded_sol)
+                        solution.pattern = node_pattern
+                        solution.total_consumption = np.sum(rounded_sol)
+                        solution.incumbent = rounded_sol
+
+                # perform diving heuristics
+                elif ROUNDING_OPT == 1:
+                    logger.info("perform diving heuristic!")
+                    with metrics.timer("diving"):
+                        rounded_sol, pattern_r = perform_diving_heuristic(bb_tree[0].pattern_quantity, data, node_pattern)
+                    if np.sum(rounded_sol) < solution.ub:
+                        solution.ub = np.sum(rounded_sol)
+                        solution.pattern = pattern_r
+                        solution.total_consumption = np.sum(rounded_sol)
+                        solution.incumbent = rounded_sol
+
+                # identify the element to branch and take the first node as parent node
+                if BRANCHING_SCHEME_OPT == 1:
+                    with metrics.timer("branching"):
+                        arc = select_branching_arc(bb_tree[0], flows)
+                    parent_node = bb_tree.pop()
+                    # pseudo costs of arcs are keyed by the arc itself
+                    branching_key, branching_value = arc, flows[arc]
+                    children = [("left", lambda: add_arc_branch(data, parent_node, arc, '<=', np.floor(flows[arc]), rmp, solution.ub)),
+                                ("right", lambda: add_arc_branch(data, parent_node, arc, '>=', np.ceil(flows[arc]), rmp, solution.ub))]
+                    decisions = [("left", ("arc", arc, '<=', np.floor(flows[arc]))),
+                                 ("right", ("arc", arc, '>=', np.ceil(flows[arc])))]
+                else:
+                    if node_pool is not None and bb_tree[0].model is None:
+                        # 并行模式下节点不持有模型，strong branching 前在主进程中重建
+                        bb_tree[0].model = build_node_model(data, bb_tree[0])
+                    with metrics.timer("branching"):
+                        k = select_branching_variable(bb_tree[0], rmp)
+                    parent_node = bb_tree.pop()
+                    # pseudo costs of patterns are keyed by column pool index
+                    branching_key, branching_value = parent_node.column_indices[k], parent_node.pattern_quantity[k]
+                    children = [("left", lambda: add_left_branch(data, parent_node, k, rmp, solution.ub)),
+                                ("right", lambda: add_right_branch(data, parent_node, k, rmp, solution.ub))]
+                    decisions = [("left", ("variable", k, '<=', np.floor(parent_node.pattern_quantity[k]))),
+                                 ("right", ("variable", k, '>=', np.ceil(parent_node.pattern_quantity[k])))]
+
+                # solve the two children one after the other, or in the process pool together with the children
+                # of further open nodes
+                if node_pool is not None:
+                    batch = [(parent_node, decisions, branching_key, branching_value)]
+                    parent_node = None
+                    with metrics.timer("branching"):
+                        node_pool.take_open_nodes(data, bb_tree, solution.ub, batch)
+                    with metrics.timer("parallel_children"):
+                        batch_children = node_pool.solve_batch(data, batch, solution.ub)
+
+                    # 工作进程中 LP 解为整数的子节点直接记录为整数解，工作进程已经按它的目标值剪枝
+                    for child_nodes in batch_children:
+                        for side, temp_node in child_nodes:
+                            if len(temp_node.pattern_quantity) > 0 and is_integral(temp_node.pattern_quantity) and \
+                                    temp_node.obj_value < solution.ub:
+                                solution.ub = temp_node.obj_value
+                                solution.pattern = column_pool.to_matrix(temp_node.column_indices[:len(temp_node.pattern_quantity)])
+                                solution.total_consumption = temp_node.obj_value
+                                solution.incumbent = temp_node.pattern_quantity
+                                integral_child = True
+                                logger.info("integral %s child, solution incumbent = %s", side, solution.incumbent)
+                else:
+                    child_nodes = []
+                    for side, add_branch in children:
+                        temp_node = add_branch()
+                        # 节点切换模式下左右子节点共用同一个模型，必须在求解下一个子节点之前读取解
+                        read_child_solution(temp_node, solution.ub)
+                        child_nodes.append((side, temp_node))
+                    batch = [(parent_node, decisions, branching_key, branching_value)]
+                    batch_children = [child_nodes]
+                    parent_node = None
+
+                for (batch_parent, _, batch_key, batch_value), child_nodes in zip(batch, batch_children):
+                    child_obj = {"left": None, "right": None}
+                    for side, temp_node in child_nodes:
+                        if np.ceil(temp_node.lower_bound - TOL) >= solution.ub:
+                            logger.info("%s child cut off by Lagrangian bound or infeasibility %s", side, temp_node.lower_bound)
+                        else:
+                            child_obj[side] = temp_node.obj_value
+                            bb_tree.push(temp_node)
+
+                    branching_statistics["nodes"] += 2
+                    bb_tree.num_nodes += len(child_nodes)
+
+                    # update pseudo costs of the branched pattern or arc
+                    pseudo_costs.update(batch_key, batch_value - np.floor(batch_value),
+                                        batch_parent.obj_value, child_obj["left"], child_obj["right"])
+                batch = []
+
+            # update LB
+            if len(bb_tree) > 0 and bb_tree.best_bound() > solution.lb:
+                solution.lb = bb_tree.best_bound()
+                # update integral LB
+                if np.abs(np.round(solution.lb) - solution.lb) <= TOL and np.round(solution.lb) > solution.int_lb:
+                    solution.int_lb = np.round(solution.lb)
+                elif np.abs(np.round(solution.lb) - solution.lb) > TOL and np.ceil(solution.lb) > solution.int_lb:
+                    solution.int_lb = np.ceil(solution.lb)
+
+            if LP_opt_int and len(bb_tree) > 0:
+                bb_tree.pop()  # cutoff by optimality
+
+            # 搜索树本身找到整数解时 hybrid 改为 best-first；必须在整数节点出栈之后，切换会重排打开节点
+            if LP_opt_int or integral_child or (num_iterations > 1 and solution.ub < iteration_ub):
+                bb_tree.record_incumbent()
+
+            # info of current iteration
+            # solution.gap = (solution.ub - solution.lb) / solution.lb
+            solution.gap = (solution.ub - solution.int_lb) / solution.int_lb
+
+            if num_iterations % 1 == 0:
+                logger.info(f"iterations:{num_iterations:^10} current lb:{np.round(solution.lb, 4):^10} current int lb:{solution.int_lb:^10} current ub:{solution.ub:^10} gap:{np.round(solution.gap * 100, 4):>10}%")
+
+            bound_history.append((num_iterations, time.time() - t1, solution.lb, solution.int_lb, solution.ub))
+
+            # termination criteria
+            reason = termination.check(solution, len(bb_tree), num_iterations, bb_tree.num_nodes)
+            if reason is not None:
+                break
+
+            num_iterations += 1
+
+            if checkpointer is not None and checkpointer.due():
+                checkpointer.save(data, bb_tree, solution, rmp, bound_history, num_iterations, time.time() - t1)
+    except SolveInterrupted as error:
+        # Gurobi 在求解中收到 SIGINT 时自己处理信号，Python 的信号处理函数不一定被调用
+        termination.interrupted = True
+        reason = "interrupted"
+        logger.warning("solve of %s interrupted, stopping", error)
+        if parent_node is not None:
+            bb_tree.push(parent_node)
+        for batch_parent, _, _, _ in batch:
+            bb_tree.push(batch_parent)
+
+    termination.restore_signal_handlers()
     t2 = time.time()
+    # 搜索树为空时当前最好整数解即为最优解，下界等于上界（按界剪掉最后的节点时没有更新下界）
+    if reason == "optimal" and solution.incumbent is not None:
+        solution.lb = solution.int_lb = solution.ub
+        solution.gap = 0
+        bound_history.append((num_iterations, t2 - t1, solution.lb, solution.int_lb, solution.ub))
+    result = BnPResult(solution, reason, num_iterations, t2 - t1)
+    if preprocessor is not None:
+        result.ub += preprocessor.fixed_rolls
+        result.lb += preprocessor.fixed_rolls
+        result.int_lb += preprocessor.fixed_rolls
+        if solution.incumbent is not None:
+            result.pattern, result.incumbent = preprocessor.restore_solution(solution.pattern, solution.incumbent)
+    # 因限制或中断提前结束时保存检查点，之后可以用 --resume 继续
+    if checkpointer is not None and not result.proven_optimal:
+        checkpointer.save(data, bb_tree, solution, rmp, bound_history, num_iterations, t2 - t1)
+
     # print incumbent solution
-    logger.info(f"branch and price terminates in {t2 - t1} sec ({num_iterations} iterations) with gap of {solution.gap * 100} %.")
+    logger.info(f"branch and price terminates in {t2 - t1} sec ({num_iterations} iterations) with gap of {solution.gap * 100} %, reason: {reason}.")
+    logger.info("result: %s", result)
     logger.info("===incumbent solution===")
-    logger.info("objective value: %s", solution.total_consumption)
-    for j in range(len(solution.incumbent)):
-        if solution.incumbent[j] > 0:
-            logger.info(f"pattern {j}:  {solution.pattern.T[j]} with quantity: {solution.incumbent[j]}")
+    if result.incumbent is None:
+        logger.info("no integral solution found")
+    else:
+        # patterns and quantities of the original items (including rolls fixed by preprocessing)
+        logger.info("objective value: %s", result.incumbent.sum())
+        for j in range(len(result.incumbent)):
+            if result.incumbent[j] > 0:
+                logger.info(f"pattern {j}:  {result.pattern.T[j]} with quantity: {result.incumbent[j]}")
+
+    bb_tree.report()
+    report_branching()
+    if ROUNDING_OPT == 1:
+        diving_rmp.report()
+    if PRICING_CACHE_OPT == 1:
+        logger.info("pricing cache: %s, hit rate %.3f", pricing_cache.statistics, pricing_cache.hit_rate())
+        logger.info("diving pricing cache: %s, hit rate %.3f", diving_pricing_cache.statistics, diving_pricing_cache.hit_rate())
+    if METRICS_OPT == 1:
+        metrics.report(logger)
+        metrics.export(METRICS_EXPORT_PATH)
+    logger.info("column generation stabilization statistics: %s", stabilization_statistics)
+    if PRICING_HIERARCHY_OPT == 1:
+        pricing_hierarchy.report(logger)
+    if COLUMN_AGING_OPT == 1:
+        column_aging.report()
+    if CUTS_OPT == 1:
+        cut_pool.report()
+    if node_pool is not None:
+        node_pool.close()
+        node_pool.report()
+    if MODEL_DUMP_OPT != 0:
+        model_archiver.close()
+        model_archiver.report()
 
     logger.info("End Branch and Price Algorithm!")
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+分支定价的计数器、分阶段计时器和直方图，替代原来 algorithm_parameters 中的 BaseSingletonCounter。
+
+    counter(name): 计数器，同时用于 .lp 文件的编号，始终开启；
+    timer(phase): 计时的 with 语句块，累计每个阶段的调用次数、墙钟时间和 CPU 时间；
+    observe(name, value): 直方图，记录每个取值出现的次数。
+
+计时器和直方图由 algorithm_parameters.METRICS_OPT 控制，关闭时 timer() 返回共享的空上下文，observe() 直接返回，
+开销只有一次属性判断。阶段是包含关系的（例如 pricing 中的日志也计入 logging），不能把各阶段时间相加。
+运行结束时 export() 按文件扩展名导出为 JSON 或 CSV。
+"""
+import csv
+import json
+import logging
+import time
+from collections import Counter as ValueCounter
+from contextlib import nullcontext
+
+from algorithm_parameters import METRICS_OPT
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def increment(self):
+        self.count += 1
+
+    def get_count(self):
+        return self.count
+
+
+class PhaseTimer:
+    __slots__ = ("statistics", "wall", "cpu")
+
+    def __init__(self, statistics):
+        # [调用次数, 墙钟时间, CPU 时间]
+        self.statistics = statistics
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.statistics[0] += 1
+        self.statistics[1] += time.perf_counter() - self.wall
+        self.statistics[2] += time.process_time() - self.cpu
+        return False
+
+
+# 关闭计时时所有 timer() 共用的空上下文
+NULL_TIMER = nullcontext()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled=METRICS_OPT == 1):
+        self.enabled = enabled
+        self.counters = {}
+        self.timers = {}
+        self.histograms = {}
+
+    def counter(self, name) -> Counter:
+        if name not in self.counters:
+            self.counters[name] = Counter()
+        return self.counters[name]
+
+    def timer(self, phase):
+        if not self.enabled:
+            return NULL_TIMER
+        if phase not in self.timers:
+            self.timers[phase] = [0, 0.0, 0.0]
+        return PhaseTimer(self.timers[phase])
+
+    def observe(self, name, value):
+        if not self.enabled:
+            return
+        if name not in self.histograms:
+            self.histograms[name] = ValueCounter()
+        self.histograms[name][value] += 1
+
+    def instrument_logger(self, logger):
+        """给 logger 的各个 handler 计时（格式化和写出都在 handler 中完成），计入 logging 阶段。"""
+        if not self.enabled:
+            return
+        for handler in logger.handlers:
+            handle = handler.handle
+
+            def timed_handle(record, handle=handle):
+                with self.timer("logging"):
+                    return handle(record)
+
+            handler.handle = timed_handle
+
+    def summary(self) -> dict:
+        histograms = {}
+        for name, values in self.histograms.items():
+            count = sum(values.values())
+            histograms[name] = {
+                "count": count,
+                "mean": sum(value * n for value, n in values.items()) / count,
+                "min": min(values),
+                "max": max(values),
+                "values": {str(value): n for value, n in sorted(values.items())},
+            }
+
+        return {
+            "counters": {name: counter.count for name, counter in self.counters.items()},
+            "timers": {phase: {"calls": calls, "wall": wall, "cpu": cpu}
+                       for phase, (calls, wall, cpu) in self.timers.items()},
+            "histograms": histograms,
+        }
+
+    def export(self, path):
+        """导出到 path，扩展名为 .csv 时每行为 (类别, 名称, 字段, 值)，否则为 JSON。"""
+        summary = self.summary()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["kind", "name", "field", "value"])
+                for name, count in summary["counters"].items():
+                    writer.writerow(["counter", name, "count", count])
+                for phase, fields in summary["timers"].items():
+                    for field, value in fields.items():
+                        writer.writerow(["timer", phase, field, value])
+                for name, fields in summary["histograms"].items():
+                    for field, value in fields.items():
+                        if field == "values":
+                            for bucket, n in value.items():
+                                writer.writerow(["histogram", name, bucket, n])
+                        else:
+                            writer.writerow(["histogram", name, field, value])
+        else:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+
+    def report(self, logger: logging.Logger):
+        for phase, (calls, wall, cpu) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            logger.info("phase %-16s %8s calls, wall %.3f sec, cpu %.3f sec", phase, calls, wall, cpu)
+        for name, fields in self.summary()["histograms"].items():
+            logger.info("histogram %s: count %s, mean %.2f, min %s, max %s",
+                        name, fields["count"], fields["mean"], fields["min"], fields["max"])
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+
+# 各求解阶段的计数器，同时用于 .lp 文件的编号
+sp_global_counter = metrics.counter("sub_problem")
+mp_global_counter = metrics.counter("master_problem")
+csp_global_counter = metrics.counter("rmp_solve")
+diving_global_counter = metrics.counter("diving_rmp_solve")
+diving_sp_global_counter = metrics.counter("diving_sub_problem")
@@ -0,0 +1,152 @@
+"""
+求解过程中 Gurobi 模型的抽样导出，替代原来每次求解都写一个 .lp 文件的做法。
+
+抽样方式由 algorithm_parameters.MODEL_DUMP_OPT 选择：
+    0: 不导出；
+    1: 每类模型（csp、sub_problem、diving_sp、分支等）每 MODEL_DUMP_EVERY 个导出一个；
+    2: 只导出求解失败（已求解且状态不是 OPTIMAL）的模型；
+    3: 只导出根节点的模型。
+
+Gurobi 环境不是线程安全的，因此求解线程只把模型复制到导出器自己的 Gurobi 环境中（只复制内存，不格式化也不写盘），
+写文件、压缩和归档都交给后台线程：后台线程把副本写到本地临时目录后释放副本，再把临时文件写入 MODEL_DUMP_PATH 的 zip 归档（名称前加全局序号，避免同名），写满 MODEL_DUMP_MAX_BYTES 的一半后
+把当前归档改名为 .1.zip（覆盖更早的一份）并开始新归档，因此归档总大小不超过 MODEL_DUMP_MAX_BYTES 左右。
+后台线程跟不上时（队列已满）直接丢弃本次导出，不复制模型，也不阻塞求解。
+"""
+import atexit
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import zipfile
+
+import gurobipy as grbpy
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from logger_config import logger, RATE_LIMITED
+
+# 未求解或求解成功的模型状态
+SOLVED_STATUS = (GRB.LOADED, GRB.OPTIMAL)
+
+
+class ModelArchiver:
+    def __init__(self, mode=MODEL_DUMP_OPT, every=MODEL_DUMP_EVERY, path=MODEL_DUMP_PATH,
+                 max_bytes=MODEL_DUMP_MAX_BYTES, queue_size=MODEL_DUMP_QUEUE_SIZE):
+        self.mode = mode
+        self.every = every
+        self.path = path
+        self.max_bytes = max_bytes
+        self.queue = queue.Queue(maxsize=queue_size)
+        # 每类模型请求导出的次数，用于按 every 抽样
+        self.requests = {}
+        self.sequence = 0
+        self.temp_dir = None
+        self.writer = None
+        # 模型副本所在的环境，只由后台线程写出和释放副本
+        self.env = None
+        self.archive = None
+        self.statistics = {"requested": 0, "dumped": 0, "dropped": 0, "archived": 0, "rolls": 0}
+        # 程序退出时写完队列中剩余的模型；close 可以重复调用，没有启动后台线程时什么也不做
+        atexit.register(self.close)
+
+    def sampled(self, kind, model, root):
+        if self.mode == 1:
+            count = self.requests.get(kind, 0)
+            self.requests[kind] = count + 1
+            return count % self.every == 0
+        if self.mode == 2:
+            return model.Status not in SOLVED_STATUS
+        if self.mode == 3:
+            return root
+
+        return False
+
+    def dump(self, model, name, kind, root=False):
+        """
+        按抽样方式导出模型，name 为归档中的文件名（扩展名决定 Gurobi 的写出格式），kind 为抽样时的模型类别。
+        """
+        self.statistics["requested"] += 1
+        if not self.sampled(kind, model, root):
+            return
+
+        if self.writer is None:
+            self.start()
+        # 只有求解线程入队，队列未满时 put_nowait 不会失败
+        if self.queue.full():
+            self.statistics["dropped"] += 1
+            return
+        self.sequence += 1
+        arcname = f"{self.sequence:06d}_{name}"
+        model.update()
+        self.queue.put_nowait((model.copy(self.env), arcname))
+
+        self.statistics["dumped"] += 1
+        logger.info("dump model %s, status %s", arcname, GUROBI_Status_Map.get(model.Status), extra=RATE_LIMITED)
+
+    def start(self):
+        self.temp_dir = tempfile.mkdtemp(prefix="model_dump_")
+        if self.env is None:
+            self.env = grbpy.Env(params={"OutputFlag": 0})
+        self.writer = threading.Thread(target=self.run, name="model-dump-writer", daemon=True)
+        self.writer.start()
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            model, arcname = item
+            temp_path = os.path.join(self.temp_dir, arcname)
+            try:
+                model.write(temp_path)
+                self.archive_file(temp_path, arcname)
+            except (OSError, grbpy.GurobiError) as error:
+                logger.warning("failed to archive model %s: %s", arcname, error)
+            finally:
+                model.dispose()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def archive_file(self, temp_path, arcname):
+        if self.archive is None:
+            self.archive = zipfile.ZipFile(self.path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.archive.write(temp_path, arcname)
+        self.statistics["archived"] += 1
+
+        if self.archive.fp.tell() >= self.max_bytes // 2:
+            self.archive.close()
+            self.archive = None
+            os.replace(self.path, rolled_path(self.path))
+            self.statistics["rolls"] += 1
+
+    def close(self):
+        """等待后台线程写完队列中的模型并关闭归档，可以重复调用。"""
+        if self.writer is None:
+            return
+
+        self.queue.put(None)
+        self.writer.join()
+        self.writer = None
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.env.dispose()
+        self.env = None
+
+    def report(self):
+        logger.info("model dumps: %s requested, %s dumped, %s dropped, %s archived to %s, %s rolls",
+                    self.statistics["requested"], self.statistics["dumped"], self.statistics["dropped"],
+                    self.statistics["archived"], self.path, self.statistics["rolls"])
+
+
+def rolled_path(path):
+    root, ext = os.path.splitext(path)
+
+    return f"{root}.1{ext}"
+
+
+# 全局模型导出器
+model_archiver = ModelArchiver()
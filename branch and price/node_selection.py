@@ -0,0 +1,128 @@
+"""
+分支定价树的节点选择策略，由 algorithm_parameters.NODE_SELECTION_OPT 选择：
+    0: depth-first，后进先出，打开的节点数随深度线性增长；
+    1: best-first，按节点 LP 目标值从小到大；
+    2: best-estimate，按伪成本估计的整数解目标值从小到大；
+    3: hybrid，先深度优先下潜直到搜索树找到第一个整数解，之后改为 best-first。
+
+NodeSelector 同时记录已求解的节点数、打开节点数、打开节点占用内存的峰值以及找到第一个整数解的时间。
+"""
+import heapq
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from algorithm_parameters import *
+from logger_config import logger
+from pseudo_costs import pseudo_costs, fractional_parts
+
+NODE_SELECTION_NAMES = {0: "depth-first", 1: "best-first", 2: "best-estimate", 3: "hybrid"}
+
+
+def node_memory(node):
+    """估计一个打开节点占用的内存（字节），不含 Gurobi 模型和共享的列池。"""
+    memory = sys.getsizeof(node)
+    memory += np.asarray(node.pattern_quantity).nbytes
+    memory += 8 * (len(node.branching_indices) + len(node.bound_changes))
+    # 节点切换模式下 column_indices 是所有节点共享的列表
+    if NODE_SWITCHING_OPT == 0:
+        memory += 8 * len(node.column_indices)
+    if node.vbasis is not None:
+        memory += 8 * (len(node.vbasis) + len(node.cbasis))
+
+    return memory
+
+
+class NodeSelector:
+    def __init__(self, policy=NODE_SELECTION_OPT):
+        self.policy = policy
+        # best-first / best-estimate 时为堆 [(key, 序号, node, 内存)]，depth-first 时为栈
+        self.nodes = []
+        self.counter = itertools.count()
+        self.diving = policy in (0, 3)
+
+        self.start_time = time.time()
+        self.first_incumbent_time = None
+        self.max_open_nodes = 0
+        self.memory = 0
+        self.max_memory = 0
+        self.num_selected = 0
+        # 已求解 LP 的节点数（根节点和所有子节点，包括被剪掉的），用于 NODE_LIMIT
+        self.num_nodes = 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, index):
+        # 与原来的 bb_tree[0] 用法兼容：下标 0 表示下一个要处理的节点
+        if index != 0:
+            raise IndexError("only the selected node bb_tree[0] can be accessed")
+        return self.peek()
+
+    def key(self, node):
+        if self.policy == 2:
+            index, fraction = fractional_parts(node.pattern_quantity)
+            keys = [node.column_indices[j] for j in index]
+            return pseudo_costs.estimate(node.obj_value, keys, fraction)
+        return node.obj_value
+
+    def push(self, node):
+        memory = node_memory(node)
+        if self.diving:
+            self.nodes.append((0, next(self.counter), node, memory))
+        else:
+            heapq.heappush(self.nodes, (self.key(node), next(self.counter), node, memory))
+
+        self.memory += memory
+        self.max_open_nodes = max(self.max_open_nodes, len(self.nodes))
+        self.max_memory = max(self.max_memory, self.memory)
+
+    def peek(self):
+        return self.nodes[-1][2] if self.diving else self.nodes[0][2]
+
+    def pop(self):
+        self.num_selected += 1
+        if self.diving:
+            _, _, node, memory = self.nodes.pop()
+        else:
+            _, _, node, memory = heapq.heappop(self.nodes)
+        self.memory -= memory
+
+        return node
+
+    def open_nodes(self):
+        """按加入的顺序返回所有打开节点，用于保存检查点。"""
+        return [node for _, _, node, _ in sorted(self.nodes, key=lambda entry: entry[1])]
+
+    def best_bound(self):
+        """
+        所有打开节点中最小的节点下界，即全局下界。列生成提前结束时 RMP 目标值可能高于节点 LP 的最优值，
+        节点的有效下界是 lower_bound（拉格朗日下界或列生成正常结束时的 LP 最优值），因此取两者中较小的。
+        """
+        return min(min(entry[2].lower_bound, entry[2].obj_value) for entry in self.nodes)
+
+    def record_incumbent(self):
+        """
+        搜索树本身找到整数解（整数节点，或在根节点之后的节点上改进了上界）且当前节点已出栈后调用：
+        记录搜索找到第一个整数解的时间，hybrid 策略由下潜改为 best-first。
+        初始启发式和根节点舍入得到的上界不算，否则 hybrid 在第一次迭代就切换，永远不会下潜。
+        """
+        if self.first_incumbent_time is None:
+            self.first_incumbent_time = time.time() - self.start_time
+            logger.info("first incumbent found by the search after %.3f sec with %s open nodes",
+                        self.first_incumbent_time, len(self.nodes))
+
+        if self.policy == 3 and self.diving:
+            self.diving = False
+            self.policy = 1
+            self.nodes = [(self.key(node), count, node, memory) for _, count, node, memory in self.nodes]
+            heapq.heapify(self.nodes)
+            logger.info("hybrid node selection switched from diving to best-first")
+
+    def report(self):
+        logger.info("node selection %s: %s nodes selected, max open nodes %s, max open node memory %.1f KB, "
+                    "time to first incumbent %s sec",
+                    NODE_SELECTION_NAMES[NODE_SELECTION_OPT], self.num_selected, self.max_open_nodes,
+                    self.max_memory / 1024, self.first_incumbent_time)
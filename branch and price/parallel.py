@@ -0,0 +1,250 @@
+"""
+在进程池中并行求解分支定价树的节点，由 algorithm_parameters.PARALLEL_OPT 控制。
+
+每次迭代除了当前节点，再从搜索树中按节点选择的顺序取出至多 PARALLEL_BATCH_NODES - 1 个可以分支的节点
+（take_open_nodes），这些父节点的左右子节点一起提交到 PARALLEL_WORKERS 个工作进程中求解。额外取出的节点按与
+main.py 相同的规则选择分支，但不做舍入启发式；遇到 LP 解为整数的节点时停止取出，留给主循环记录整数解。
+
+Gurobi 模型不能跨进程传递，因此只把节点描述交给工作进程：父节点各列的模式、父节点的基、子节点的分支决策。
+工作进程用自己的 Gurobi 环境和自己的列池重建节点模型（与 checkpoint.build_node_model 相同），用父节点的基热启动
+后做列生成，返回节点 LP 的解、下界、基以及新生成的列的模式；主进程把这些列加入全局列池，得到子节点的 column_indices。
+主进程在每批任务中附带上一批以来全局列池中新增的列，工作进程加入自己的列池，定价时可以直接从列池中选入；
+工作进程是匿名的，错过某一批的进程缺少这些列，只影响列池定价的命中，不影响正确性。
+
+当前最好整数解的目标值放在共享内存中：主进程每批开始时写入，工作进程在列生成的每次定价后读取最新的值用于剪枝；
+工作进程求得 LP 解为整数的子节点时立即把它的目标值写入共享内存，其他工作进程随即按它剪枝，
+主进程在合并子节点前把这些子节点记录为整数解。
+
+并行模式下节点以约束的形式施加分支（要求 NODE_SWITCHING_OPT = 0），主进程中的节点不持有模型，
+需要 strong branching 时由主进程按节点描述重建模型。工作进程只把 WARNING 及以上级别的日志转发给主进程。
+"""
+import logging
+import logging.handlers
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import gurobipy as grbpy
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from arc_flow import arc_flows, most_fractional_arc
+from branching import Node, forbidden_arcs_of
+from branching_rules import select_branching_variable, select_branching_arc
+from checkpoint import build_node_model
+from column_generation import solve_CSP_with_CG
+from column_pool import column_pool
+from logger_config import logger
+from model_dump import model_archiver
+
+# 工作进程中的算例数据和共享上界
+worker_data = None
+worker_upper_bound = None
+
+
+def init_worker(data, upper_bound, log_queue):
+    global worker_data, worker_upper_bound
+    worker_data = data
+    worker_upper_bound = upper_bound
+
+    # fork 得到的默认环境属于主进程，工作进程使用自己的 Gurobi 环境
+    grbpy.disposeDefaultEnv()
+    # 主进程的日志后台线程和模型导出线程不会被 fork，工作进程只转发警告和错误
+    logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(logging.WARNING)
+    model_archiver.mode = 0
+
+
+def is_integral(pattern_quantity):
+    return np.abs(np.round(pattern_quantity) - pattern_quantity).sum() <= TOL
+
+
+def publish_upper_bound(upper_bound, value):
+    """把共享上界更新为 min(当前值, value)，主进程和各工作进程都可能写入。"""
+    with upper_bound.get_lock():
+        if value < upper_bound.value:
+            upper_bound.value = value
+
+
+def solve_node_task(parent_patterns, parent_basis, descriptor, recent_patterns):
+    """
+    在工作进程中求解一个子节点，返回 (lower_bound, obj_value, pattern_quantity, basis, new_patterns)；
+    节点不可行或被剪枝时 obj_value、pattern_quantity 和 basis 为 None，lower_bound 不低于剪枝时的上界。
+    """
+    for j in range(recent_patterns.shape[1]):
+        column_pool.add(recent_patterns[:, j])
+
+    node = Node()
+    for field, value in descriptor.items():
+        setattr(node, field, value)
+    node.column_indices = [column_pool.add(parent_patterns[:, j])[0] for j in range(parent_patterns.shape[1])]
+    num_parent_columns = len(node.column_indices)
+
+    model = build_node_model(worker_data, node)
+    if parent_basis is not None:
+        # 父节点的列和约束在前，子节点新增的分支约束取松弛变量为基
+        vbasis, cbasis = parent_basis
+        variables, constrs = model.getVars(), model.getConstrs()
+        if len(vbasis) == len(variables) and len(cbasis) <= len(constrs):
+            model.setAttr(GRB.Attr.VBasis, variables, vbasis)
+            model.setAttr(GRB.Attr.CBasis, constrs, cbasis + [0] * (len(constrs) - len(cbasis)))
+
+    arc_rows = node.arc_rows if len(node.arc_rows) > 0 else None
+    model, column_indices, lower_bound = solve_CSP_with_CG(worker_data, model, model.getVars(), node.column_indices,
+                                                           node.branching_indices, lambda: worker_upper_bound.value,
+                                                           arc_rows, forbidden_arcs_of(node.arc_bounds))
+    new_patterns = column_pool.to_matrix(column_indices[num_parent_columns:]).copy()
+
+    upper_bound = worker_upper_bound.value
+    if np.ceil(lower_bound - TOL) >= upper_bound or model.Status == GRB.INFEASIBLE:
+        return max(lower_bound, upper_bound), None, None, None, new_patterns
+
+    pattern_quantity = np.array(model.getAttr(GRB.Attr.X, model.getVars()))
+    if is_integral(pattern_quantity):
+        # 子节点的 LP 解就是整数解，立即广播给其他工作进程剪枝
+        publish_upper_bound(worker_upper_bound, model.ObjVal)
+
+    basis = None
+    if model.Status == GRB.OPTIMAL:
+        basis = (model.getAttr(GRB.Attr.VBasis, model.getVars()), model.getAttr(GRB.Attr.CBasis, model.getConstrs()))
+
+    return lower_bound, model.ObjVal, pattern_quantity, basis, new_patterns
+
+
+def child_descriptor(parent_node, decision):
+    """由父节点和分支决策 (类型, 变量下标或弧, '<=' 或 '>=', 界) 得到子节点的描述，与 add_*_branch 中的字段相同。"""
+    kind, key, sense, value = decision
+    descriptor = {
+        "branching_indices": list(parent_node.branching_indices),
+        "bound_changes": list(parent_node.bound_changes),
+        "arc_bounds": list(parent_node.arc_bounds),
+        "arc_rows": list(parent_node.arc_rows),
+    }
+    if kind == "variable":
+        descriptor["branching_constr"] = parent_node.branching_constr + [f"x_{key} {sense} {value}"]
+        descriptor["branching_indices"].append(key)
+        descriptor["bound_changes"].append((key, sense, value))
+    else:
+        descriptor["branching_constr"] = parent_node.branching_constr + [f"flow{key} {sense} {value}"]
+        descriptor["arc_bounds"].append((key, sense, value))
+        descriptor["arc_rows"].append(key)
+
+    return descriptor
+
+
+def branching_decisions(data, node, flows):
+    """与 main.py 相同的分支选择，返回 (decisions, branching_key, branching_value)。"""
+    if BRANCHING_SCHEME_OPT == 1:
+        arc = select_branching_arc(node, flows)
+        decisions = [("left", ("arc", arc, '<=', np.floor(flows[arc]))),
+                     ("right", ("arc", arc, '>=', np.ceil(flows[arc])))]
+        return decisions, arc, flows[arc]
+
+    if node.model is None:
+        node.model = build_node_model(data, node)
+    k = select_branching_variable(node)
+    decisions = [("left", ("variable", k, '<=', np.floor(node.pattern_quantity[k]))),
+                 ("right", ("variable", k, '>=', np.ceil(node.pattern_quantity[k])))]
+    return decisions, node.column_indices[k], node.pattern_quantity[k]
+
+
+class NodePool:
+    def __init__(self, data, num_workers=PARALLEL_WORKERS, batch_nodes=PARALLEL_BATCH_NODES):
+        if NODE_SWITCHING_OPT != 0:
+            raise ValueError("parallel node evaluation requires NODE_SWITCHING_OPT = 0")
+
+        context = multiprocessing.get_context("fork")
+        self.upper_bound = context.Value('d', float("inf"))
+        self.log_queue = context.Queue()
+        self.log_listener = logging.handlers.QueueListener(self.log_queue, *logger.handlers)
+        self.log_listener.start()
+        self.executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=context, initializer=init_worker,
+                                            initargs=(data, self.upper_bound, self.log_queue))
+        self.num_workers = num_workers
+        self.batch_nodes = max(1, batch_nodes)
+        # 上一批提交时全局列池的大小，之后新增的列随下一批任务发给工作进程
+        self.synced_columns = len(column_pool)
+        self.statistics = {"batches": 0, "parents": 0, "nodes": 0, "columns_returned": 0, "columns_new": 0,
+                           "columns_shared": 0, "integral_children": 0}
+
+    def take_open_nodes(self, data, bb_tree, upper_bound, batch):
+        """
+        从搜索树中再取出可以分支的节点加入 batch，直到 batch 中有 batch_nodes 个父节点；
+        batch 的元素为 (node, decisions, branching_key, branching_value)，由调用方持有，中断时放回搜索树。
+        按界剪掉的节点直接丢弃；LP 解（或弧流）为整数的节点留在搜索树中，由主循环记录整数解。
+        """
+        while len(batch) < self.batch_nodes and len(bb_tree) > 0:
+            node = bb_tree[0]
+            if node.obj_value > upper_bound:
+                logger.info("cut off by bound")
+                bb_tree.pop()
+                continue
+            if is_integral(node.pattern_quantity):
+                break
+            flows = None
+            if BRANCHING_SCHEME_OPT == 1:
+                patterns = column_pool.to_matrix(node.column_indices[:len(node.pattern_quantity)])
+                flows = arc_flows(patterns, node.pattern_quantity, data.Customer_demand_sizes)
+                if most_fractional_arc(flows) is None:
+                    break
+
+            decisions, branching_key, branching_value = branching_decisions(data, node, flows)
+            batch.append((bb_tree.pop(), decisions, branching_key, branching_value))
+
+    def solve_batch(self, data, batch, upper_bound):
+        """
+        并行求解 batch 中所有父节点的子节点，返回与 batch 对应的 [[(side, node), ...], ...]。
+        返回的节点不持有模型；不可行或被剪枝的节点 lower_bound 不低于剪枝时的上界。
+        """
+        publish_upper_bound(self.upper_bound, upper_bound)
+        recent_patterns = np.array(column_pool.to_matrix(list(range(self.synced_columns, len(column_pool)))))
+        self.synced_columns = len(column_pool)
+        self.statistics["columns_shared"] += recent_patterns.shape[1]
+        self.statistics["batches"] += 1
+        self.statistics["parents"] += len(batch)
+
+        tasks = []
+        for parent_node, decisions, _, _ in batch:
+            parent_patterns = np.array(column_pool.to_matrix(parent_node.column_indices[:len(parent_node.pattern_quantity)]))
+            parent_basis = None if parent_node.vbasis is None else (parent_node.vbasis, parent_node.cbasis)
+            futures = []
+            for side, decision in decisions:
+                descriptor = child_descriptor(parent_node, decision)
+                futures.append((side, descriptor, self.executor.submit(solve_node_task, parent_patterns, parent_basis,
+                                                                       descriptor, recent_patterns)))
+            tasks.append((parent_node, parent_patterns.shape[1], futures))
+
+        batch_children = []
+        for parent_node, num_parent_columns, futures in tasks:
+            children = []
+            for side, descriptor, future in futures:
+                lower_bound, obj_value, pattern_quantity, basis, new_patterns = future.result()
+                node = Node()
+                for field, value in descriptor.items():
+                    setattr(node, field, value)
+                node.column_indices = list(parent_node.column_indices[:num_parent_columns])
+                for j in range(new_patterns.shape[1]):
+                    column_index, is_new = column_pool.add(new_patterns[:, j])
+                    node.column_indices.append(column_index)
+                    self.statistics["columns_new"] += is_new
+                self.statistics["columns_returned"] += new_patterns.shape[1]
+                self.statistics["nodes"] += 1
+
+                node.lower_bound = lower_bound
+                if obj_value is not None:
+                    node.obj_value = obj_value
+                    node.pattern_quantity = pattern_quantity
+                    node.vbasis, node.cbasis = basis if basis is not None else (None, None)
+                    self.statistics["integral_children"] += bool(is_integral(pattern_quantity))
+                children.append((side, node))
+            batch_children.append(children)
+
+        return batch_children
+
+    def close(self):
+        self.executor.shutdown()
+        self.log_listener.stop()
+
+    def report(self):
+        logger.info("parallel node evaluation with %s workers, at most %s parents per batch: %s", self.num_workers,
+                    self.batch_nodes, self.statistics)
@@ -0,0 +1,83 @@
+"""
+切割问题算例的预处理，在 read_data 之后、构建 RMP 之前化简算例，并保留映射以便把解还原到原始物品上：
+    1. 删除需求为 0 的物品；
+    2. 只能单独切割的物品（与最小的物品放在一起也放不下）直接固定：每个需求各用一根原材料，从算例中删除；
+    3. 合并尺寸相同的物品，需求相加；
+    4. 尺寸除以所有尺寸的最大公约数 g，原材料宽度取 floor(Width / g)。
+
+化简后的算例用于 RMP、定价 DP 和分支；最后由 restore_solution() 把模式和用量还原为原始物品上的解，
+合并的物品按原始顺序依次分配到各根原材料上，并加上被固定的原材料。
+"""
+from functools import reduce
+from math import gcd
+
+import numpy as np
+
+from logger_config import logger
+from read_data import Data
+
+
+class InstancePreprocessor:
+    def __init__(self, data: Data):
+        self.original = data
+        sizes = np.asarray(data.Customer_demand_sizes, dtype=np.int64)
+        demands = np.asarray(data.Customer_demands, dtype=np.int64)
+        self.statistics = {"zero_demand": 0, "fixed_alone": 0, "merged": 0, "gcd": 1}
+
+        # 1. 需求为 0 的物品
+        kept = np.flatnonzero(demands > 0)
+        self.statistics["zero_demand"] = len(sizes) - len(kept)
+
+        # 2. 只能单独切割的物品，至少保留一种物品给求解器
+        min_size = sizes[kept].min() if len(kept) > 0 else 0
+        alone = kept[sizes[kept] + min_size > data.Width]
+        if len(alone) == len(kept):
+            alone = alone[:-1]
+        self.fixed_items = alone
+        self.fixed_rolls = int(demands[alone].sum())
+        self.statistics["fixed_alone"] = len(alone)
+        kept = np.setdiff1d(kept, alone)
+
+        # 3. 合并相同尺寸：reduced_sizes[r] 对应的原始物品为 groups[r]（按原始下标排序）
+        reduced_sizes, inverse = np.unique(sizes[kept], return_inverse=True)
+        self.groups = [kept[inverse == r] for r in range(len(reduced_sizes))]
+        reduced_demands = np.array([demands[group].sum() for group in self.groups], dtype=np.int64)
+        self.statistics["merged"] = len(kept) - len(reduced_sizes)
+
+        # 4. 最大公约数
+        divisor = reduce(gcd, reduced_sizes.tolist(), 0) or 1
+        self.statistics["gcd"] = divisor
+
+        self.reduced = Data()
+        self.reduced.Width = int(data.Width // divisor)
+        self.reduced.Customer_demand_sizes = (reduced_sizes // divisor).astype(int)
+        self.reduced.Customer_demands = reduced_demands.astype(int)
+        self.reduced.Customer_numbers = len(reduced_sizes)
+
+        logger.info("preprocessing: %s item types -> %s, %s fixed rolls, %s", data.Customer_numbers,
+                    self.reduced.Customer_numbers, self.fixed_rolls, self.statistics)
+
+    def restore_solution(self, pattern, incumbent):
+        """
+        把化简算例上的解 (pattern: (reduced types, k), incumbent: 各模式用量) 还原为原始物品上的
+        (pattern, incumbent)，包括被固定的原材料。
+        """
+        num_types = self.original.Customer_numbers
+        # 展开成逐根原材料，按原始需求依次把合并物品的数量分配给组内的各个原始物品
+        rolls = np.repeat(np.asarray(pattern, dtype=np.int64).T, np.round(incumbent).astype(np.int64), axis=0)
+        original_rolls = np.zeros((len(rolls), num_types), dtype=np.int32)
+        for r, group in enumerate(self.groups):
+            remaining = np.asarray(self.original.Customer_demands, dtype=np.int64)[group]
+            copies = rolls[:, r]
+            before = np.cumsum(copies) - copies
+            for k, item in enumerate(group):
+                # 组内第 k 个物品分到累计数量落在 [sum(remaining[:k]), sum(remaining[:k + 1])) 的副本，多余的给最后一个
+                low = remaining[:k].sum()
+                high = remaining[:k + 1].sum() if k < len(group) - 1 else np.inf
+                original_rolls[:, item] = np.clip(np.minimum(before + copies, high) - np.maximum(before, low), 0, None)
+
+        fixed_rolls = np.zeros((self.fixed_rolls, num_types), dtype=np.int32)
+        fixed_rolls[np.arange(self.fixed_rolls), np.repeat(self.fixed_items, self.original.Customer_demands[self.fixed_items])] = 1
+        patterns, counts = np.unique(np.concatenate([original_rolls, fixed_rolls]), axis=0, return_counts=True)
+
+        return patterns.T, counts.astype(float)
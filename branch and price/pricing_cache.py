@@ -0,0 +1,87 @@
+"""
+定价子问题的 LRU 缓存。
+
+以量化后的对偶值（以及弧流分支时的弧对偶值和被禁止的弧）为键，保存定价得到的 k 个最好模式。
+命中时用当前对偶值重新计算这些模式的 reduced cost：
+    对偶值与缓存时完全相同时，结果就是精确的定价结果；
+    只是量化后相同时，结果是近似的，只有其中有负 reduced cost 的模式时才使用，最小 reduced cost 未知，
+    调用方不能用它计算下界或判断列生成结束。
+变量分支不改变定价子问题（分支只在定价之后做 reduced cost 修正），因此不进入键。
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from algorithm_parameters import TOL, PRICING_CACHE_SIZE, PRICING_CACHE_QUANTUM
+from arc_flow import arc_reduced_cost
+
+
+class PricingCache:
+    def __init__(self, capacity=PRICING_CACHE_SIZE, quantum=PRICING_CACHE_QUANTUM):
+        self.capacity = capacity
+        self.quantum = quantum
+        # 键 --> (对偶值, 弧对偶值, 被禁止的弧, [pattern, ...])，按最近使用的顺序排列
+        self.entries = OrderedDict()
+        self.statistics = {"exact_hits": 0, "near_hits": 0, "stale_hits": 0, "misses": 0}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def key(self, shadow_price, arc_duals=None, forbidden_arcs=()):
+        duals = np.round(np.asarray(shadow_price, dtype=float) / self.quantum).astype(np.int64).tobytes()
+        arcs = tuple(sorted((arc, int(round(mu / self.quantum))) for arc, mu in (arc_duals or {}).items()))
+
+        return duals, arcs, frozenset(forbidden_arcs)
+
+    @staticmethod
+    def reduced_costs(patterns, shadow_price, arc_duals, forbidden_arcs, sizes):
+        if arc_duals is None:
+            return [1 - float(np.dot(shadow_price, pattern)) for pattern in patterns]
+        return [arc_reduced_cost(pattern, shadow_price, arc_duals, sizes, forbidden_arcs) for pattern in patterns]
+
+    def get(self, sizes, shadow_price, arc_duals=None, forbidden_arcs=()):
+        """
+        返回 (candidates, exact)。candidates 为按当前对偶值重新计算 reduced cost 后的 [(pattern, reduced_cost), ...]，
+        未命中或近似命中的模式都没有负 reduced cost 时为 None。
+        """
+        key = self.key(shadow_price, arc_duals, forbidden_arcs)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.statistics["misses"] += 1
+            return None, False
+        self.entries.move_to_end(key)
+
+        cached_price, cached_arc_duals, _, patterns = entry
+        reduced_costs = self.reduced_costs(patterns, shadow_price, arc_duals, forbidden_arcs, sizes)
+        candidates = sorted(zip(patterns, reduced_costs), key=lambda candidate: candidate[1])
+
+        exact = np.array_equal(cached_price, shadow_price) and cached_arc_duals == arc_duals
+        if exact:
+            self.statistics["exact_hits"] += 1
+            return candidates, True
+
+        if len(candidates) == 0 or candidates[0][1] >= -TOL:
+            self.statistics["stale_hits"] += 1
+            return None, False
+
+        self.statistics["near_hits"] += 1
+        return candidates, False
+
+    def put(self, shadow_price, candidates, arc_duals=None, forbidden_arcs=()):
+        key = self.key(shadow_price, arc_duals, forbidden_arcs)
+        self.entries[key] = (np.array(shadow_price, dtype=float), None if arc_duals is None else dict(arc_duals),
+                             frozenset(forbidden_arcs), [np.array(pattern) for pattern, _ in candidates])
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        hits = self.statistics["exact_hits"] + self.statistics["near_hits"]
+        calls = hits + self.statistics["stale_hits"] + self.statistics["misses"]
+
+        return hits / calls if calls > 0 else 0.0
+
+
+# 节点列生成和潜水启发式各用一个缓存
+pricing_cache = PricingCache()
+diving_pricing_cache = PricingCache()
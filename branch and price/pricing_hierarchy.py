@@ -0,0 +1,84 @@
+"""
+定价子问题的启发式层级，由 algorithm_parameters.PRICING_HIERARCHY_OPT 控制。精确定价之前依次尝试：
+    greedy: 按对偶值/尺寸从大到小贪心装入，第 r 个模式从比值第 r 大的物品开始；
+    coarse_dp: 把尺寸向上取整到 delta = Width // PRICING_COARSE_CAPACITY 的倍数后做背包 DP，
+               得到的模式在原尺寸下一定可行，DP 规模只有 PRICING_COARSE_CAPACITY。
+某一层找到 reduced cost 为负的模式就直接返回，否则进入下一层，最后才调用精确定价。
+启发式定价给不出最小 reduced cost，调用方不能用它计算下界或判断列生成结束（与定价缓存的近似结果相同）。
+弧流分支时定价子问题带弧上的对偶值和被禁止的弧，不使用启发式。
+"""
+import numpy as np
+
+from algorithm_parameters import *
+from knapsack_pricing import solve_knapsack_dp
+
+PRICING_LEVELS = ("greedy", "coarse_dp", "exact")
+
+
+def price_patterns_greedy(data, shadow_price, k=1):
+    """贪心定价，返回 reduced cost 为负的至多 k 个不同模式 [(pattern, reduced_cost), ...]，按 reduced cost 升序。"""
+    sizes = np.asarray(data.Customer_demand_sizes, dtype=np.int64)
+    values = np.asarray(shadow_price, dtype=float)
+    order = np.flatnonzero(values > 0)
+    order = order[np.argsort(-values[order] / sizes[order], kind='stable')]
+
+    candidates = {}
+    for r in range(min(k, len(order))):
+        pattern = np.zeros(len(sizes), dtype=np.int32)
+        capacity = data.Width
+        for i in np.concatenate([order[r:], order[:r]]):
+            pattern[i] = capacity // sizes[i]
+            capacity -= pattern[i] * sizes[i]
+        reduced_cost = 1 - float(np.dot(values, pattern))
+        if reduced_cost < -TOL:
+            candidates[pattern.tobytes()] = (pattern, reduced_cost)
+
+    return sorted(candidates.values(), key=lambda candidate: candidate[1])
+
+
+def price_patterns_coarse_dp(data, shadow_price, k=1, coarse_capacity=PRICING_COARSE_CAPACITY):
+    """尺寸向上取整后的背包 DP，返回值同 price_patterns_greedy。"""
+    delta = max(1, data.Width // coarse_capacity)
+    if delta == 1:
+        # 容量本来就不大，粗化没有意义
+        return []
+
+    sizes = -(-np.asarray(data.Customer_demand_sizes, dtype=np.int64) // delta)
+    patterns, _ = solve_knapsack_dp(sizes, data.Width // delta, shadow_price, k)
+    values = np.asarray(shadow_price, dtype=float)
+
+    candidates = [(pattern, 1 - float(np.dot(values, pattern))) for pattern in patterns]
+
+    return sorted([candidate for candidate in candidates if candidate[1] < -TOL], key=lambda candidate: candidate[1])
+
+
+class PricingHierarchy:
+    def __init__(self):
+        # 每一层的调用次数、找到负 reduced cost 模式的次数以及加入节点的列数
+        self.statistics = {level: {"calls": 0, "successes": 0, "columns": 0} for level in PRICING_LEVELS}
+
+    def price(self, data, shadow_price, k=1):
+        """依次尝试各个启发式，返回 (candidates, level)；都没有找到时返回 (None, None)。"""
+        for level, pricer in (("greedy", price_patterns_greedy), ("coarse_dp", price_patterns_coarse_dp)):
+            self.statistics[level]["calls"] += 1
+            candidates = pricer(data, shadow_price, k)
+            if len(candidates) > 0:
+                self.statistics[level]["successes"] += 1
+                return candidates, level
+
+        return None, None
+
+    def record(self, level, num_columns):
+        if level == "exact":
+            self.statistics[level]["calls"] += 1
+            self.statistics[level]["successes"] += num_columns > 0
+        self.statistics[level]["columns"] += num_columns
+
+    def report(self, logger):
+        for level, fields in self.statistics.items():
+            logger.info("pricing level %-9s %6s calls, %6s successes, %6s columns",
+                        level, fields["calls"], fields["successes"], fields["columns"])
+
+
+# 全局定价层级统计
+pricing_hierarchy = PricingHierarchy()
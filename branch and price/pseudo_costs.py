@@ -0,0 +1,86 @@
+"""
+模式变量的伪成本 (pseudo-cost)：记录对某个模式变量分支后，左右子节点目标值每单位取整量的平均增量。
+
+以列池下标作为键，因此在不同节点、不同子树之间共享。
+"""
+from collections import defaultdict
+
+import numpy as np
+from algorithm_parameters import TOL
+
+
+class PseudoCosts:
+    def __init__(self):
+        self.down_sum = defaultdict(float)
+        self.down_count = defaultdict(int)
+        self.up_sum = defaultdict(float)
+        self.up_count = defaultdict(int)
+        # 所有变量的累计值，用于没有观测值的变量
+        self.down_total = 0.0
+        self.down_total_count = 0
+        self.up_total = 0.0
+        self.up_total_count = 0
+
+    def update(self, key, fraction, parent_obj, down_obj=None, up_obj=None):
+        """
+        用一次分支的结果更新伪成本。fraction 为被分支变量的小数部分，子节点不可行或被剪枝时传入 None。
+        """
+        if down_obj is not None and fraction > 0:
+            gain = max(0.0, down_obj - parent_obj) / fraction
+            self.down_sum[key] += gain
+            self.down_count[key] += 1
+            self.down_total += gain
+            self.down_total_count += 1
+        if up_obj is not None and fraction < 1:
+            gain = max(0.0, up_obj - parent_obj) / (1 - fraction)
+            self.up_sum[key] += gain
+            self.up_count[key] += 1
+            self.up_total += gain
+            self.up_total_count += 1
+
+    @staticmethod
+    def average(total, count, default):
+        return total / count if count > 0 else default
+
+    def mean_down(self):
+        return self.average(self.down_total, self.down_total_count, 1.0)
+
+    def mean_up(self):
+        return self.average(self.up_total, self.up_total_count, 1.0)
+
+    def down(self, key):
+        """没有观测值的变量使用所有变量的平均伪成本。"""
+        return self.average(self.down_sum[key], self.down_count[key], self.mean_down())
+
+    def up(self, key):
+        return self.average(self.up_sum[key], self.up_count[key], self.mean_up())
+
+    def reliable(self, key, threshold):
+        return min(self.down_count[key], self.up_count[key]) >= threshold
+
+    def score(self, key, fraction, eps=1e-6):
+        """乘积形式的分支得分 max(down * f, eps) * max(up * (1 - f), eps)。"""
+        return max(self.down(key) * fraction, eps) * max(self.up(key) * (1 - fraction), eps)
+
+    def estimate(self, obj_value, keys, fractions):
+        """
+        节点的最好估计 (best estimate)：LP 目标值加上把每个小数变量取整所需的最小伪成本增量。
+        """
+        estimate = obj_value
+        for key, fraction in zip(keys, fractions):
+            estimate += min(self.down(key) * fraction, self.up(key) * (1 - fraction))
+
+        return estimate
+
+
+# 全局伪成本表
+pseudo_costs = PseudoCosts()
+
+
+def fractional_parts(quantity):
+    """返回 (小数分量的下标, 小数部分)。"""
+    quantity = np.asarray(quantity, dtype=float)
+    fraction = quantity - np.floor(quantity)
+    index = np.flatnonzero(np.minimum(fraction, 1 - fraction) > TOL)
+
+    return index, fraction[index]
@@ -2,7 +2,14 @@ import numpy as np
 import gurobipy as grbpy
 from gurobipy import GRB
 from algorithm_parameters import *
-from logger_config import logger
+from logger_config import logger, RATE_LIMITED
+from knapsack_pricing import price_patterns_dp
+from column_store import DenseColumnStore, SparseColumnStore, grow, pattern_key, sparse_pattern
+from column_generation import pattern_column
+from pricing_cache import diving_pricing_cache
+from metrics import metrics, diving_global_counter, diving_sp_global_counter
+from model_dump import model_archiver
+from termination import check_interrupted
 
 
 def perform_simple_rounding(rel_sol):
@@ -19,6 +26,27 @@ def perform_simple_rounding(rel_sol):
 def solve_sub_problem_embed_in_diving_heuristic(data, price_dual):
 
     logger.info('Solving sub problem embed in diving heuristic')
+
+    if PRICING_CACHE_OPT == 1:
+        # 缓存中的近似结果只在有负 reduced cost 时返回，潜水列生成的结束仍由精确定价判断
+        candidates, exact = diving_pricing_cache.get(data.Customer_demand_sizes, price_dual)
+        if candidates is not None:
+            new_pattern, reduced_cost = candidates[0]
+            logger.info("diving pricing cache hit (exact: %s), reduced cost: %s", exact, reduced_cost)
+            return reduced_cost, new_pattern
+
+    if PRICING_OPT == 1:
+        diving_sp_global_counter.increment()
+        new_pattern, reduced_cost = price_patterns_dp(data, price_dual, 1)[0]
+        if PRICING_CACHE_OPT == 1:
+            diving_pricing_cache.put(price_dual, [(new_pattern, reduced_cost)])
+
+        logger.info("diving sp reduced cost: %s", reduced_cost, extra=RATE_LIMITED)
+        logger.info("diving sp new pattern: %s", new_pattern, extra=RATE_LIMITED)
+        logger.info('Ended solving sub problem embed in diving heuristic')
+
+        return reduced_cost, new_pattern
+
     # initialization of SP
 
     sub_model = grbpy.Model("sub problem")
@@ -31,153 +59,204 @@ def solve_sub_problem_embed_in_diving_heuristic(data, price_dual):
 
     sub_model.setParam(GRB.Param.OutputFlag, 1)
     sub_model.optimize()
+    check_interrupted(sub_model)
 
     diving_sp_global_counter.increment()
-    logger.info("write diving SP model lp: %s", diving_sp_global_counter.get_count())
-    sub_model.write(f"diving_sp_{diving_sp_global_counter.get_count()}.lp")
+    model_archiver.dump(sub_model, f"diving_sp_{diving_sp_global_counter.get_count()}.lp", "diving_sp")
 
     reduced_cost = 1 - sub_model.objVal
 
     new_pattern = np.array(sub_model.getAttr(GRB.Attr.X, sub_model.getVars()), dtype=np.int32)
+    if PRICING_CACHE_OPT == 1:
+        diving_pricing_cache.put(price_dual, [(new_pattern, reduced_cost)])
 
-    logger.info("diving sp reduced cost: %s", reduced_cost)
-    logger.info("diving sp new pattern: %s", new_pattern)
+    logger.info("diving sp reduced cost: %s", reduced_cost, extra=RATE_LIMITED)
+    logger.info("diving sp new pattern: %s", new_pattern, extra=RATE_LIMITED)
     logger.info('Ended solving sub problem embed in diving heuristic')
 
     return reduced_cost, new_pattern
 
 
-def solve_CSP_with_CG_embed_in_diving_heuristic(data, pattern_matrix, residual_demand):
+class DivingRMP:
+    """
+    所有潜水过程共用的剩余问题 RMP。
+
+    模型只建一次，之后每次只修改需求约束的右端项为剩余需求，新列追加到模型中，Gurobi 保留上一次求解的基热启动。
+    列用模式字节串去重，不同节点带来的列也一并保留。已经求解过的剩余需求向量会记住其 LP 解，再次遇到时直接返回。
+    """
+    def __init__(self):
+        self.model = None
+        self.constrs = []
+        self.variables = []
+        self.pattern_store = None
+        # 模式字节串 --> 模型中的变量下标
+        self.index = {}
+        # 剩余需求字节串 --> 当时的 LP 解（之后只会追加列，旧解补零后仍然是最优解）
+        self.memo = {}
+        self.statistics = {"dives": 0, "residual_lps": 0, "memo_hits": 0, "columns": 0}
 
-    logger.info("Solving CSP with CG_embed in diving heuristic!")
+    def __len__(self):
+        return len(self.variables)
 
-    logger.info("pattern_matrix: \n%s", pattern_matrix)
-    logger.info("residual_demand: %s", residual_demand)
+    def build(self, data):
+        self.model = grbpy.Model("Restricted Master Problem")
+        self.constrs = [self.model.addConstr(grbpy.LinExpr() >= data.Customer_demands[i], name=f"demand_satisfaction[{i}]")
+                        for i in range(data.Customer_numbers)]
+        self.model.setParam(GRB.Param.OutputFlag, 1)
+        self.model.setAttr(GRB.Attr.ModelSense, GRB.MINIMIZE)
+        column_store = DenseColumnStore if COLUMN_STORE_OPT == 0 else SparseColumnStore
+        self.pattern_store = column_store(data.Customer_numbers)
 
-    # pattern矩阵的列数，即模式的总数量
-    num_patterns = np.shape(pattern_matrix)[1]
+    def add_column(self, pattern) -> int:
+        """添加模式对应的变量，返回其下标；模式已存在时直接返回已有变量的下标。"""
+        key = pattern_key(pattern, sparse=COLUMN_STORE_OPT == 1)
+        if key in self.index:
+            return self.index[key]
 
-    # create RMP
-    rmp_model = grbpy.Model("Restricted Master Problem")
+        rows, counts = sparse_pattern(pattern)
+        self.variables.append(self.model.addVar(obj=1.0, vtype=GRB.CONTINUOUS,
+                                                column=pattern_column(rows, counts, self.constrs)))
+        self.index[key] = self.pattern_store.append(pattern)
+        self.statistics["columns"] += 1
 
-    # variables of RMP
-    quantity_pattern = rmp_model.addVars(num_patterns, obj=1, vtype=GRB.CONTINUOUS)
+        return self.index[key]
 
-    # constraints of RMP (demand satisfaction), with residual_demand in the right hands
-    rmp_model.addConstrs((grbpy.quicksum(pattern_matrix[i][j] * quantity_pattern[j] for j in range(num_patterns)) >=
-                          residual_demand[i] for i in range(data.Customer_numbers)), name='demand_satisfaction')
+    def add_columns(self, data, pattern_matrix) -> np.ndarray:
+        """添加节点的模式矩阵中的各列，返回它们在本模型中的下标。"""
+        if self.model is None:
+            self.build(data)
 
-    rmp_model.setParam(GRB.Param.OutputFlag, 1)
-    rmp_model.setAttr(GRB.Attr.ModelSense, GRB.MINIMIZE)
+        return np.array([self.add_column(pattern_matrix[:, j]) for j in range(np.shape(pattern_matrix)[1])],
+                        dtype=np.int64)
 
-    # main steps
-    while True:
-        # solve RMP
-        rmp_model.optimize()
+    def solution(self, quantity) -> np.ndarray:
+        """把某一时刻的解补零到当前的列数。"""
+        full = np.zeros(len(self))
+        full[:len(quantity)] = quantity
 
-        diving_global_counter.increment()
-        logger.info("write diving CG model lp: %s", diving_global_counter.get_count())
-        rmp_model.write(f"div_CG_{diving_global_counter.get_count()}.lp")
+        return full
 
-        price_dual = rmp_model.getAttr(GRB.Attr.Pi, rmp_model.getConstrs())
+    def solve(self, data, residual_demand) -> np.ndarray:
+        """以 residual_demand 为需求做列生成，返回所有列的 LP 解。"""
+        logger.info("Solving CSP with CG_embed in diving heuristic!")
+        logger.info("residual_demand: %s", residual_demand, extra=RATE_LIMITED)
 
-        reduced_cost, new_pattern = solve_sub_problem_embed_in_diving_heuristic(data, price_dual)
+        key = np.ascontiguousarray(residual_demand, dtype=np.int64).tobytes()
+        if key in self.memo:
+            self.statistics["memo_hits"] += 1
+            logger.info("residual demand solved before, reuse its LP solution")
+            return self.solution(self.memo[key])
 
-        logger.info("Reduced cost: %s", reduced_cost)
-        logger.info("new pattern: %s", new_pattern)
+        self.statistics["residual_lps"] += 1
+        self.model.setAttr(GRB.Attr.RHS, self.constrs, list(residual_demand))
 
-        if np.abs(reduced_cost) <= TOL or reduced_cost >= 0:
-            break
+        # main steps
+        while True:
+            # solve RMP, warm started from the basis of the previous solve
+            with metrics.timer("diving_rmp_solve"):
+                self.model.optimize()
+            check_interrupted(self.model)
+            diving_global_counter.increment()
+
+            price_dual = self.model.getAttr(GRB.Attr.Pi, self.constrs)
 
-        # set the new pattern as a new column in the coefficient matrix
-        new_column = grbpy.Column(new_pattern, rmp_model.getConstrs())
+            reduced_cost, new_pattern = solve_sub_problem_embed_in_diving_heuristic(data, price_dual)
 
-        # add the new variable
-        quantity_pattern[num_patterns] = rmp_model.addVar(obj=1.0, vtype=GRB.CONTINUOUS, column=new_column)
-        pattern_matrix = np.c_[pattern_matrix, new_pattern]
-        num_patterns += 1
+            logger.info("Reduced cost: %s", reduced_cost, extra=RATE_LIMITED)
+            logger.info("new pattern: %s", new_pattern, extra=RATE_LIMITED)
 
-    # record and print solution
-    quantity_sol = np.zeros(num_patterns)
-    for j in range(num_patterns):
-        quantity_sol[j] = quantity_pattern[j].x
+            if np.abs(reduced_cost) <= TOL or reduced_cost >= 0:
+                break
 
-    logger.info("Ended Solve CSP with CG_embed in diving heuristic!")
+            num_patterns = len(self)
+            if self.add_column(new_pattern) < num_patterns:
+                # 数值误差导致已有的列被重新生成
+                break
 
-    return pattern_matrix, quantity_sol
+        quantity_sol = np.array(self.model.getAttr(GRB.Attr.X, self.variables))
+        self.memo[key] = quantity_sol
+
+        logger.info("Ended Solve CSP with CG_embed in diving heuristic!")
+
+        return quantity_sol
+
+    def report(self):
+        logger.info("diving heuristic: %s dives, %s residual LPs solved, %s residual LPs reused, %s columns",
+                    self.statistics["dives"], self.statistics["residual_lps"], self.statistics["memo_hits"],
+                    self.statistics["columns"])
+
+
+# 所有节点的潜水启发式共用的剩余问题 RMP
+diving_rmp = DivingRMP()
 
 
 def perform_diving_heuristic(relative_solution, data, pattern):
     logger.info("Performing diving heuristic!")
-    logger.info("relative_solution: \n%s", relative_solution)
-    logger.info("pattern: \n%s", pattern)
+    logger.info("relative_solution: \n%s", relative_solution, extra=RATE_LIMITED)
+    logger.info("pattern: \n%s", pattern, extra=RATE_LIMITED)
+
+    # 把节点的 LP 解映射到潜水 RMP 的列上
+    diving_rmp.statistics["dives"] += 1
+    positions = diving_rmp.add_columns(data, pattern)
+    relative_solution_node = relative_solution
+    relative_solution = np.zeros(len(diving_rmp))
+    np.add.at(relative_solution, positions, relative_solution_node)
 
     # initialization
     total_consumption = 0
     residual_demand = data.Customer_demands
-    rounded_sol = np.array([])
-    num_new_patterns = len(relative_solution)
+    rounded_sol = np.zeros(len(diving_rmp))
     # main steps
     while residual_demand.sum() > 0:
 
         num_patterns = len(relative_solution)
 
-        rounded_sol = np.pad(rounded_sol, (0, num_new_patterns), 'constant')  # expand array
+        # expand array (amortized, the tail beyond num_patterns stays zero)
+        rounded_sol = grow(rounded_sol, num_patterns)
 
         # 先做一些变量的固定
-        num_rounded = 0
-        for j in range(num_patterns):
-            # round down
-            if relative_solution[j] - np.floor(relative_solution[j]) <= DOWN_THRESHOLD:
-                rounded_sol[j] += np.floor(relative_solution[j])
-                num_rounded += 1
-            # round up
-            elif relative_solution[j] - np.floor(relative_solution[j]) >= UP_THRESHOLD:
-                rounded_sol[j] += np.ceil(relative_solution[j])
-                num_rounded += 1
+        fraction = relative_solution - np.floor(relative_solution)
+        round_down = fraction <= DOWN_THRESHOLD
+        round_up = ~round_down & (fraction >= UP_THRESHOLD)
+        rounded_sol[:num_patterns][round_down] += np.floor(relative_solution[round_down])
+        rounded_sol[:num_patterns][round_up] += np.ceil(relative_solution[round_up])
+        num_rounded = np.count_nonzero(round_down) + np.count_nonzero(round_up)
 
         # none elements rounded
         if num_rounded == 0:
             # determine the least fractional element to round up/down
             fraction = np.abs(np.round(relative_solution) - relative_solution)
-            fractional_index = np.array([k for k in range(num_patterns) if fraction[k] > TOL])
+            fractional_index = np.flatnonzero(fraction > TOL)
             k = fractional_index[np.argmin(fraction[fractional_index])]
             rounded_sol[k] += np.round(relative_solution[k])
 
-        logger.info("total_consumption: %s", total_consumption)
+        logger.info("total_consumption: %s", total_consumption, extra=RATE_LIMITED)
 
         # check if the residual problem stays unchanged
         if rounded_sol.sum() == total_consumption:
             # choose the least fractional element to round up, so that the residual problem becomes smaller
             fraction = np.ceil(relative_solution) - relative_solution
-            fractional_index = np.array([k for k in range(num_patterns) if fraction[k] > TOL])
+            fractional_index = np.flatnonzero(fraction > TOL)
             k = fractional_index[np.argmin(fraction[fractional_index])]
             rounded_sol[k] += np.ceil(relative_solution[k])
 
-        logger.info("rounded_sol: \n%s", rounded_sol)
+        logger.info("rounded_sol: \n%s", rounded_sol[:num_patterns], extra=RATE_LIMITED)
 
         # update total consumption and residual demand
         total_consumption = rounded_sol.sum()
-        index = [i for i in range(num_patterns) if rounded_sol[i] > 0]
-
-        logger.info("rounded_sol sum: %s", rounded_sol.sum())
-        logger.info("index: %s", index)
-
-        sat_matrix = np.zeros((len(index), data.Customer_numbers), dtype=int)
-        for i in range(len(index)):
-            sat_matrix[i] = pattern.T[index][i] * rounded_sol[index][i]
-        logger.info("sat_matrix: \n%s", sat_matrix)
-        residual_demand = data.Customer_demands - sat_matrix.sum(axis=0)
+        residual_demand = data.Customer_demands - diving_rmp.pattern_store.matvec(rounded_sol[:num_patterns].astype(int), size=num_patterns)
         residual_demand = np.maximum(0, residual_demand)
 
-        logger.info("residual_demand: \n%s", residual_demand)
+        logger.info("residual_demand: \n%s", residual_demand, extra=RATE_LIMITED)
 
         if residual_demand.sum() == 0:
             break
 
-        pattern, relative_solution = solve_CSP_with_CG_embed_in_diving_heuristic(data, pattern, residual_demand)
-        num_new_patterns = len(relative_solution) - num_patterns
+        relative_solution = diving_rmp.solve(data, residual_demand)
 
     logger.info("Ended performing diving heuristic!")
 
-    return rounded_sol, pattern
+    num_patterns = len(diving_rmp)
+    rounded_sol = grow(rounded_sol, num_patterns)[:num_patterns]
+
+    return rounded_sol, diving_rmp.pattern_store.matrix(size=num_patterns)
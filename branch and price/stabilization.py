@@ -0,0 +1,170 @@
+"""
+列生成的对偶稳定化，由 algorithm_parameters.STABILIZATION_OPT 选择：
+    0: 不做稳定化，直接用 RMP 的对偶值定价；
+    1: Wentges 平滑，用稳定中心与 RMP 对偶值的凸组合定价，出现 mis-pricing 时自动减小 alpha；
+    2: du Merle box-step，在需求约束上加有界的人工变量，把对偶值限制在稳定中心附近的盒子里；
+    3: 同时使用 1 和 2。
+"""
+import numpy as np
+import gurobipy as grbpy
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from logger_config import logger, RATE_LIMITED
+
+
+# 所有节点累计的稳定化统计，用于比较不同 STABILIZATION_OPT 下的列生成迭代次数
+stabilization_statistics = {
+    "cg_calls": 0,
+    "pricing_calls": 0,
+    "mispricings": 0,
+    "box_shrinks": 0,
+}
+
+
+def farley_bound(demands, duals, min_reduced_cost):
+    """
+    Farley 下界 d·π / max_p(π·a_p)。对任意 π >= 0，π / max_p(π·a_p) 对需求约束是对偶可行的，
+    其中 max_p(π·a_p) = 1 - min_reduced_cost 由定价子问题给出。
+    """
+    return float(np.dot(demands, duals)) / max(1.0, 1.0 - min_reduced_cost)
+
+
+class DualStabilizer:
+    def __init__(self, data, mode=STABILIZATION_OPT):
+        self.demands = np.asarray(data.Customer_demands, dtype=float)
+        self.mode = mode
+        # 稳定中心及其 Farley 下界
+        self.center = None
+        self.center_bound = -np.inf
+        # Wentges 平滑系数，第 k 次 mis-pricing 后取 max(0, 1 - k(1 - SMOOTHING_ALPHA))
+        self.alpha = SMOOTHING_ALPHA
+        self.num_mispricing = 0
+        self.total_mispricing = 0
+        # box-step 的人工变量：每个需求约束一对 (plus, minus)
+        self.box_vars = []
+        self.box_slack = BOX_STEP_SLACK
+        # 每次迭代稳定中心与 RMP 对偶值的距离
+        self.dual_distance = []
+        self.iterations = 0
+
+    @property
+    def smoothing(self):
+        return self.mode in (1, 3)
+
+    @property
+    def box_step(self):
+        return self.mode in (2, 3)
+
+    @property
+    def box_in_use(self):
+        """box-step 人工变量仍可取正值，此时 RMP 的目标值不是原 RMP 的目标值。"""
+        return len(self.box_vars) > 0 and self.box_slack > 0
+
+    def pricing_duals(self, shadow_price):
+        """返回用于定价的对偶值。"""
+        shadow_price = np.asarray(shadow_price, dtype=float)
+        if self.center is None:
+            self.center = shadow_price.copy()
+
+        self.iterations += 1
+        stabilization_statistics["pricing_calls"] += 1
+        self.dual_distance.append(float(np.linalg.norm(self.center - shadow_price)))
+        logger.info("stabilization iteration %s: alpha = %s, dual distance = %s",
+                    self.iterations, self.alpha, self.dual_distance[-1], extra=RATE_LIMITED)
+
+        if not self.smoothing or self.alpha <= 0:
+            return shadow_price
+
+        return self.alpha * self.center + (1 - self.alpha) * shadow_price
+
+    def update_center(self, duals, min_reduced_cost):
+        """定价后若 duals 处的下界更好，则把稳定中心移到 duals。返回该下界。"""
+        bound = farley_bound(self.demands, duals, min_reduced_cost)
+        if bound > self.center_bound + TOL:
+            self.center_bound = bound
+            self.center = np.array(duals, dtype=float)
+            self.update_box()
+
+        return bound
+
+    def mispricing(self, pricing_price, shadow_price):
+        """
+        平滑对偶下没有找到对 RMP 对偶值有负 reduced cost 的列。减小 alpha 后需要重新定价时返回 True；
+        定价对偶与 RMP 对偶相同（alpha 为 0 或稳定中心与 RMP 对偶重合）时就是精确定价，返回 False。
+        """
+        if not self.smoothing or self.alpha <= 0 or np.allclose(pricing_price, shadow_price, atol=TOL):
+            return False
+
+        self.num_mispricing += 1
+        self.total_mispricing += 1
+        stabilization_statistics["mispricings"] += 1
+        self.alpha = 1 - self.num_mispricing * (1 - SMOOTHING_ALPHA)
+        if self.alpha <= TOL:
+            self.alpha = 0.0
+        logger.info("mis-pricing %s, alpha reduced to %s", self.num_mispricing, self.alpha)
+
+        return True
+
+    def restore_alpha(self):
+        self.num_mispricing = 0
+        self.alpha = SMOOTHING_ALPHA
+
+    def attach_box(self, model, constrs, shadow_price):
+        """在需求约束上添加 box-step 人工变量，稳定中心取当前的 RMP 对偶值。"""
+        if not self.box_step:
+            return
+
+        self.center = np.array(shadow_price, dtype=float)
+        for constr in constrs:
+            # plus: 以 center + width 的代价免费满足需求，限制对偶值不超过 center + width
+            self.box_vars.append(model.addVar(lb=0.0, ub=self.box_slack, obj=0.0, vtype=GRB.CONTINUOUS,
+                                              column=grbpy.Column([1.0], [constr])))
+            # minus: 多满足需求可获得 center - width 的收益，限制对偶值不低于 center - width
+            self.box_vars.append(model.addVar(lb=0.0, ub=self.box_slack, obj=0.0, vtype=GRB.CONTINUOUS,
+                                              column=grbpy.Column([-1.0], [constr])))
+        self.update_box()
+
+    def update_box(self):
+        for i in range(len(self.box_vars) // 2):
+            plus, minus = self.box_vars[2 * i], self.box_vars[2 * i + 1]
+            plus.Obj = self.center[i] + BOX_STEP_WIDTH
+            minus.Obj = -max(0.0, self.center[i] - BOX_STEP_WIDTH)
+            plus.UB = self.box_slack
+            minus.UB = self.box_slack
+
+    def shrink_box(self, shadow_price):
+        """
+        定价没有找到新列时调用。若人工变量仍取正值，说明稳定化问题的最优解还不是原问题的最优解，
+        此时缩小人工变量的上界并把稳定中心移到当前对偶值，返回 True 表示需要重新求解 RMP。
+        """
+        if not self.box_vars or self.box_slack <= 0:
+            return False
+        if all(var.X <= TOL for var in self.box_vars):
+            return False
+
+        stabilization_statistics["box_shrinks"] += 1
+        self.box_slack *= BOX_STEP_SHRINK
+        if self.box_slack < BOX_STEP_MIN_SLACK:
+            self.box_slack = 0.0
+        self.center = np.array(shadow_price, dtype=float)
+        self.update_box()
+        logger.info("box-step slack shrunk to %s", self.box_slack)
+
+        return True
+
+    def detach_box(self, model):
+        """删除人工变量，返回是否删除了变量（删除后需要重新求解 RMP 以恢复解的属性）。"""
+        if not self.box_vars:
+            return False
+
+        model.remove(self.box_vars)
+        self.box_vars = []
+
+        return True
+
+    def report(self):
+        stabilization_statistics["cg_calls"] += 1
+        mean_distance = np.mean(self.dual_distance) if self.dual_distance else 0.0
+        logger.info("stabilization: %s pricing iterations, %s mis-pricings, mean dual distance %s, best Farley bound %s",
+                    self.iterations, self.total_mispricing, mean_distance, self.center_bound)
@@ -0,0 +1,124 @@
+"""
+分支定价的终止控制：除了 GAP_TOL 和搜索树为空，还可以按运行时间、处理的节点数、内存和间隙停滞提前结束，
+收到 SIGINT / SIGTERM 时在当前迭代结束后正常退出并保留当前最好整数解；SIGINT 到达时正在求解的 Gurobi 模型
+以 INTERRUPTED 状态返回，check_interrupted() 抛出 SolveInterrupted，主循环放弃当前迭代并同样正常退出。
+
+各限制由 algorithm_parameters 中的 TIME_LIMIT（秒）、NODE_LIMIT（已求解的节点数）、MEMORY_LIMIT（MB，进程常驻内存）和
+STALL_ITERATIONS（连续多少次迭代间隙没有改进）给出，取 None 表示不限制。
+限制在每次迭代结束和每次按界剪掉节点后检查，一次迭代（一个节点的两个子节点的列生成）不会被打断，因此实际运行时间会略超过 TIME_LIMIT。
+"""
+import os
+import resource
+import signal
+import time
+
+from gurobipy import GRB
+
+from algorithm_parameters import *
+from logger_config import logger
+
+TERMINATION_REASONS = ("optimal", "gap", "time_limit", "node_limit", "memory_limit", "stalled", "interrupted")
+
+
+def memory_usage():
+    """进程当前的常驻内存（MB）；不能读取 /proc 时使用峰值常驻内存。"""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # Linux 下 ru_maxrss 的单位为 KB
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class SolveInterrupted(Exception):
+    """Gurobi 求解时收到 SIGINT，optimize() 以 INTERRUPTED 状态返回，模型中没有可读的解。"""
+
+
+def check_interrupted(model):
+    """每次 optimize() 之后调用：求解被中断时抛出 SolveInterrupted，由主循环按 "interrupted" 结束。"""
+    if model.Status == GRB.INTERRUPTED:
+        raise SolveInterrupted(model.ModelName)
+
+
+class BnPResult:
+    """分支定价的结果：当前最好整数解、上下界以及终止原因。"""
+    def __init__(self, solution, reason, num_iterations, run_time):
+        self.reason = reason
+        self.incumbent = solution.incumbent
+        self.pattern = solution.pattern
+        self.ub = solution.ub
+        self.lb = solution.lb
+        self.int_lb = solution.int_lb
+        self.gap = solution.gap
+        self.num_iterations = num_iterations
+        self.run_time = run_time
+
+    @property
+    def proven_optimal(self):
+        return self.reason in ("optimal", "gap")
+
+    def __repr__(self):
+        return (f"BnPResult(reason={self.reason}, ub={self.ub}, lb={self.lb}, int_lb={self.int_lb}, "
+                f"gap={self.gap}, iterations={self.num_iterations}, time={self.run_time:.3f})")
+
+
+class TerminationManager:
+    def __init__(self, time_limit=TIME_LIMIT, node_limit=NODE_LIMIT, memory_limit=MEMORY_LIMIT,
+                 stall_iterations=STALL_ITERATIONS, gap_tol=GAP_TOL):
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.memory_limit = memory_limit
+        self.stall_iterations = stall_iterations
+        self.gap_tol = gap_tol
+
+        self.start_time = time.time()
+        self.interrupted = False
+        self.best_gap = float("inf")
+        self.last_improvement = 0
+        self.previous_handlers = {}
+
+    def install_signal_handlers(self):
+        """SIGINT / SIGTERM 只设置中断标志，第二次 SIGINT 恢复默认行为（立即中断）。"""
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            self.previous_handlers[signum] = signal.signal(signum, self.handle_signal)
+
+    def restore_signal_handlers(self):
+        for signum, handler in self.previous_handlers.items():
+            signal.signal(signum, handler)
+        self.previous_handlers = {}
+
+    def handle_signal(self, signum, frame):
+        if self.interrupted and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        self.interrupted = True
+        logger.warning("received signal %s, stopping after the current iteration", signal.Signals(signum).name)
+
+    def elapsed(self):
+        return time.time() - self.start_time
+
+    def check(self, solution, num_open_nodes, num_iterations, num_nodes):
+        """
+        每次迭代结束和每次按界剪掉节点后调用，返回终止原因，继续搜索时返回 None。
+        num_nodes 为已求解的节点数（每次分支求解两个子节点），NODE_LIMIT 按它比较，停滞仍按迭代次数计。
+        """
+        if num_open_nodes == 0:
+            return "optimal"
+        if solution.gap <= self.gap_tol:
+            return "gap"
+        if self.interrupted:
+            return "interrupted"
+        if self.time_limit is not None and self.elapsed() >= self.time_limit:
+            return "time_limit"
+        if self.node_limit is not None and num_nodes >= self.node_limit:
+            return "node_limit"
+        if self.memory_limit is not None and memory_usage() >= self.memory_limit:
+            return "memory_limit"
+
+        if solution.gap < self.best_gap - TOL:
+            self.best_gap = solution.gap
+            self.last_improvement = num_iterations
+        elif self.stall_iterations is not None and num_iterations - self.last_improvement >= self.stall_iterations:
+            return "stalled"
+
+        return None
@@ -0,0 +1,109 @@
+"""
+arc_flow 的弧流表示：整数弧流的分解、弧流分支下定价 DP 与穷举的对照。
+"""
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from arc_flow import (arc_flows, arc_reduced_cost, decompose_arc_flow, most_fractional_arc, pattern_arcs,
+                      solve_arc_flow_pricing)
+
+
+def random_instance(rng):
+    num_types = rng.randint(1, 6)
+    width = int(rng.randint(10, 60))
+    sizes = rng.randint(1, width // 2 + 1, size=num_types)
+
+    return sizes, width
+
+
+def random_pattern(rng, sizes, width):
+    """按随机顺序随机装入物品得到的可行模式。"""
+    pattern = np.zeros(len(sizes), dtype=np.int32)
+    capacity = width
+    for i in rng.permutation(len(sizes)):
+        pattern[i] = rng.randint(0, capacity // sizes[i] + 1)
+        capacity -= pattern[i] * sizes[i]
+
+    return pattern
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_decompose_integral_arc_flow(seed):
+    rng = np.random.RandomState(seed)
+    sizes, width = random_instance(rng)
+    num_columns = rng.randint(1, 8)
+    patterns = np.column_stack([random_pattern(rng, sizes, width) for _ in range(num_columns)])
+    quantity = rng.randint(0, 5, size=num_columns).astype(float)
+
+    flows = arc_flows(patterns, quantity, sizes)
+    assert most_fractional_arc(flows) is None
+
+    decomposed, decomposed_quantity = decompose_arc_flow(flows, sizes, len(sizes))
+    assert decomposed.shape[0] == len(sizes)
+    assert np.all(decomposed_quantity > 0)
+    # 分解得到的模式可行，各物品的数量和原材料总数与原来的解相同；路径可以在共同的节点处交换，
+    # 因此分解出的模式不一定是原来的模式，也不一定按规范顺序
+    assert np.all(sizes @ decomposed <= width)
+    assert np.array_equal(decomposed @ decomposed_quantity, patterns @ quantity)
+    nonempty = np.flatnonzero(patterns.sum(axis=0) > 0)
+    assert decomposed_quantity.sum() == quantity[nonempty].sum()
+
+
+def test_most_fractional_arc():
+    assert most_fractional_arc({(0, 0): 1.0, (3, 1): 2.0}) is None
+    assert most_fractional_arc({(0, 0): 1.2, (3, 1): 2.45, (5, 0): 0.9}) == (3, 1)
+
+
+def test_pattern_arcs_follow_canonical_order():
+    # 尺寸从大到小，尺寸相同时按下标
+    assert pattern_arcs([1, 2, 1], [3, 5, 3]) == [(0, 1), (5, 1), (10, 0), (13, 2)]
+
+
+def enumerate_best(sizes, width, values, arc_duals, forbidden_arcs):
+    """穷举所有非空可行模式，返回最大的 1 - reduced cost，即 pi a + 路径上的弧对偶值。"""
+    best = -np.inf
+    for pattern in itertools.product(*[range(width // size + 1) for size in sizes]):
+        if sum(pattern) == 0 or np.dot(sizes, pattern) > width:
+            continue
+        best = max(best, 1 - arc_reduced_cost(np.array(pattern), values, arc_duals, sizes, forbidden_arcs))
+
+    return best
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_arc_flow_pricing_with_arc_duals(seed):
+    rng = np.random.RandomState(100 + seed)
+    num_types = rng.randint(1, 4)
+    width = int(rng.randint(6, 25))
+    sizes = rng.randint(1, width + 1, size=num_types)
+    values = np.round(rng.uniform(0.05, 1.0, size=num_types), 3)
+
+    # 在随机模式经过的弧上放对偶值，并禁止其中一些弧
+    arcs = sorted({arc for _ in range(4) for arc in pattern_arcs(random_pattern(rng, sizes, width), sizes)})
+    arc_duals = {arc: float(np.round(rng.uniform(-0.5, 0.5), 3)) for arc in arcs}
+    forbidden_arcs = {arc for arc in arcs if rng.uniform() < 0.3}
+
+    patterns, pattern_values = solve_arc_flow_pricing(sizes, width, values, arc_duals, forbidden_arcs)
+    expected = enumerate_best(sizes, width, values, arc_duals, forbidden_arcs)
+
+    if not np.isfinite(expected):
+        # 所有非空模式都经过被禁止的弧
+        assert len(patterns) == 0
+        return
+    assert len(patterns) == 1
+    assert np.dot(sizes, patterns[0]) <= width
+    assert not set(pattern_arcs(patterns[0], sizes)) & forbidden_arcs
+    assert pattern_values[0] == pytest.approx(1 - arc_reduced_cost(patterns[0], values, arc_duals, sizes))
+    assert pattern_values[0] == pytest.approx(expected)
+
+
+def test_arc_flow_pricing_returns_distinct_widths():
+    patterns, pattern_values = solve_arc_flow_pricing([3, 5], 10, [0.3, 0.6], k=4)
+    widths = Counter((np.array([3, 5]) @ patterns.T).tolist())
+
+    assert len(patterns) == 4
+    assert all(count == 1 for count in widths.values())
+    assert np.all(np.diff(pattern_values) <= 0)
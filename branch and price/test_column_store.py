@@ -0,0 +1,128 @@
+"""
+column_store 的稠密和 CSC 后端与普通 NumPy 矩阵的对照，以及列池按列下标取模式矩阵。
+"""
+import numpy as np
+import pytest
+
+from column_pool import ColumnPool
+from column_store import DenseColumnStore, SparseColumnStore, pattern_key, sparse_pattern
+
+STORES = [DenseColumnStore, SparseColumnStore]
+
+
+def random_patterns(rng, num_rows, num_columns):
+    patterns = rng.randint(0, 4, size=(num_rows, num_columns)).astype(np.int32)
+    # 一半的元素为 0，保证有稀疏列和全零列
+    patterns[rng.uniform(size=patterns.shape) < 0.5] = 0
+
+    return patterns
+
+
+@pytest.mark.parametrize("store_class", STORES)
+@pytest.mark.parametrize("seed", range(5))
+def test_append_matches_dense_matrix(store_class, seed):
+    rng = np.random.RandomState(seed)
+    num_rows = rng.randint(1, 12)
+    patterns = random_patterns(rng, num_rows, rng.randint(1, 80))
+
+    # 初始容量为 1，追加时多次扩容
+    store = store_class(num_rows, capacity=1)
+    for j in range(patterns.shape[1]):
+        assert store.append(patterns[:, j]) == j
+    assert len(store) == patterns.shape[1]
+
+    assert np.array_equal(store.matrix(), patterns)
+    for j in range(patterns.shape[1]):
+        assert np.array_equal(store.column(j), patterns[:, j])
+        rows, counts = store.column_sparse(j)
+        assert np.array_equal(rows, np.flatnonzero(patterns[:, j]))
+        assert np.array_equal(counts, patterns[rows, j])
+
+    indices = rng.permutation(patterns.shape[1])[:5]
+    assert np.array_equal(store.matrix(indices), patterns[:, indices])
+
+    vector = rng.uniform(size=num_rows)
+    assert np.allclose(store.dot(vector), vector @ patterns)
+    x = rng.uniform(size=patterns.shape[1])
+    assert np.allclose(store.matvec(x), patterns @ x)
+    x_int = rng.randint(0, 5, size=patterns.shape[1])
+    assert np.array_equal(store.matvec(x_int), patterns @ x_int)
+
+    size = patterns.shape[1] // 2
+    assert np.array_equal(store.matrix(size=size), patterns[:, :size])
+    assert np.allclose(store.dot(vector, size=size), vector @ patterns[:, :size])
+    assert np.allclose(store.matvec(x[:size], size=size), patterns[:, :size] @ x[:size])
+
+
+@pytest.mark.parametrize("store_class", STORES)
+def test_from_matrix(store_class):
+    patterns = random_patterns(np.random.RandomState(7), 6, 20)
+    store = store_class.from_matrix(patterns)
+
+    assert len(store) == 20
+    assert np.array_equal(store.matrix(), patterns)
+
+
+@pytest.mark.parametrize("store_class", STORES)
+def test_snapshot_ignores_later_columns(store_class):
+    rng = np.random.RandomState(3)
+    patterns = random_patterns(rng, 5, 30)
+    store = store_class(5, capacity=2)
+    for j in range(10):
+        store.append(patterns[:, j])
+
+    snapshot = store.snapshot()
+    for j in range(10, 30):
+        store.append(patterns[:, j])
+
+    assert len(snapshot) == 10
+    assert np.array_equal(snapshot.matrix(), patterns[:, :10])
+    assert np.array_equal(snapshot.column(9), patterns[:, 9])
+    vector = rng.uniform(size=5)
+    assert np.allclose(snapshot.dot(vector), vector @ patterns[:, :10])
+    with pytest.raises(IndexError):
+        snapshot.column(10)
+
+
+def test_dense_matrix_is_a_view():
+    store = DenseColumnStore.from_matrix(np.eye(3, dtype=np.int32))
+    matrix = store.matrix()
+    store.buffer[0, 0] = 5
+
+    assert matrix[0, 0] == 5
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_pattern_keys_identify_patterns(sparse):
+    patterns = random_patterns(np.random.RandomState(11), 6, 200)
+    keys = {}
+    for j in range(patterns.shape[1]):
+        keys.setdefault(pattern_key(patterns[:, j], sparse), set()).add(patterns[:, j].tobytes())
+
+    # 相同的键只对应相同的模式，不同的模式键不同
+    assert all(len(values) == 1 for values in keys.values())
+    assert len(keys) == len({patterns[:, j].tobytes() for j in range(patterns.shape[1])})
+
+
+def test_sparse_pattern():
+    rows, counts = sparse_pattern([0, 2, 0, 1])
+    assert rows.tolist() == [1, 3]
+    assert counts.tolist() == [2, 1]
+
+
+def test_column_pool_matrix_by_column_indices():
+    patterns = random_patterns(np.random.RandomState(5), 4, 12)
+    pool = ColumnPool()
+    indices = [pool.add(patterns[:, j])[0] for j in range(patterns.shape[1])]
+    unique = sorted(set(indices))
+
+    # 重复的模式不加入列池
+    assert len(pool) == len(unique)
+    for j, c in enumerate(indices):
+        assert np.array_equal(pool.get(c), patterns[:, j])
+        assert pool.add(patterns[:, j]) == (c, False)
+
+    # 列下标为列池前缀时返回视图，其他顺序时按下标取列
+    assert np.array_equal(pool.to_matrix(unique[:3]), pool.to_matrix(size=3))
+    shuffled = [unique[2], unique[0], unique[-1]]
+    assert np.array_equal(pool.to_matrix(shuffled), np.column_stack([pool.get(c) for c in shuffled]))
@@ -0,0 +1,108 @@
+"""
+initial_heuristics 的构造启发式：向量化的 FFD / BFD 与逐个副本装箱的朴素实现对照，以及所有启发式的解可行且恰好满足需求。
+"""
+import numpy as np
+import pytest
+
+from initial_heuristics import greedy_residual, pack_decreasing, run_initial_heuristics
+from read_data import Data
+
+
+def random_instance(rng):
+    num_types = rng.randint(1, 8)
+    width = int(rng.randint(10, 100))
+    sizes = rng.randint(1, width + 1, size=num_types)
+    demands = rng.randint(0, 15, size=num_types)
+
+    return sizes, demands, width
+
+
+def naive_pack(sizes, demands, width, best_fit):
+    """逐个副本装箱：尺寸从大到小（尺寸相同时按下标），放入第一个 / 剩余长度最小的放得下的原材料。"""
+    contents = []
+    residual = []
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i], i)):
+        for _ in range(demands[i]):
+            fitting = [b for b in range(len(residual)) if residual[b] >= sizes[i]]
+            if len(fitting) == 0:
+                contents.append(np.zeros(len(sizes), dtype=np.int32))
+                residual.append(width)
+                b = len(residual) - 1
+            elif best_fit:
+                b = min(fitting, key=lambda b: (residual[b], b))
+            else:
+                b = fitting[0]
+            contents[b][i] += 1
+            residual[b] -= sizes[i]
+
+    if len(contents) == 0:
+        return np.zeros((len(sizes), 0), dtype=np.int32), np.zeros(0, dtype=np.int64)
+    patterns, counts = np.unique(np.array(contents), axis=0, return_counts=True)
+
+    return patterns.T, counts
+
+
+def check_solution(sizes, demands, width, patterns, counts):
+    assert patterns.shape[0] == len(sizes)
+    assert np.all(counts > 0)
+    assert np.all(sizes @ patterns <= width)
+    assert np.all(patterns >= 0)
+    assert np.array_equal(patterns @ counts, demands)
+
+
+@pytest.mark.parametrize("best_fit", [False, True])
+@pytest.mark.parametrize("seed", range(40))
+def test_pack_decreasing_matches_naive(seed, best_fit):
+    rng = np.random.RandomState(seed)
+    sizes, demands, width = random_instance(rng)
+
+    patterns, counts = pack_decreasing(sizes, demands, width, best_fit)
+    check_solution(sizes, demands, width, patterns, counts)
+
+    expected_patterns, expected_counts = naive_pack(sizes, demands, width, best_fit)
+    assert np.array_equal(patterns, expected_patterns)
+    assert np.array_equal(counts, expected_counts)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_greedy_residual_covers_demand(seed):
+    rng = np.random.RandomState(500 + seed)
+    sizes, demands, width = random_instance(rng)
+
+    patterns, counts = greedy_residual(sizes, demands, width)
+    if demands.sum() == 0:
+        assert counts.sum() == 0
+        return
+    # 每个模式的数量不超过当时的剩余需求，因此恰好满足需求
+    check_solution(sizes, demands, width, patterns, counts)
+
+
+def test_run_initial_heuristics():
+    data = Data()
+    data.Width = 115
+    data.Customer_demand_sizes = np.array([40, 55, 40, 70, 50, 70, 70, 30, 25, 30])
+    data.Customer_demands = np.array([3, 2, 4, 1, 5, 2, 3, 6, 2, 4])
+    data.Customer_numbers = 10
+
+    columns, (name, patterns, counts) = run_initial_heuristics(data)
+
+    assert name in ("FFD", "BFD", "greedy")
+    check_solution(data.Customer_demand_sizes, data.Customer_demands, data.Width, patterns, counts)
+    # 最好的解的模式都在初始列中，初始列互不相同
+    column_set = {tuple(column) for column in columns.T}
+    assert len(column_set) == columns.shape[1]
+    assert all(tuple(pattern) in column_set for pattern in patterns.T)
+    for best_fit in (False, True):
+        assert counts.sum() <= pack_decreasing(data.Customer_demand_sizes, data.Customer_demands, data.Width,
+                                               best_fit)[1].sum()
+
+
+def test_item_longer_than_width():
+    data = Data()
+    data.Width = 10
+    data.Customer_demand_sizes = np.array([4, 11])
+    data.Customer_demands = np.array([1, 1])
+    data.Customer_numbers = 2
+
+    with pytest.raises(ValueError):
+        run_initial_heuristics(data)
@@ -0,0 +1,87 @@
+"""
+knapsack_pricing.solve_knapsack_dp 与穷举的对照：无界、有界、k 个最好的模式，以及尺寸有公约数时的缩放。
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from knapsack_pricing import solve_knapsack_dp
+
+
+def enumerate_patterns(sizes, capacity, values, upper_bounds=None):
+    """穷举只含价值为正的物品的所有可行模式，返回 [(value, pattern), ...]，按价值降序。"""
+    ranges = []
+    for i, size in enumerate(sizes):
+        copies = capacity // size if values[i] > 0 else 0
+        if upper_bounds is not None:
+            copies = min(copies, upper_bounds[i])
+        ranges.append(range(copies + 1))
+
+    patterns = []
+    for pattern in itertools.product(*ranges):
+        if np.dot(sizes, pattern) <= capacity:
+            patterns.append((float(np.dot(values, pattern)), pattern))
+
+    return sorted(patterns, key=lambda item: -item[0])
+
+
+def check_against_enumeration(sizes, capacity, values, k, upper_bounds=None):
+    patterns, pattern_values = solve_knapsack_dp(sizes, capacity, values, k, upper_bounds)
+    expected = enumerate_patterns(sizes, capacity, values, upper_bounds)
+
+    assert len(patterns) == min(k, len(expected))
+    # 模式互不相同、可行，价值与返回值一致
+    assert len({pattern.tobytes() for pattern in patterns}) == len(patterns)
+    for pattern, value in zip(patterns, pattern_values):
+        assert np.dot(sizes, pattern) <= capacity
+        assert np.all(pattern >= 0)
+        if upper_bounds is not None:
+            assert np.all(pattern <= upper_bounds)
+        assert value == pytest.approx(np.dot(values, pattern))
+    # 价值相同的模式可能以任意顺序出现，只比较前 k 个价值
+    assert np.allclose(pattern_values, [value for value, _ in expected[:len(patterns)]])
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_unbounded_k_best(seed):
+    rng = np.random.RandomState(seed)
+    num_items = rng.randint(1, 5)
+    capacity = int(rng.randint(5, 40))
+    sizes = rng.randint(1, capacity + 1, size=num_items)
+    values = np.round(rng.uniform(-0.2, 1.0, size=num_items), 3)
+    check_against_enumeration(sizes, capacity, values, k=int(rng.randint(1, 6)))
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_bounded_k_best(seed):
+    rng = np.random.RandomState(1000 + seed)
+    num_items = rng.randint(1, 5)
+    capacity = int(rng.randint(5, 40))
+    sizes = rng.randint(1, capacity + 1, size=num_items)
+    values = np.round(rng.uniform(0.0, 1.0, size=num_items), 3)
+    upper_bounds = rng.randint(0, 6, size=num_items)
+    check_against_enumeration(sizes, capacity, values, k=int(rng.randint(1, 6)), upper_bounds=upper_bounds)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bounded_single_best_uses_binary_split(seed):
+    # k = 1 时有界物品按二进制拆分，上限取到 7、12 等非 2 的幂也要得到正确的数量
+    rng = np.random.RandomState(2000 + seed)
+    sizes = rng.randint(1, 6, size=3)
+    capacity = 60
+    values = np.round(rng.uniform(0.1, 1.0, size=3), 3)
+    upper_bounds = rng.randint(1, 13, size=3)
+    check_against_enumeration(sizes, capacity, values, k=1, upper_bounds=upper_bounds)
+
+
+def test_common_divisor_of_sizes():
+    sizes = np.array([40, 55, 40, 70, 50, 70, 70, 30, 25, 30]) * 3
+    values = [0.33, 0.5, 0.33, 0.5, 0.5, 0.5, 0.5, 0.25, 0.2, 0.25]
+    check_against_enumeration(sizes, 115 * 3 + 2, values, k=5)
+
+
+def test_no_item_with_positive_value():
+    patterns, pattern_values = solve_knapsack_dp([3, 4], 10, [0.0, -1.0], k=3)
+    assert patterns.tolist() == [[0, 0]]
+    assert pattern_values.tolist() == [0.0]
@@ -0,0 +1,115 @@
+"""
+preprocessing.InstancePreprocessor 的化简规则和 restore_solution 的还原，以及小算例上化简前后最少原材料数相同。
+"""
+import itertools
+from functools import lru_cache
+
+import numpy as np
+import pytest
+
+from initial_heuristics import pack_decreasing
+from preprocessing import InstancePreprocessor
+from read_data import Data
+
+
+def make_data(width, sizes, demands):
+    data = Data()
+    data.Width = width
+    data.Customer_demand_sizes = np.array(sizes)
+    data.Customer_demands = np.array(demands)
+    data.Customer_numbers = len(sizes)
+
+    return data
+
+
+def min_rolls(width, sizes, demands):
+    """逐根原材料枚举模式的精确解，只用于很小的算例。"""
+    sizes = tuple(int(size) for size in sizes)
+
+    @lru_cache(maxsize=None)
+    def solve(residual):
+        if sum(residual) == 0:
+            return 0
+        best = np.inf
+        for pattern in itertools.product(*[range(r + 1) for r in residual]):
+            if sum(pattern) > 0 and np.dot(sizes, pattern) <= width:
+                best = min(best, 1 + solve(tuple(r - a for r, a in zip(residual, pattern))))
+        return best
+
+    return solve(tuple(int(demand) for demand in demands))
+
+
+def check_restored(data, patterns, counts, expected_rolls):
+    assert patterns.shape[0] == data.Customer_numbers
+    assert np.all(data.Customer_demand_sizes @ patterns <= data.Width)
+    assert np.all(counts > 0)
+    assert np.array_equal(patterns @ counts, data.Customer_demands)
+    assert counts.sum() == expected_rolls
+
+
+def test_reduction_rules():
+    # 尺寸 90 只能单独切割；30 和 45 各有两种相同尺寸的物品；需求为 0 的物品删除；公约数为 15
+    data = make_data(100, [30, 90, 45, 30, 60, 45, 15], [2, 3, 1, 4, 0, 2, 5])
+    preprocessor = InstancePreprocessor(data)
+    reduced = preprocessor.reduced
+
+    assert preprocessor.statistics == {"zero_demand": 1, "fixed_alone": 1, "merged": 2, "gcd": 15}
+    assert preprocessor.fixed_items.tolist() == [1]
+    assert preprocessor.fixed_rolls == 3
+    assert reduced.Width == 6
+    assert reduced.Customer_demand_sizes.tolist() == [1, 2, 3]
+    assert reduced.Customer_demands.tolist() == [5, 6, 3]
+    assert reduced.Customer_numbers == 3
+    assert [group.tolist() for group in preprocessor.groups] == [[6], [0, 3], [2, 5]]
+
+
+def test_keeps_one_item_when_all_are_alone():
+    data = make_data(10, [7, 8, 9], [1, 2, 1])
+    preprocessor = InstancePreprocessor(data)
+
+    assert preprocessor.reduced.Customer_numbers == 1
+    assert preprocessor.fixed_rolls == 3
+
+    patterns, counts = pack_decreasing(preprocessor.reduced.Customer_demand_sizes,
+                                       preprocessor.reduced.Customer_demands, preprocessor.reduced.Width)
+    patterns, counts = preprocessor.restore_solution(patterns, counts)
+    check_restored(data, patterns, counts, 4)
+
+
+def test_restore_assigns_surplus_to_last_item_of_group():
+    data = make_data(100, [30, 30], [1, 2])
+    preprocessor = InstancePreprocessor(data)
+    # 化简后的算例只有一种物品；解多切了 2 个
+    patterns, counts = preprocessor.restore_solution(np.array([[1]]), np.array([5.0]))
+
+    assert (patterns @ counts).tolist() == [1, 4]
+    assert counts.sum() == 5
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_restore_and_optimal_rolls(seed):
+    rng = np.random.RandomState(seed)
+    num_types = rng.randint(1, 5)
+    divisor = rng.choice([1, 2, 3])
+    width = int(rng.randint(4, 13)) * divisor + int(rng.randint(0, divisor))
+    sizes = rng.randint(1, width // divisor + 1, size=num_types) * divisor
+    # 制造重复的尺寸
+    sizes[rng.uniform(size=num_types) < 0.3] = sizes[0]
+    demands = rng.randint(0, 4, size=num_types)
+    if demands.sum() == 0:
+        demands[0] = 1
+    data = make_data(width, sizes, demands)
+
+    preprocessor = InstancePreprocessor(data)
+    reduced = preprocessor.reduced
+    assert preprocessor.fixed_rolls + reduced.Customer_demands.sum() == demands.sum()
+
+    patterns, counts = pack_decreasing(reduced.Customer_demand_sizes, reduced.Customer_demands, reduced.Width)
+    assert np.all(reduced.Customer_demand_sizes @ patterns <= reduced.Width)
+    restored_patterns, restored_counts = preprocessor.restore_solution(patterns, counts)
+    check_restored(data, restored_patterns, restored_counts, counts.sum() + preprocessor.fixed_rolls)
+
+    # 化简不改变最优值
+    expected = min_rolls(width, sizes, demands)
+    assert min_rolls(reduced.Width, reduced.Customer_demand_sizes, reduced.Customer_demands) \
+        + preprocessor.fixed_rolls == expected
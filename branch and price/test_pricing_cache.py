@@ -0,0 +1,116 @@
+"""
+pricing_cache.PricingCache 的命中规则：精确命中、量化后相同的近似命中、过期命中、LRU 淘汰，以及弧对偶值和被禁止的弧进入键。
+"""
+import numpy as np
+import pytest
+
+from arc_flow import arc_reduced_cost, pattern_arcs
+from knapsack_pricing import price_patterns_dp, solve_knapsack_dp
+from pricing_cache import PricingCache
+
+SIZES = np.array([3, 5, 7])
+WIDTH = 20
+
+
+class Data:
+    Customer_demand_sizes = SIZES
+    Width = WIDTH
+
+
+def priced(shadow_price, k=3):
+    return price_patterns_dp(Data, shadow_price, k)
+
+
+def test_miss_then_exact_hit():
+    cache = PricingCache(capacity=4, quantum=1e-3)
+    shadow_price = np.array([0.2, 0.35, 0.5])
+
+    assert cache.get(SIZES, shadow_price) == (None, False)
+    candidates = priced(shadow_price)
+    cache.put(shadow_price, candidates)
+
+    cached, exact = cache.get(SIZES, shadow_price.copy())
+    assert exact
+    assert [pattern.tolist() for pattern, _ in cached] == [pattern.tolist() for pattern, _ in candidates]
+    assert np.allclose([rc for _, rc in cached], [rc for _, rc in candidates])
+    assert cache.statistics == {"exact_hits": 1, "near_hits": 0, "stale_hits": 0, "misses": 1}
+
+
+def test_near_hit_recomputes_reduced_costs():
+    cache = PricingCache(capacity=4, quantum=1e-3)
+    shadow_price = np.array([0.2, 0.35, 0.5])
+    cache.put(shadow_price, priced(shadow_price))
+
+    # 量化后相同但不完全相同的对偶值
+    nearby = shadow_price + np.array([2e-4, -3e-4, 1e-4])
+    cached, exact = cache.get(SIZES, nearby)
+    assert not exact
+    assert cached is not None
+    reduced_costs = [rc for _, rc in cached]
+    assert reduced_costs == sorted(reduced_costs)
+    for pattern, rc in cached:
+        assert rc == pytest.approx(1 - np.dot(nearby, pattern))
+    assert cached[0][1] < 0
+    assert cache.statistics["near_hits"] == 1
+
+
+def test_stale_hit_without_negative_reduced_cost():
+    cache = PricingCache(capacity=4, quantum=1.0)
+    shadow_price = np.array([0.3, 0.45, 0.5])
+    # 缓存的模式在新对偶值下都没有负 reduced cost 时不能用近似结果
+    cache.put(shadow_price, [(np.array([1, 0, 0]), 0.7)])
+
+    assert cache.get(SIZES, np.array([0.2, 0.4, 0.45])) == (None, False)
+    assert cache.statistics["stale_hits"] == 1
+
+
+def test_lru_eviction():
+    cache = PricingCache(capacity=2, quantum=1e-3)
+    prices = [np.array([0.1, 0.2, 0.3]) * (1 + j) for j in range(3)]
+    cache.put(prices[0], priced(prices[0]))
+    cache.put(prices[1], priced(prices[1]))
+    # 访问第一个后它成为最近使用的，加入第三个时淘汰第二个
+    assert cache.get(SIZES, prices[0])[1]
+    cache.put(prices[2], priced(prices[2]))
+
+    assert len(cache) == 2
+    assert cache.get(SIZES, prices[0])[1]
+    assert cache.get(SIZES, prices[1]) == (None, False)
+    assert cache.get(SIZES, prices[2])[1]
+
+
+def test_arc_duals_and_forbidden_arcs_are_part_of_key():
+    cache = PricingCache(capacity=8, quantum=1e-3)
+    shadow_price = np.array([0.2, 0.35, 0.5])
+    cache.put(shadow_price, priced(shadow_price))
+
+    arc = pattern_arcs(np.array([1, 1, 1]), SIZES)[0]
+    arc_duals = {arc: 0.25}
+    assert cache.get(SIZES, shadow_price, arc_duals) == (None, False)
+    assert cache.get(SIZES, shadow_price, arc_duals, {arc}) == (None, False)
+
+    patterns, _ = solve_knapsack_dp(SIZES, WIDTH, shadow_price, k=3)
+    candidates = [(pattern, arc_reduced_cost(pattern, shadow_price, arc_duals, SIZES)) for pattern in patterns]
+    cache.put(shadow_price, candidates, arc_duals, {arc})
+
+    cached, exact = cache.get(SIZES, shadow_price, dict(arc_duals), {arc})
+    assert exact
+    for pattern, rc in cached:
+        assert rc == pytest.approx(arc_reduced_cost(pattern, shadow_price, arc_duals, SIZES, {arc}))
+    # 弧对偶值量化后相同但不完全相同时为近似命中
+    nearby = {arc: 0.2502}
+    cached, exact = cache.get(SIZES, shadow_price, nearby, {arc})
+    assert not exact
+    assert cache.statistics["exact_hits"] == 1
+
+
+def test_hit_rate():
+    cache = PricingCache(capacity=4, quantum=1e-3)
+    assert cache.hit_rate() == 0.0
+
+    shadow_price = np.array([0.2, 0.35, 0.5])
+    cache.get(SIZES, shadow_price)
+    cache.put(shadow_price, priced(shadow_price))
+    cache.get(SIZES, shadow_price)
+
+    assert cache.hit_rate() == pytest.approx(0.5)
@@ -0,0 +1,85 @@
+"""
+pricing_hierarchy 的启发式定价：得到的模式可行、reduced cost 正确且为负、不优于精确 DP，以及层级的调用顺序。
+"""
+import numpy as np
+import pytest
+
+from knapsack_pricing import price_patterns_dp
+from pricing_hierarchy import PricingHierarchy, price_patterns_coarse_dp, price_patterns_greedy
+from read_data import Data
+
+
+def make_data(width, sizes):
+    data = Data()
+    data.Width = width
+    data.Customer_demand_sizes = np.array(sizes)
+    data.Customer_demands = np.ones(len(sizes), dtype=int)
+    data.Customer_numbers = len(sizes)
+
+    return data
+
+
+def random_case(rng, min_width, max_width):
+    num_types = rng.randint(1, 8)
+    width = int(rng.randint(min_width, max_width))
+    sizes = rng.randint(1, width + 1, size=num_types)
+    # 对偶值大致与尺寸成正比，使负 reduced cost 的模式时有时无
+    shadow_price = np.round(sizes / width * rng.uniform(0.6, 1.4, size=num_types), 4)
+
+    return make_data(width, sizes), shadow_price
+
+
+def check_candidates(data, shadow_price, candidates, k):
+    best = price_patterns_dp(data, shadow_price, 1)[0][1]
+    assert len(candidates) <= k
+    assert len({pattern.tobytes() for pattern, _ in candidates}) == len(candidates)
+    reduced_costs = [rc for _, rc in candidates]
+    assert reduced_costs == sorted(reduced_costs)
+    for pattern, rc in candidates:
+        assert np.all(pattern >= 0)
+        assert np.dot(data.Customer_demand_sizes, pattern) <= data.Width
+        assert rc == pytest.approx(1 - np.dot(shadow_price, pattern))
+        assert rc < 0
+        assert rc >= best - 1e-9
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_greedy(seed):
+    rng = np.random.RandomState(seed)
+    data, shadow_price = random_case(rng, 10, 200)
+    k = int(rng.randint(1, 5))
+
+    check_candidates(data, shadow_price, price_patterns_greedy(data, shadow_price, k), k)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_coarse_dp(seed):
+    rng = np.random.RandomState(300 + seed)
+    data, shadow_price = random_case(rng, 50, 2000)
+    k = int(rng.randint(1, 5))
+
+    check_candidates(data, shadow_price, price_patterns_coarse_dp(data, shadow_price, k, coarse_capacity=20), k)
+
+
+def test_coarse_dp_skipped_for_small_width():
+    data = make_data(30, [7, 11])
+    assert price_patterns_coarse_dp(data, [0.5, 0.8], 3, coarse_capacity=30) == []
+
+
+def test_hierarchy_levels():
+    hierarchy = PricingHierarchy()
+    data = make_data(100, [30, 45])
+
+    # 贪心就能找到负 reduced cost 的模式
+    candidates, level = hierarchy.price(data, [0.4, 0.5])
+    assert level == "greedy"
+    assert candidates[0][1] < 0
+    # 没有负 reduced cost 的模式时两层都尝试
+    assert hierarchy.price(data, [0.1, 0.1]) == (None, None)
+    assert hierarchy.statistics["greedy"] == {"calls": 2, "successes": 1, "columns": 0}
+    assert hierarchy.statistics["coarse_dp"]["calls"] == 1
+
+    hierarchy.record("greedy", 1)
+    hierarchy.record("exact", 0)
+    assert hierarchy.statistics["greedy"]["columns"] == 1
+    assert hierarchy.statistics["exact"] == {"calls": 1, "successes": 0, "columns": 0}
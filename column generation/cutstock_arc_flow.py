@@ -0,0 +1,258 @@
+"""
+切割问题的弧流 (arc-flow) 模型 (Valério de Carvalho)，带图压缩，用 COPT 一次求解整个 MIP。
+
+图的节点为原材料上的位置，弧 (u, v, s) 表示在位置 u 切出一个尺寸为 s 的物品，每个切割模式对应从源点 0 到汇点 W 的一条路径：
+
+    min  z
+    s.t. 流量守恒：源点流出 z，汇点流入 z，其余节点流入 = 流出
+         sum_{尺寸为 s 的弧 a} f_a >= 尺寸为 s 的物品的需求之和
+         f_a >= 0 且为整数
+
+建图与压缩：
+    1. 尺寸相同的物品合并为一种；按尺寸从大到小逐层加弧，只从已经可达的位置出发，每层至多连续放 min(d_s, W // s) 个，
+       去掉大部分对称的路径；
+    2. 主压缩：每个节点改标为 W - (从该节点到汇点的最长物品路径)，标号相同的节点合并；
+    3. 最终压缩：在压缩后的图上每个节点改标为 (从源点到该节点的最长物品路径)，标号相同的节点合并；
+    4. 最后从每个非汇点的节点加一条到汇点的废料弧。
+两次改标都保证弧两端的标号差不小于物品尺寸，因此原图的每条路径在压缩图上仍是路径，压缩图上的路径也都是可行的模式。
+
+求得的整数流分解为模式及用量，并按原始物品的顺序把合并的物品分回去，输出格式与 branch and price/main.py 相同，
+可以直接比较两者的目标值和切割方案。
+
+用法: python cutstock_arc_flow.py [data.txt] [--time-limit 秒]，算例格式同 branch and price/data.txt。
+"""
+import argparse
+import time
+from collections import defaultdict
+
+import coptpy as cp
+from coptpy import COPT
+
+
+def read_instance(path):
+    """读取与 branch and price/read_data.py 相同格式的算例，返回 (width, sizes, demands)。"""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    width = int(lines[1].strip())
+    sizes = list(map(int, lines[3].split(', ')))
+    demands = list(map(int, lines[5].split(', ')))
+
+    return width, sizes, demands
+
+
+def relabel(arcs, labels):
+    """按节点的新标号合并节点，返回去重后的弧集合。"""
+    return {(labels[u], labels[v], s) for u, v, s in arcs}
+
+
+class ArcFlowGraph:
+    def __init__(self, width, sizes, demands):
+        self.width = width
+        # 合并尺寸相同的物品，按尺寸从大到小
+        self.demand_of_size = defaultdict(int)
+        for size, demand in zip(sizes, demands):
+            if demand > 0:
+                self.demand_of_size[size] += demand
+        self.sizes = sorted(self.demand_of_size, reverse=True)
+
+        self.statistics = {}
+        self.arcs = self.build()
+        self.statistics["initial"] = self.size_of(self.arcs)
+        self.arcs = self.compress_to_sink(self.arcs)
+        self.statistics["main compression"] = self.size_of(self.arcs)
+        self.arcs = self.compress_from_source(self.arcs)
+        self.statistics["final compression"] = self.size_of(self.arcs)
+
+        self.source = min(u for u, _, _ in self.arcs) if self.arcs else 0
+        self.sink = self.width
+        # 废料弧的尺寸记为 0
+        nodes = {u for u, _, _ in self.arcs} | {v for _, v, _ in self.arcs} | {self.source}
+        self.arcs |= {(u, self.sink, 0) for u in nodes if u != self.sink}
+        self.arcs = sorted(self.arcs)
+        self.nodes = sorted(nodes | {self.sink})
+
+    @staticmethod
+    def size_of(arcs):
+        nodes = {u for u, _, _ in arcs} | {v for _, v, _ in arcs}
+        return len(nodes), len(arcs)
+
+    def build(self):
+        """按尺寸从大到小逐层加物品弧，返回 {(u, v, s)}。"""
+        arcs = set()
+        reachable = {0}
+        for size in self.sizes:
+            copies = min(self.demand_of_size[size], self.width // size)
+            new_nodes = set()
+            for u in sorted(reachable):
+                for k in range(copies):
+                    v = u + (k + 1) * size
+                    if v > self.width:
+                        break
+                    arcs.add((v - size, v, size))
+                    new_nodes.add(v)
+            reachable |= new_nodes
+
+        return arcs
+
+    def compress_to_sink(self, arcs):
+        """主压缩：节点改标为 W - 从该节点出发的最长物品路径。"""
+        longest = defaultdict(int)
+        for u, v, s in sorted(arcs, key=lambda arc: -arc[0]):
+            longest[u] = max(longest[u], s + longest[v])
+        labels = {node: self.width - longest[node] for node in {u for u, _, _ in arcs} | {v for _, v, _ in arcs}}
+
+        return relabel(arcs, labels)
+
+    def compress_from_source(self, arcs):
+        """最终压缩：节点改标为从源点到该节点的最长物品路径（源点为标号最小的节点）。"""
+        if not arcs:
+            return arcs
+        source = min(u for u, _, _ in arcs)
+        longest = defaultdict(int)
+        for u, v, s in sorted(arcs):
+            longest[v] = max(longest[v], longest[u] + s)
+        labels = {node: longest[node] if node != source else 0
+                  for node in {u for u, _, _ in arcs} | {v for _, v, _ in arcs}}
+
+        return relabel(arcs, labels)
+
+
+class CutStockArcFlow:
+    def __init__(self, width, sizes, demands, time_limit=None):
+        self.width = width
+        self.sizes = sizes
+        self.demands = demands
+        self.time_limit = time_limit
+
+        self.graph = None
+        self.model = None
+        self.flow = None
+
+    def build_model(self):
+        self.env = cp.Envr()
+        self.model = self.env.createModel("arc flow")
+        self.model.setParam(COPT.Param.Logging, 1)
+        if self.time_limit is not None:
+            self.model.setParam(COPT.Param.TimeLimit, self.time_limit)
+
+        graph = self.graph
+        self.flow = [self.model.addVar(lb=0.0, vtype=COPT.INTEGER, name="f({0},{1},{2})".format(u, v, s))
+                     for u, v, s in graph.arcs]
+        z = self.model.addVar(lb=0.0, vtype=COPT.INTEGER, name="z")
+
+        inflow = defaultdict(cp.LinExpr)
+        outflow = defaultdict(cp.LinExpr)
+        arcs_of_size = defaultdict(cp.LinExpr)
+        for (u, v, s), var in zip(graph.arcs, self.flow):
+            outflow[u].addTerm(var, 1.0)
+            inflow[v].addTerm(var, 1.0)
+            if s > 0:
+                arcs_of_size[s].addTerm(var, 1.0)
+
+        for node in graph.nodes:
+            if node == graph.source:
+                self.model.addConstr(outflow[node] - inflow[node] == z, name="flow_source")
+            elif node == graph.sink:
+                self.model.addConstr(inflow[node] - outflow[node] == z, name="flow_sink")
+            else:
+                self.model.addConstr(inflow[node] - outflow[node] == 0, name="flow_{0}".format(node))
+
+        for size in graph.sizes:
+            self.model.addConstr(arcs_of_size[size] >= graph.demand_of_size[size], name="demand_{0}".format(size))
+
+        self.model.setObjective(z, COPT.MINIMIZE)
+
+    def decompose(self, flow_values):
+        """把整数弧流分解为路径，返回 [(每种尺寸的数量 {s: n}, 用量), ...]。"""
+        graph = self.graph
+        remaining = {arc: int(round(x)) for arc, x in zip(graph.arcs, flow_values) if round(x) > 0}
+        out_arcs = defaultdict(list)
+        for arc in remaining:
+            out_arcs[arc[0]].append(arc)
+
+        paths = []
+        while True:
+            start = [arc for arc in out_arcs[graph.source] if remaining[arc] > 0]
+            if not start:
+                break
+            path = []
+            node = graph.source
+            while node != graph.sink:
+                arc = next(arc for arc in out_arcs[node] if remaining[arc] > 0)
+                path.append(arc)
+                node = arc[1]
+            quantity = min(remaining[arc] for arc in path)
+            for arc in path:
+                remaining[arc] -= quantity
+            counts = defaultdict(int)
+            for _, _, s in path:
+                if s > 0:
+                    counts[s] += 1
+            paths.append((dict(counts), quantity))
+
+        return paths
+
+    def restore_patterns(self, paths):
+        """
+        把按尺寸的模式分回原始物品：同一尺寸的物品按原始下标依次分配到各根原材料上，多余的给最后一个。
+        返回 (patterns, quantities)，patterns[j] 为第 j 个模式中各原始物品的数量。
+        """
+        items_of_size = defaultdict(list)
+        for i, (size, demand) in enumerate(zip(self.sizes, self.demands)):
+            if demand > 0:
+                items_of_size[size].append(i)
+        remaining = list(self.demands)
+
+        rolls = defaultdict(int)
+        for counts, quantity in paths:
+            for _ in range(quantity):
+                pattern = [0] * len(self.sizes)
+                for size, n in counts.items():
+                    items = items_of_size[size]
+                    for _ in range(n):
+                        item = next((i for i in items if remaining[i] > 0), items[-1])
+                        pattern[item] += 1
+                        remaining[item] = max(0, remaining[item] - 1)
+                rolls[tuple(pattern)] += 1
+
+        return [list(pattern) for pattern in rolls], list(rolls.values())
+
+    def main(self):
+        t1 = time.time()
+        self.graph = ArcFlowGraph(self.width, self.sizes, self.demands)
+        for step, (num_nodes, num_arcs) in self.graph.statistics.items():
+            print("arc-flow graph after {0}: {1} nodes, {2} arcs".format(step, num_nodes, num_arcs))
+        print("arc-flow graph with loss arcs: {0} nodes, {1} arcs".format(len(self.graph.nodes), len(self.graph.arcs)))
+
+        self.build_model()
+        self.model.solve()
+        t2 = time.time()
+
+        print("               *** report arc-flow Solution ***               ")
+        if self.model.status == COPT.OPTIMAL or \
+                self.model.status in [COPT.TIMEOUT, COPT.NODELIMIT, COPT.INTERRUPTED] and self.model.hasmipsol:
+            lower_bound = self.model.getAttr(COPT.Attr.BestBnd)
+            gap = (self.model.objval - lower_bound) / self.model.objval if self.model.objval > 0 else 0.0
+            print("arc flow terminates in {0} sec with gap of {1} %, status: {2}".format(t2 - t1, gap * 100, self.model.status))
+            print("objective value: {0:.0f}, lower bound: {1}".format(self.model.objval, lower_bound))
+
+            flow_values = self.model.getInfo(COPT.Info.Value, self.flow)
+            patterns, quantities = self.restore_patterns(self.decompose(flow_values))
+            for j, (pattern, quantity) in enumerate(zip(patterns, quantities)):
+                print("pattern {0}:  {1} with quantity: {2}".format(j, pattern, quantity))
+            return self.model.objval, lower_bound, patterns, quantities
+
+        print("arc flow terminates in {0} sec without an integral solution, status: {1}".format(t2 - t1, self.model.status))
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arc-flow MIP for the cutting stock problem")
+    parser.add_argument("data", nargs="?", default="../branch and price/data.txt", help="instance file")
+    parser.add_argument("--time-limit", type=float, default=None, help="time limit in seconds")
+    args = parser.parse_args()
+
+    width, sizes, demands = read_instance(args.data)
+    cutstock = CutStockArcFlow(width, sizes, demands, args.time_limit)
+    cutstock.main()
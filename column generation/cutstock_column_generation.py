@@ -2,6 +2,7 @@
 2024-2-21 14:31:24, The code references the official COPT examples. The reader can see documents in https://www.shanshu.ai/copt
 """
 import math
+import sys
 
 import coptpy as cp
 from coptpy import COPT
@@ -23,6 +24,18 @@ class CutStockCG:
         # 最大加列次数
         self.MAX_CG_cnt = 1000
 
+    def read_instance(self, path):
+        # 读取与 branch and price/data.txt 相同格式的算例，替换上面的默认算例
+        with open(path, 'r') as f:
+            lines = f.readlines()
+
+        self.roll_length = int(lines[1].strip())
+        self.roll_size = list(map(int, lines[3].split(', ')))
+        self.roll_demand = list(map(int, lines[5].split(', ')))
+        self.roll_kinds = len(self.roll_size)
+        self.initial_patterns = self.roll_kinds
+        self.roll_size_dict = {i: self.roll_size[i] for i in range(self.roll_kinds)}
+
     def report_RMP(self, RMP_model):
         # 打印RMP的信息
         print("               *** report RMP Solution ***               ")
@@ -143,4 +156,6 @@ class CutStockCG:
 
 if __name__ == "__main__":
     cutstock = CutStockCG()
-    cutstock.main()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        cutstock.read_instance(sys.argv[1])
+    cutstock.main()
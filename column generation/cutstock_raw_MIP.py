@@ -2,6 +2,8 @@
 # This file is part of the Cardinal Optimizer, all rights reserved.
 #
 
+import sys
+
 import coptpy as cp
 from coptpy import COPT
 
@@ -11,6 +13,17 @@ rolldemand = [42, 49, 16, 10, 37, 48, 10, 32, 35, 13]
 nkind      = len(rollsize)
 ndemand    = 200
 
+# Optional: read an instance in the format of branch and price/data.txt
+if len(sys.argv) > 1:
+  with open(sys.argv[1], 'r') as f:
+    lines = f.readlines()
+  rollwidth  = int(lines[1].strip())
+  rollsize   = list(map(int, lines[3].split(', ')))
+  rolldemand = list(map(int, lines[5].split(', ')))
+  nkind      = len(rollsize)
+  # every item cut from its own roll is always feasible
+  ndemand    = sum(rolldemand)
+
 # Create COPT environment
 env = cp.Envr()
 
@@ -43,6 +56,7 @@ if mcut.status == COPT.OPTIMAL or \
    mcut.status in [COPT.TIMEOUT, COPT.NODELIMIT, COPT.INTERRUPTED] and \
    mcut.hasmipsol:
   print('\nBest MIP objective value: {0:.0f}'.format(mcut.objval))
+  print('Best bound: {0:.6f}'.format(mcut.bestbnd))
 
   print('Cut patterns: ')
   for key in ncut:
@@ -0,0 +1,325 @@
+"""
+切割问题求解器组合 (portfolio)：在同一个算例上同时启动多个求解器，每个求解器是一个独立的进程，
+    bnp:        branch and price/main.py
+    bnp_gurobi: branch and price Gurobi/main.py
+    cg:         column generation/cutstock_column_generation.py（列生成后对主问题求整数解）
+    raw_mip:    column generation/cutstock_raw_MIP.py
+    arc_flow:   column generation/cutstock_arc_flow.py
+
+算例为 branch and price/data.txt 的格式，按各求解器需要的格式写到临时目录后作为命令行参数传入。
+主进程逐行读取各求解器的输出，解析当前最好整数解（上界）和下界：
+    - 某个求解器的上界不超过 ceil(下界) 时，它的解被证明最优，立即结束；
+    - 所有求解器中最好的上界不超过所有求解器中最好的下界向上取整时，该上界对应的解也已被证明最优；
+    - 到达 --time-limit 时取当前上界最好的求解器。
+结束时杀掉其余的求解器（整个进程组，包括它们的子进程），并输出各求解器的耗时、得到第一个整数解的时间和上下界，
+--report 指定文件时同时写成 JSON。各求解器的完整输出保存在 --log-dir 下。
+
+用法: python cutstock_portfolio.py [data.txt] [--engines bnp arc_flow ...] [--time-limit 秒]
+"""
+import argparse
+import json
+import math
+import os
+import queue
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TOL = 1e-6
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+# 胜出的求解器证明最优后，留给它输出切割方案并正常退出的时间（秒）
+WINNER_GRACE = 5.0
+
+
+def closes_gap(incumbent, lower_bound):
+    """目标值为整数：上界不超过 ceil(下界) 时上界已是最优值。"""
+    return math.isfinite(incumbent) and math.isfinite(lower_bound) and \
+        math.ceil(lower_bound - TOL) >= incumbent - TOL
+
+
+def read_instance(path):
+    """读取 branch and price/data.txt 格式的算例，返回 (width, sizes, demands)。"""
+    with open(path, 'r') as f:
+        lines = f.readlines()
+
+    width = int(lines[1].strip())
+    sizes = list(map(int, lines[3].split(', ')))
+    demands = list(map(int, lines[5].split(', ')))
+
+    return width, sizes, demands
+
+
+def write_bnp_instance(path, width, sizes, demands):
+    with open(path, 'w') as f:
+        f.write("# width\n{0}\n# demand size\n{1}\n# demands\n{2}\n".format(
+            width, ', '.join(map(str, sizes)), ', '.join(map(str, demands))))
+
+
+def write_gurobi_bnp_instance(path, width, sizes, demands):
+    # branch and price Gurobi/input.py: 种类数、原材料长度、规格、需求，各占一行，前面各有一行注释
+    with open(path, 'w') as f:
+        f.write("# number of types\n{0}\n# length of raw material\n{1}\n# specification\n{2}\n# demand\n{3}\n".format(
+            len(sizes), width, ' '.join(map(str, sizes)), ' '.join(map(str, demands))))
+
+
+# 各求解器输出的解析：每个函数处理一行输出，通过 run.update() 更新上下界
+
+def parse_bnp(run, line):
+    # 预处理固定的原材料不在迭代日志的上下界中，最终结果中已经加上
+    m = re.search(r"preprocessing: .*?, (\d+) fixed rolls", line)
+    if m:
+        run.offset = int(m.group(1))
+    m = re.search(r"initial incumbent from \w+: (\S+) rolls", line)
+    if m:
+        run.update(incumbent=float(m.group(1)) + run.offset)
+    m = re.search(r"current int lb:\s*(\S+)\s+current ub:\s*(\S+)", line)
+    if m:
+        run.update(incumbent=float(m.group(2)) + run.offset, lower_bound=float(m.group(1)) + run.offset)
+    m = re.search(r"BnPResult\(reason=\w+, ub=([^,]+), lb=[^,]+, int_lb=([^,]+),", line)
+    if m:
+        run.update(incumbent=float(m.group(1)), lower_bound=float(m.group(2)))
+
+
+def parse_bnp_gurobi(run, line):
+    m = re.match(r"UB: (\S+)", line)
+    if m:
+        run.update(incumbent=float(m.group(1)))
+    m = re.match(r"integral LB: (\S+)", line)
+    if m:
+        run.update(lower_bound=float(m.group(1)))
+
+
+def parse_cg(run, line):
+    # 列生成正常结束（最后一次定价的 reduced cost 非负）时，最后一次 RMP 的目标值是 LP 下界
+    m = re.search(r"Using (\S+) rolls", line)
+    if m:
+        run.last_rmp = float(m.group(1))
+    m = re.search(r"Price: (\S+)", line)
+    if m:
+        run.last_price = float(m.group(1))
+    if "*** End Loop ***" in line and run.last_price >= -TOL:
+        run.update(lower_bound=run.last_rmp)
+    m = re.search(r"Best MIP objective value: (\S+) rolls", line)
+    if m:
+        run.update(incumbent=float(m.group(1)))
+
+
+def parse_raw_mip(run, line):
+    m = re.search(r"Best MIP objective value: (\S+)", line)
+    if m:
+        run.update(incumbent=float(m.group(1)))
+    m = re.search(r"Best bound: (\S+)", line)
+    if m:
+        run.update(lower_bound=float(m.group(1)))
+
+
+def parse_arc_flow(run, line):
+    m = re.search(r"objective value: (\S+), lower bound: (\S+)", line)
+    if m:
+        run.update(incumbent=float(m.group(1)), lower_bound=float(m.group(2)))
+
+
+# 名称 --> (工作目录, 脚本, 算例写出函数, 命令行参数, 输出解析函数)
+ENGINES = {
+    "bnp": ("branch and price", "main.py", write_bnp_instance, lambda path: ["--data", path], parse_bnp),
+    "bnp_gurobi": ("branch and price Gurobi", "main.py", write_gurobi_bnp_instance, lambda path: [path],
+                   parse_bnp_gurobi),
+    "cg": ("column generation", "cutstock_column_generation.py", write_bnp_instance, lambda path: [path], parse_cg),
+    "raw_mip": ("column generation", "cutstock_raw_MIP.py", write_bnp_instance, lambda path: [path], parse_raw_mip),
+    "arc_flow": ("column generation", "cutstock_arc_flow.py", write_bnp_instance, lambda path: [path], parse_arc_flow),
+}
+
+
+class EngineRun:
+    def __init__(self, name, instance_dir, log_dir, width, sizes, demands):
+        self.name = name
+        directory, script, write_instance, arguments, self.parser = ENGINES[name]
+        self.cwd = os.path.join(ROOT, directory)
+        instance_path = os.path.join(instance_dir, "{0}.txt".format(name))
+        write_instance(instance_path, width, sizes, demands)
+        self.command = [sys.executable, "-u", script] + arguments(instance_path)
+        self.log_path = os.path.join(log_dir, "{0}.log".format(name))
+
+        self.process = None
+        self.reader = None
+        self.start_time = None
+        self.end_time = None
+        self.first_incumbent_time = None
+        self.incumbent = math.inf
+        self.lower_bound = -math.inf
+        self.status = "pending"
+        # 解析用的状态
+        self.offset = 0
+        self.last_rmp = math.inf
+        self.last_price = -math.inf
+
+    @property
+    def proven_optimal(self):
+        return closes_gap(self.incumbent, self.lower_bound)
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.end_time if self.end_time is not None else time.time()) - self.start_time
+
+    def update(self, incumbent=None, lower_bound=None):
+        if incumbent is not None and incumbent < self.incumbent:
+            self.incumbent = incumbent
+            if self.first_incumbent_time is None and math.isfinite(incumbent):
+                self.first_incumbent_time = time.time() - self.start_time
+        if lower_bound is not None and lower_bound > self.lower_bound:
+            self.lower_bound = lower_bound
+
+    def start(self, events):
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        self.start_time = time.time()
+        # 单独的进程组，结束时连同求解器的子进程（如并行节点求解的工作进程）一起杀掉
+        self.process = subprocess.Popen(self.command, cwd=self.cwd, env=env, stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT, text=True, errors="replace",
+                                        start_new_session=True)
+        self.status = "running"
+        self.reader = threading.Thread(target=self.read_output, args=(events,), daemon=True)
+        self.reader.start()
+
+    def read_output(self, events):
+        with open(self.log_path, 'w') as log:
+            for line in self.process.stdout:
+                log.write(line)
+                self.parser(self, ANSI_ESCAPE.sub("", line).strip())
+                events.put(self.name)
+        self.process.wait()
+        if self.end_time is None:
+            self.end_time = time.time()
+            self.status = "finished" if self.process.returncode == 0 else "failed"
+        events.put(self.name)
+
+    def kill(self):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.end_time = time.time()
+        self.status = "killed"
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+
+    def stop(self, grace=0.0):
+        """等待求解器至多 grace 秒，仍未结束时杀掉，然后等读取输出的线程结束。"""
+        if self.process is None:
+            return
+        try:
+            self.process.wait(timeout=grace)
+        except subprocess.TimeoutExpired:
+            self.kill()
+        self.reader.join()
+
+    def report(self):
+        return {
+            "engine": self.name,
+            "status": self.status,
+            "return_code": None if self.process is None else self.process.returncode,
+            "time": self.elapsed,
+            "first_incumbent_time": self.first_incumbent_time,
+            "incumbent": self.incumbent if math.isfinite(self.incumbent) else None,
+            "lower_bound": self.lower_bound if math.isfinite(self.lower_bound) else None,
+            "proven_optimal": self.proven_optimal,
+            "log": self.log_path,
+        }
+
+
+def race(runs, time_limit=None):
+    """
+    同时运行所有求解器，返回 (winner, reason)。reason 为 "optimal"（某个求解器证明最优）、
+    "portfolio_bound"（最好上界与所有求解器的最好下界相等）、"time_limit" 或 "finished"（所有求解器都已结束）。
+    """
+    events = queue.Queue()
+    for run in runs:
+        run.start(events)
+    deadline = None if time_limit is None else time.time() + time_limit
+
+    winner, reason = None, None
+    while True:
+        timeout = None if deadline is None else deadline - time.time()
+        if timeout is not None and timeout <= 0:
+            reason = "time_limit"
+            break
+        try:
+            events.get(timeout=timeout)
+        except queue.Empty:
+            continue
+
+        optimal = [run for run in runs if run.proven_optimal]
+        best = min(runs, key=lambda run: run.incumbent)
+        best_bound = max(run.lower_bound for run in runs)
+        if len(optimal) > 0:
+            winner, reason = min(optimal, key=lambda run: run.elapsed), "optimal"
+            break
+        if closes_gap(best.incumbent, best_bound):
+            winner, reason = best, "portfolio_bound"
+            break
+        if all(run.status in ("finished", "failed") for run in runs):
+            reason = "finished"
+            break
+
+    for run in runs:
+        if run is not winner:
+            run.stop()
+    if winner is not None:
+        winner.stop(WINNER_GRACE)
+    else:
+        candidates = [run for run in runs if math.isfinite(run.incumbent)]
+        if len(candidates) > 0:
+            winner = min(candidates, key=lambda run: (run.incumbent, run.first_incumbent_time))
+
+    return winner, reason
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race cutting stock engines on the same instance")
+    parser.add_argument("data", nargs="?", default=os.path.join(ROOT, "branch and price", "data.txt"),
+                        help="instance file in the format of branch and price/data.txt")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=sorted(ENGINES),
+                        help="engines to race (default all)")
+    parser.add_argument("--time-limit", type=float, default=None, help="deadline in seconds")
+    parser.add_argument("--log-dir", default=None, help="directory for the output of each engine")
+    parser.add_argument("--report", default=None, help="write the per-engine results to this JSON file")
+    args = parser.parse_args()
+
+    width, sizes, demands = read_instance(os.path.abspath(args.data))
+    instance_dir = tempfile.mkdtemp(prefix="cutstock_portfolio_")
+    log_dir = os.path.abspath(args.log_dir) if args.log_dir is not None else instance_dir
+    os.makedirs(log_dir, exist_ok=True)
+
+    runs = [EngineRun(name, instance_dir, log_dir, width, sizes, demands) for name in args.engines]
+    t1 = time.time()
+    winner, reason = race(runs, args.time_limit)
+    t2 = time.time()
+
+    print("portfolio terminates in {0:.3f} sec, reason: {1}".format(t2 - t1, reason))
+    print("{0:<12}{1:<10}{2:>10}{3:>16}{4:>12}{5:>14}".format(
+        "engine", "status", "time", "first incumbent", "incumbent", "lower bound"))
+    for run in runs:
+        first = "-" if run.first_incumbent_time is None else "{0:.3f}".format(run.first_incumbent_time)
+        print("{0:<12}{1:<10}{2:>10.3f}{3:>16}{4:>12}{5:>14}".format(
+            run.name, run.status, run.elapsed, first, run.incumbent, run.lower_bound))
+    if winner is None:
+        print("no engine found an integral solution")
+    else:
+        print("winner: {0} with {1} rolls (proven optimal: {2}), output in {3}".format(
+            winner.name, winner.incumbent, reason in ("optimal", "portfolio_bound"), winner.log_path))
+
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump({"instance": os.path.abspath(args.data), "reason": reason, "time": t2 - t1,
+                       "winner": None if winner is None else winner.name,
+                       "engines": [run.report() for run in runs]}, f, indent=2)